@@ -18,9 +18,10 @@ from flask_cors import CORS
 
 from backend.config_loader import load_config_to_env
 from backend.utils.version import get_version
-from backend.services.animation_pipeline import AnimationPipelineV2
 from backend.rate_limiter import PerUserRateLimiter
 from backend.cache_service import get_animation_cache
+from backend.job_queue import get_job_queue
+from backend.services.animation_service import get_animation_service
 from backend.routes import register_main_routes, register_api_routes
 from backend.routes.export import register_export_routes
 
@@ -120,20 +121,35 @@ def create_app():
     should_initialize = os.environ.get('WERKZEUG_RUN_MAIN') == 'true' or \
                        os.environ.get('WERKZEUG_RUN_MAIN') is None
     
+    # 流水线只由 AnimationService 持有；生产环境预加载后 fork，子进程共享
+    animation_service = get_animation_service()
+    
     if not should_initialize:
         logger.info("⏭️  Skipping initialization in reloader monitor process")
-        pipelines = {}
     else:
         logger.info("Initializing pipeline system...")
-        pipelines = {
-            '6dof': AnimationPipelineV2(dof_level='6dof', enable_optimization=True),
-            '12dof': AnimationPipelineV2(dof_level='12dof', enable_optimization=True)
-        }
-        logger.info(f"✅ Pipelines initialized: {list(pipelines.keys())}")
-    
-    app.pipelines = pipelines
+        animation_service.preload(['6dof', '12dof'])
+        logger.info(f"✅ Pipelines initialized: {list(animation_service.pipelines.keys())}")
+        
+        # 启动前预热缓存（生产环境在 fork 之前完成，子进程共享预热结果）
+        warmup_corpus = os.getenv('CACHE_WARMUP_CORPUS', '')
+        if warmup_corpus:
+            from backend.cache_warmup import load_corpus, warm_cache, log_progress
+            try:
+                warm_cache(
+                    animation_service,
+                    load_corpus(warmup_corpus),
+                    concurrency=int(os.getenv('CACHE_WARMUP_CONCURRENCY', '4')),
+                    progress=log_progress
+                )
+            except (OSError, ValueError) as e:
+                logger.error(f"Cache warm-up skipped: {e}")
+    
+    app.pipelines = animation_service.pipelines
     app.rate_limiter = rate_limiter
     app.animation_cache = animation_cache
+    app.animation_service = animation_service
+    app.job_queue = get_job_queue()
     app.metrics = metrics
     
     register_main_routes(app)
@@ -200,5 +216,10 @@ if __name__ == '__main__':
     print()
     print("=" * 60)
     
+    # 调试模式下只在实际处理请求的子进程（重载器之外）预热 LLM 连接
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        from backend.llm_client import get_llm_client
+        get_llm_client().prewarm()
+    
     logger.info(f"Starting server on {host}:{port}")
     app.run(host=host, port=port, debug=debug)
@@ -0,0 +1,15 @@
+"""
+ASGI Entry Point - Native asyncio Serving Mode
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+
+Generation requests run on the event loop (see backend/asgi.py);
+all other routes are served by the Flask app from app.py.
+
+Author: Shenzhen Wang & AI
+License: MIT
+"""
+from app import app as flask_app
+from backend.asgi import create_asgi_app
+
+app = create_asgi_app(flask_app)
@@ -0,0 +1,278 @@
+"""
+ASGI Application - Native asyncio Serving Mode
+
+Serves the generation endpoints directly on the event loop, so an
+in-flight LLM request costs a coroutine instead of a worker thread:
+
+- POST /api/generate         (same request/response as the Flask route)
+- POST /api/generate/stream  (same Server-Sent Events)
+
+Every other path is handed to the Flask app through asgiref's WSGI
+adapter. Run with:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+
+Author: Shenzhen Wang & AI
+License: MIT
+"""
+import json
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Callable, Awaitable, List, Tuple
+from flask import Flask
+from backend.routes.api import (
+    RESPONSE_FORMATS, _parse_generate_request, _failure_status, _failure_fields, animation_location, get_deadline,
+    sse_message
+)
+from backend.security import SecurityConfig
+from backend.llm_client import get_llm_client
+from backend.models.skeleton_12dof import Skeleton12DOF
+from backend.utils.response import sse_event
+from backend.utils.frame_codec import encode_columnar, CONTENT_TYPE as COLUMNAR_CONTENT_TYPE
+from backend.utils.http_cache import generate_body, generate_fields, negotiate, precompress_json
+from backend.utils.blocking import run_blocking
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:
+    WsgiToAsgi = None
+
+logger = logging.getLogger(__name__)
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Matches CORS(app) on the Flask side; preflight requests go to Flask
+CORS_HEADERS = {'Access-Control-Allow-Origin': '*'}
+
+
+class RequestError(Exception):
+    """Client error answered with a standard error body"""
+
+    def __init__(self, message: str, status_code: int = 400, **fields):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.fields = fields
+
+
+class AsgiApp:
+    """ASGI front end: async generation routes + WSGI fallback"""
+
+    def __init__(self, flask_app: Flask):
+        """
+        Initialize ASGI app
+
+        Args:
+            flask_app: Configured Flask app (provides animation_service and rate_limiter)
+        """
+        self.flask_app = flask_app
+        self.service = flask_app.animation_service
+        self.rate_limiter = flask_app.rate_limiter
+        self.fallback = WsgiToAsgi(flask_app) if WsgiToAsgi else None
+        self._prewarm_task = None
+        self.routes = {
+            '/api/generate': self.generate,
+            '/api/generate/stream': self.stream
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+
+        handler = self.routes.get(scope.get('path'))
+        if scope['type'] == 'http' and scope['method'] == 'POST' and handler:
+            try:
+                await handler(scope, receive, send)
+            except RequestError as e:
+                await self._send_json(send, {'success': False, 'message': e.message, **e.fields}, e.status_code)
+            return
+
+        if self.fallback is None:
+            await self._send_json(
+                send,
+                {'success': False, 'message': 'Endpoint not found (install asgiref for the full API)'},
+                404
+            )
+            return
+        await self.fallback(scope, receive, send)
+
+    async def generate(self, scope: Scope, receive: Receive, send: Send):
+        """POST /api/generate"""
+        start_time = time.time()
+        deadline = get_deadline('generate')
+        data = await self._read_json(scope, receive)
+        params = self._parse_params(data)
+
+        response_format = data.get('format', 'json')
+        if response_format not in RESPONSE_FORMATS:
+            raise RequestError(f'Invalid format: {response_format}')
+        if response_format == 'columnar' and params['dof_level'] != '12dof':
+            raise RequestError('Columnar format requires dof_level 12dof')
+
+        self._check_rate_limit(scope)
+
+        try:
+            result = await self.service.agenerate(**params, deadline=deadline)
+        except Exception as e:
+            logger.error(f"Error: {str(e)}", exc_info=True)
+            raise RequestError(str(e), status_code=500)
+
+        if not result['success']:
+            raise RequestError(
+                result.get('error', 'Failed'), status_code=_failure_status(result), **_failure_fields(result)
+            )
+
+        elapsed_ms = (time.time() - start_time) * 1000
+
+        if response_format == 'columnar':
+            payload = await run_blocking(
+                encode_columnar,
+                result['data'],
+                Skeleton12DOF.JOINT_NAMES,
+                extra_header={
+                    'metadata': result.get('metadata'),
+                    'cached': result['cached'],
+                    'coalesced': result['coalesced'],
+                    'latency_ms': elapsed_ms
+                }
+            )
+            await self._send(send, 200, payload, {'Content-Type': COLUMNAR_CONTENT_TYPE})
+            return
+
+        encoded = result.get('encoded_response')
+        if encoded is None:
+            encoded = await run_blocking(precompress_json, generate_body(result))
+        status, body, negotiated = negotiate(
+            encoded,
+            generate_fields(result, elapsed_ms),
+            _headers(scope).get('accept-encoding')
+        )
+        negotiated['Server-Timing'] = f'app;dur={elapsed_ms:.2f}'
+        if 'encoded_response' in result:
+            # Cached: clients can revalidate the ETag against the GET resource
+            key = self.service.animation_key(params['story'], params['dof_level'], params['interpolate'])
+            negotiated['Content-Location'] = animation_location(key)
+        await self._send(send, status, body, negotiated)
+
+    async def stream(self, scope: Scope, receive: Receive, send: Send):
+        """POST /api/generate/stream"""
+        deadline = get_deadline('stream')
+        params = self._parse_params(await self._read_json(scope, receive))
+        self._check_rate_limit(scope)
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': _encode_headers({
+                **CORS_HEADERS,
+                'Content-Type': 'text/event-stream; charset=utf-8',
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            })
+        })
+
+        events = self.service.agenerate_stream(**params, deadline=deadline)
+        try:
+            async for event in events:
+                if event['event'] == 'complete':
+                    # The final event can carry the whole animation; encode it off the loop
+                    await self._send_chunk(send, await run_blocking(sse_message, event))
+                else:
+                    await self._send_chunk(send, sse_message(event))
+        except Exception as e:
+            logger.error(f"Stream error: {str(e)}", exc_info=True)
+            await self._send_chunk(send, sse_event('error', {'message': str(e)}))
+        finally:
+            await events.aclose()
+
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+    async def _read_json(self, scope: Scope, receive: Receive) -> Dict[str, Any]:
+        """Read and decode a JSON request body (same checks as the Flask decorators)"""
+        content_type = _headers(scope).get('content-type', '')
+        if not content_type.startswith('application/json'):
+            raise RequestError('Content-Type must be application/json')
+
+        chunks: List[bytes] = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise RequestError('Client disconnected')
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > SecurityConfig.MAX_CONTENT_LENGTH:
+                raise RequestError('Request body too large', status_code=413)
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                break
+
+        try:
+            data = json.loads(b''.join(chunks) or b'null')
+        except ValueError:
+            raise RequestError('Invalid JSON body')
+        return data if isinstance(data, dict) else {}
+
+    def _parse_params(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        params, error = _parse_generate_request(data)
+        if error:
+            raise RequestError(error)
+        return params
+
+    def _check_rate_limit(self, scope: Scope):
+        client = scope.get('client') or ('unknown', 0)
+        client_ip = _headers(scope).get('x-forwarded-for', client[0])
+        if not self.rate_limiter.try_acquire(client_ip):
+            raise RequestError('Rate limit exceeded', status_code=429)
+
+    async def _send(self, send: Send, status: int, body: bytes, headers: Dict[str, str]):
+        headers = {**CORS_HEADERS, **headers}
+        await send({'type': 'http.response.start', 'status': status, 'headers': _encode_headers(headers)})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _send_json(self, send: Send, data: Dict[str, Any], status: int = 200):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        await self._send(send, status, body, {'Content-Type': 'application/json'})
+
+    async def _send_chunk(self, send: Send, text: str):
+        await send({'type': 'http.response.body', 'body': text.encode('utf-8'), 'more_body': True})
+
+    async def _lifespan(self, receive: Receive, send: Send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Open LLM connections on this loop without delaying startup
+                self._prewarm_task = asyncio.ensure_future(get_llm_client().aprewarm())
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.flask_app.job_queue.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def _headers(scope: Scope) -> Dict[str, str]:
+    """Request headers as a lowercase-keyed dict"""
+    return {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+
+
+def _encode_headers(headers: Dict[str, str]) -> List[Tuple[bytes, bytes]]:
+    return [(k.lower().encode('latin-1'), str(v).encode('latin-1')) for k, v in headers.items()]
+
+
+def create_asgi_app(flask_app: Flask) -> AsgiApp:
+    """
+    Create the ASGI application
+
+    Args:
+        flask_app: App returned by create_app()
+
+    Returns:
+        ASGI callable
+    """
+    if WsgiToAsgi is None:
+        logger.warning("asgiref not installed: only the async generation routes are served")
+    return AsgiApp(flask_app)
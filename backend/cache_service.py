@@ -1,46 +1,164 @@
 """
 Cache Service
 
-Implements LRU cache for animation results.
+Implements the animation result cache - an in-process LRU (optionally
+zlib-compressed) or a SQLite store shared by all workers on a host -
+the per-stage pipeline caches (story analyses, raw keyframes, optimized
+frames), a short-lived negative cache of failed generations, plus
+single-flight coalescing of identical in-flight generations.
 
 Author: Shenzhen Wang & AI
 License: MIT
 """
+import os
 import time
-import hashlib
+import zlib
+import logging
 import json
-from typing import Dict, Any, Optional
-from collections import OrderedDict
+import pickle
+import asyncio
+import hashlib
+import sqlite3
+import heapq
 import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional, Tuple, List, Callable, Mapping, Iterator
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Number of entries listed under 'largest_entries' in cache stats
+LARGEST_ENTRIES = 5
+
+# SQLiteCache refreshes an entry's LRU timestamp on a hit only when it is
+# older than this (seconds), so most hits are read-only
+ACCESS_TOUCH_SECONDS = 60
+
+# Top-level entry fields that are already compressed (precompressed HTTP
+# bodies); compressed entries keep them as-is so they are served without
+# decompressing the rest of the entry
+UNCOMPRESSED_FIELDS = ('encoded_response',)
 
 
-class LRUCache:
+def entry_size(data: Any) -> int:
+    """Approximate size of a cache entry in bytes (its pickled length)"""
+    return len(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class CompressedEntry(Mapping):
     """
-    Thread-safe LRU (Least Recently Used) cache
+    Read-only view of a zlib-compressed cache entry
     
-    Caches animation results with TTL (time-to-live) support.
+    Fields in UNCOMPRESSED_FIELDS (and fields added with with_fields) are
+    read directly; the rest of the entry is decompressed on first access
+    and kept for the lifetime of this view only.
+    """
+    
+    def __init__(self, blob: bytes, fields: Dict[str, Any], keys: Tuple[str, ...]):
+        self._blob = blob
+        self._fields = fields
+        self._keys = keys
+        self._data: Optional[Dict[str, Any]] = None
+    
+    @classmethod
+    def compress(cls, data: Dict[str, Any], level: int) -> 'CompressedEntry':
+        """Compress a result dict (pickled, then zlib at the given level)"""
+        fields = {k: data[k] for k in UNCOMPRESSED_FIELDS if k in data}
+        rest = {k: v for k, v in data.items() if k not in fields}
+        blob = zlib.compress(pickle.dumps(rest, protocol=pickle.HIGHEST_PROTOCOL), level)
+        return cls(blob, fields, tuple(data))
+    
+    @property
+    def size(self) -> int:
+        """Approximate bytes held by the entry"""
+        return len(self._blob) + entry_size(self._fields)
+    
+    def with_fields(self, **fields) -> 'CompressedEntry':
+        """New view sharing the compressed data, with extra or replaced top-level fields"""
+        keys = tuple(dict.fromkeys(self._keys + tuple(fields)))
+        view = CompressedEntry(self._blob, {**self._fields, **fields}, keys)
+        view._data = self._data
+        return view
+    
+    def _load(self) -> Dict[str, Any]:
+        if self._data is None:
+            self._data = pickle.loads(zlib.decompress(self._blob))
+        return self._data
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in self._fields:
+            return self._fields[key]
+        return self._load()[key]
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self._fields or key in self._keys
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+def with_fields(entry: Mapping, **fields) -> Mapping:
+    """Copy of a cache hit with extra top-level fields (compressed entries stay compressed)"""
+    if isinstance(entry, CompressedEntry):
+        return entry.with_fields(**fields)
+    return {**entry, **fields}
+
+
+class AnimationCache(ABC):
+    """
+    Interface shared by the animation cache backends
+    
+    Entries are keyed on the normalized story plus generation parameters
+    and expire ttl_seconds after they were written. Least recently used
+    entries are evicted once either max_size entries or max_bytes bytes
+    (approximate pickled size) are exceeded; a single entry larger than
+    max_entry_bytes is not cached at all.
+    
+    Entries younger than soft_ttl_seconds are fresh. Between the soft TTL
+    and the hard TTL (ttl_seconds) they are still served, but get_entry()
+    reports them stale so the caller can refresh them. With reap_interval
+    set, a daemon thread removes hard-expired entries off the request path.
     """
     
     def __init__(
         self,
         max_size: int = 1000,
-        ttl_seconds: int = 3600
+        ttl_seconds: int = 3600,
+        soft_ttl_seconds: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_entry_bytes: Optional[int] = None,
+        reap_interval: Optional[float] = None
     ):
         """
-        Initialize LRU cache
+        Initialize limits and counters shared by all backends
         
         Args:
             max_size: Maximum number of items in cache
-            ttl_seconds: Time-to-live for cached items (seconds)
+            ttl_seconds: Hard time-to-live; older items are never served (seconds)
+            soft_ttl_seconds: Items older than this are served stale (None: same as ttl_seconds)
+            max_bytes: Byte budget for all items (None: unlimited)
+            max_entry_bytes: Largest single item accepted (None: unlimited)
+            reap_interval: Seconds between background expiry sweeps (None: no reaper)
         """
         self.max_size = max_size
         self.ttl_seconds = ttl_seconds
-        self.cache: OrderedDict = OrderedDict()
+        self.soft_ttl_seconds = min(soft_ttl_seconds or ttl_seconds, ttl_seconds)
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.reap_interval = reap_interval
         self.lock = threading.Lock()
         self.hits = 0
         self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self.rejected = 0
+        self.reaped = 0
+        self._reaper_pid: Optional[int] = None
     
-    def _make_key(self, story: str, **kwargs) -> str:
+    def make_key(self, story: str, **kwargs) -> str:
         """
         Generate cache key from story and parameters
         
@@ -65,37 +183,168 @@ class LRUCache:
         return hashlib.sha256(key_str.encode()).hexdigest()
     
     def get(self, story: str, **kwargs) -> Optional[Dict[str, Any]]:
+        """Get cached result (fresh or stale), or None if not found/expired"""
+        entry = self.get_entry(story, **kwargs)
+        return entry[0] if entry else None
+    
+    def get_entry(self, story: str, **kwargs) -> Optional[Tuple[Dict[str, Any], bool]]:
+        """Get (cached result, is_stale), or None if not found/expired"""
+        return self.get_entry_by_key(self.make_key(story, **kwargs))
+    
+    @abstractmethod
+    def get_entry_by_key(self, key: str) -> Optional[Tuple[Dict[str, Any], bool]]:
+        """get_entry for a key from make_key (e.g. one handed out to clients)"""
+    
+    @abstractmethod
+    def contains(self, story: str, **kwargs) -> bool:
+        """Whether an unexpired entry exists (no hit/miss counting, no LRU update)"""
+    
+    @abstractmethod
+    def put(self, story: str, data: Dict[str, Any], **kwargs):
+        """Put result in cache"""
+    
+    @abstractmethod
+    def clear(self):
+        """Clear all cached items"""
+    
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+    
+    @abstractmethod
+    def cleanup_expired(self) -> int:
+        """Remove all expired items, returning how many were removed"""
+    
+    def _record_hit(self, age: float) -> bool:
+        """Count a hit on an item of the given age; returns whether it is stale"""
+        stale = age > self.soft_ttl_seconds
+        with self.lock:
+            self.hits += 1
+            if stale:
+                self.stale_hits += 1
+        return stale
+    
+    def _record_miss(self):
+        with self.lock:
+            self.misses += 1
+    
+    def _reset_counters(self):
+        """Reset counters (caller holds the lock)"""
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self.rejected = 0
+        self.reaped = 0
+    
+    def _counter_stats(self) -> Dict[str, Any]:
+        """Stats shared by all backends (caller holds the lock)"""
+        total = self.hits + self.misses
+        return {
+            'max_size': self.max_size,
+            'max_bytes': self.max_bytes,
+            'max_entry_bytes': self.max_entry_bytes,
+            'evictions': self.evictions,
+            'rejected': self.rejected,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total > 0 else 0,
+            'ttl_seconds': self.ttl_seconds,
+            'soft_ttl_seconds': self.soft_ttl_seconds,
+            'reaped': self.reaped
+        }
+    
+    def _ensure_reaper(self):
+        """Start the expiry thread in this process if configured (again after fork)"""
+        if not self.reap_interval or self._reaper_pid == os.getpid():
+            return
+        with self.lock:
+            if self._reaper_pid == os.getpid():
+                return
+            self._reaper_pid = os.getpid()
+        threading.Thread(target=self._reap_loop, name='cache-reaper', daemon=True).start()
+    
+    def _reap_loop(self):
+        while True:
+            time.sleep(self.reap_interval)
+            try:
+                removed = self.cleanup_expired()
+            except Exception as e:
+                logger.error(f"Cache expiry sweep failed: {str(e)}")
+                continue
+            if removed:
+                with self.lock:
+                    self.reaped += removed
+                logger.info(f"Removed {removed} expired cache items")
+
+
+class LRUCache(AnimationCache):
+    """
+    Thread-safe LRU (Least Recently Used) cache
+    
+    Caches animation results with TTL (time-to-live) support.
+    Per-process: each worker has its own copy.
+    
+    With compress_level set, dict entries are stored zlib-compressed and
+    returned as CompressedEntry views; the byte budget then counts the
+    compressed size, so the same max_bytes holds several times more entries.
+    """
+    
+    def __init__(self, compress_level: int = 0, **limits):
+        """
+        Initialize LRU cache
+        
+        Args:
+            compress_level: zlib level 1-9 for stored entries (0: store uncompressed)
+            **limits: See AnimationCache.__init__
+        """
+        super().__init__(**limits)
+        self.compress_level = compress_level
+        self.cache: OrderedDict = OrderedDict()
+        self.bytes_used = 0
+        self.uncompressed_bytes = 0
+    
+    def get_entry_by_key(self, key: str) -> Optional[Tuple[Dict[str, Any], bool]]:
         """
         Get cached result
         
         Args:
-            story: Story description
-            **kwargs: Additional parameters
+            key: Cache key from make_key
             
         Returns:
-            Cached result or None if not found/expired
+            (cached result, is_stale) or None if not found/expired
         """
-        key = self._make_key(story, **kwargs)
+        self._ensure_reaper()
         
         with self.lock:
-            if key not in self.cache:
-                self.misses += 1
-                return None
-            
-            # Get cached item
-            item = self.cache[key]
+            item = self.cache.get(key)
+            age = time.time() - item['timestamp'] if item else 0
             
             # Check if expired
-            if time.time() - item['timestamp'] > self.ttl_seconds:
-                del self.cache[key]
-                self.misses += 1
-                return None
+            if item is not None and age > self.ttl_seconds:
+                self._remove(key)
+                item = None
             
-            # Move to end (most recently used)
-            self.cache.move_to_end(key)
-            self.hits += 1
-            
-            return item['data']
+            if item is not None:
+                # Move to end (most recently used)
+                self.cache.move_to_end(key)
+        
+        if item is None:
+            self._record_miss()
+            return None
+        data = item['data']
+        if isinstance(data, CompressedEntry):
+            # Fresh view per hit, so decompressed data is not kept in the cache
+            data = data.with_fields()
+        return data, self._record_hit(age)
+    
+    def contains(self, story: str, **kwargs) -> bool:
+        """Whether an unexpired entry exists (no hit/miss counting, no LRU update)"""
+        key = self.make_key(story, **kwargs)
+        with self.lock:
+            item = self.cache.get(key)
+            return item is not None and time.time() - item['timestamp'] <= self.ttl_seconds
     
     def put(self, story: str, data: Dict[str, Any], **kwargs):
         """
@@ -106,28 +355,54 @@ class LRUCache:
             data: Animation data to cache
             **kwargs: Additional parameters
         """
-        key = self._make_key(story, **kwargs)
+        self._ensure_reaper()
+        key = self.make_key(story, **kwargs)
+        raw_size = size = entry_size(data)
+        if self.compress_level and isinstance(data, dict):
+            data = CompressedEntry.compress(data, self.compress_level)
+            size = data.size
         
         with self.lock:
+            if self.max_entry_bytes and size > self.max_entry_bytes:
+                # Too large to cache; drop any older copy instead of serving it
+                self.rejected += 1
+                if key in self.cache:
+                    self._remove(key)
+                return
+            
             # Add or update item
+            if key in self.cache:
+                self._remove(key)
             self.cache[key] = {
                 'data': data,
-                'timestamp': time.time()
+                'timestamp': time.time(),
+                'size': size,
+                'raw_size': raw_size
             }
+            self.bytes_used += size
+            self.uncompressed_bytes += raw_size
             
-            # Move to end (most recently used)
-            self.cache.move_to_end(key)
-            
-            # Evict oldest if over capacity
-            if len(self.cache) > self.max_size:
-                self.cache.popitem(last=False)
+            # Evict least recently used items until within both limits
+            while len(self.cache) > 1 and (
+                len(self.cache) > self.max_size
+                or (self.max_bytes and self.bytes_used > self.max_bytes)
+            ):
+                self._remove(next(iter(self.cache)))
+                self.evictions += 1
+    
+    def _remove(self, key: str):
+        """Remove an item and its size (caller holds the lock)"""
+        item = self.cache.pop(key)
+        self.bytes_used -= item['size']
+        self.uncompressed_bytes -= item['raw_size']
     
     def clear(self):
         """Clear all cached items"""
         with self.lock:
             self.cache.clear()
-            self.hits = 0
-            self.misses = 0
+            self.bytes_used = 0
+            self.uncompressed_bytes = 0
+            self._reset_counters()
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -137,16 +412,20 @@ class LRUCache:
             Dict with cache stats
         """
         with self.lock:
-            total = self.hits + self.misses
-            hit_rate = self.hits / total if total > 0 else 0
+            largest = heapq.nlargest(
+                LARGEST_ENTRIES, self.cache.items(), key=lambda kv: kv[1]['size']
+            )
             
             return {
+                'backend': 'memory',
                 'size': len(self.cache),
-                'max_size': self.max_size,
-                'hits': self.hits,
-                'misses': self.misses,
-                'hit_rate': hit_rate,
-                'ttl_seconds': self.ttl_seconds
+                'bytes_used': self.bytes_used,
+                'compress_level': self.compress_level,
+                'compression_ratio': self.uncompressed_bytes / self.bytes_used if self.bytes_used else 1.0,
+                'largest_entries': [
+                    {'key': key[:16], 'bytes': item['size']} for key, item in largest
+                ],
+                **self._counter_stats()
             }
     
     def cleanup_expired(self):
@@ -160,21 +439,482 @@ class LRUCache:
             ]
             
             for key in expired_keys:
-                del self.cache[key]
+                self._remove(key)
             
             return len(expired_keys)
 
 
-# Global cache instance
-_animation_cache: Optional[LRUCache] = None
+class SQLiteCache(AnimationCache):
+    """
+    Disk-backed LRU cache shared by all worker processes on a host
+    
+    Entries are pickled into a SQLite database in WAL mode, so concurrent
+    readers do not block each other and results survive restarts. A hit
+    updates the entry's LRU timestamp only when it is older than
+    ACCESS_TOUCH_SECONDS, so repeated hits on a hot entry do not each
+    take the database write lock; LRU order is accurate to that. Each
+    thread (and each forked process) opens its own connection. Hit/miss
+    counters and eviction counts are per process; size and bytes_used
+    are read from the shared database.
+    """
+    
+    def __init__(
+        self,
+        path: str = 'data/animation_cache.db',
+        table: str = 'animation_cache',
+        **limits
+    ):
+        """
+        Initialize SQLite cache
+        
+        Args:
+            path: Database file (created with its directory if missing)
+            table: Table name, so several caches can share one file
+            **limits: See AnimationCache.__init__
+        """
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table}")
+        super().__init__(**limits)
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} ('
+                ' key TEXT PRIMARY KEY,'
+                ' data BLOB NOT NULL,'
+                ' size INTEGER NOT NULL DEFAULT 0,'
+                ' created_at REAL NOT NULL,'
+                ' accessed_at REAL NOT NULL)'
+            )
+            columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+            if 'size' not in columns:
+                # Tables created before size accounting
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN size INTEGER NOT NULL DEFAULT 0')
+                conn.execute(f'UPDATE {table} SET size = length(data)')
+            conn.execute(
+                f'CREATE INDEX IF NOT EXISTS idx_{table}_accessed '
+                f'ON {table} (accessed_at)'
+            )
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Connection for the current thread, reopened after fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def get_entry_by_key(self, key: str) -> Optional[Tuple[Dict[str, Any], bool]]:
+        """
+        Get cached result
+        
+        Args:
+            key: Cache key from make_key
+            
+        Returns:
+            (cached result, is_stale) or None if not found/expired
+        """
+        self._ensure_reaper()
+        conn = self._connect()
+        now = time.time()
+        
+        row = conn.execute(
+            f'SELECT data, created_at, accessed_at FROM {self.table} WHERE key = ?', (key,)
+        ).fetchone()
+        
+        if row is not None and now - row[1] > self.ttl_seconds:
+            conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+            row = None
+        
+        if row is None:
+            self._record_miss()
+            return None
+        
+        if now - row[2] > ACCESS_TOUCH_SECONDS:
+            conn.execute(f'UPDATE {self.table} SET accessed_at = ? WHERE key = ?', (now, key))
+        return pickle.loads(row[0]), self._record_hit(now - row[1])
+    
+    def contains(self, story: str, **kwargs) -> bool:
+        """Whether an unexpired entry exists (no hit/miss counting, no LRU update)"""
+        row = self._connect().execute(
+            f'SELECT 1 FROM {self.table} WHERE key = ? AND created_at >= ?',
+            (self.make_key(story, **kwargs), time.time() - self.ttl_seconds)
+        ).fetchone()
+        return row is not None
+    
+    def put(self, story: str, data: Dict[str, Any], **kwargs):
+        """
+        Put result in cache
+        
+        Args:
+            story: Story description
+            data: Animation data to cache
+            **kwargs: Additional parameters
+        """
+        self._ensure_reaper()
+        key = self.make_key(story, **kwargs)
+        blob = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        conn = self._connect()
+        now = time.time()
+        
+        if self.max_entry_bytes and len(blob) > self.max_entry_bytes:
+            # Too large to cache; drop any older copy instead of serving it
+            conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+            with self.lock:
+                self.rejected += 1
+            return
+        
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                f'INSERT OR REPLACE INTO {self.table} (key, data, size, created_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, blob, len(blob), now, now)
+            )
+            # Evict least recently used entries over capacity
+            evicted = conn.execute(
+                f'DELETE FROM {self.table} WHERE key IN ('
+                f' SELECT key FROM {self.table} ORDER BY accessed_at'
+                f' LIMIT max(0, (SELECT COUNT(*) FROM {self.table}) - ?))',
+                (self.max_size,)
+            ).rowcount
+            if self.max_bytes:
+                # ...and beyond the byte budget, newest first, always keeping this entry
+                evicted += conn.execute(
+                    f'DELETE FROM {self.table} WHERE key IN ('
+                    f' SELECT key FROM ('
+                    f'  SELECT key, SUM(size) OVER (ORDER BY key = ? DESC, accessed_at DESC) AS running'
+                    f'  FROM {self.table})'
+                    f' WHERE running > ? AND key != ?)',
+                    (key, self.max_bytes, key)
+                ).rowcount
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        
+        if evicted:
+            with self.lock:
+                self.evictions += evicted
+    
+    def clear(self):
+        """Clear all cached items"""
+        self._connect().execute(f'DELETE FROM {self.table}')
+        with self.lock:
+            self._reset_counters()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+        
+        Returns:
+            Dict with cache stats
+        """
+        conn = self._connect()
+        size, bytes_used = conn.execute(
+            f'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}'
+        ).fetchone()
+        largest = conn.execute(
+            f'SELECT key, size FROM {self.table} ORDER BY size DESC LIMIT ?', (LARGEST_ENTRIES,)
+        ).fetchall()
+        with self.lock:
+            return {
+                'backend': 'sqlite',
+                'path': self.path,
+                'table': self.table,
+                'size': size,
+                'bytes_used': bytes_used,
+                'largest_entries': [{'key': key[:16], 'bytes': nbytes} for key, nbytes in largest],
+                **self._counter_stats()
+            }
+    
+    def cleanup_expired(self) -> int:
+        """Remove all expired items"""
+        cursor = self._connect().execute(
+            f'DELETE FROM {self.table} WHERE created_at < ?',
+            (time.time() - self.ttl_seconds,)
+        )
+        return cursor.rowcount
+
+
+class Flight:
+    """One in-flight execution that other callers can wait on"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+        self._callbacks: List[Callable[['Flight'], None]] = []
+        self._lock = threading.Lock()
+    
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        """
+        Block until the leader finishes
+        
+        Args:
+            timeout: Maximum wait in seconds (None waits forever)
+        
+        Returns:
+            The leader's result
+            
+        Raises:
+            TimeoutError: If the leader did not finish within timeout
+            The leader's exception, if it failed
+        """
+        if not self.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for in-flight execution")
+        return self._outcome()
+    
+    async def wait_async(self, timeout: Optional[float] = None) -> Any:
+        """
+        Wait for the leader without blocking the event loop
+        
+        The leader may run on another thread or on the same loop.
+        
+        Args:
+            timeout: Maximum wait in seconds (None waits forever)
+        
+        Returns:
+            The leader's result
+            
+        Raises:
+            TimeoutError: If the leader did not finish within timeout
+            The leader's exception, if it failed
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        def wake(_flight: 'Flight'):
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+        
+        self.add_done_callback(wake)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError("Timed out waiting for in-flight execution")
+        return self._outcome()
+    
+    def add_done_callback(self, fn: Callable[['Flight'], None]):
+        """Call fn(flight) once the leader finishes (immediately if it already has)"""
+        with self._lock:
+            if not self.done.is_set():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+    
+    def finish(self, result: Any = None, error: Optional[BaseException] = None):
+        """Publish the outcome and run callbacks"""
+        self.result = result
+        self.error = error
+        with self._lock:
+            self.done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            fn(self)
+    
+    def _outcome(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return self.result
 
 
-def get_animation_cache() -> LRUCache:
-    """Get or create animation cache singleton"""
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution
+    
+    The first caller for a key becomes the leader and does the work;
+    callers arriving while it runs wait for and share its result.
+    Thread-safe implementation.
+    """
+    
+    def __init__(self):
+        self.flights: Dict[str, Flight] = {}
+        self.lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+    
+    def try_acquire(self, key: str) -> Optional[Flight]:
+        """
+        Start a flight for key only if none is running
+        
+        Args:
+            key: Coalescing key
+            
+        Returns:
+            The new flight (caller is the leader and must call release()),
+            or None if one is already in flight
+        """
+        with self.lock:
+            if key in self.flights:
+                return None
+            flight = Flight()
+            self.flights[key] = flight
+            self.executions += 1
+            return flight
+    
+    def acquire(self, key: str) -> Tuple[Flight, bool]:
+        """
+        Join the flight for key, starting one if none is running
+        
+        Args:
+            key: Coalescing key
+            
+        Returns:
+            (flight, is_leader) - the leader must call release()
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self.coalesced += 1
+                return flight, False
+            
+            flight = Flight()
+            self.flights[key] = flight
+            self.executions += 1
+            return flight, True
+    
+    def release(
+        self,
+        key: str,
+        flight: Flight,
+        result: Any = None,
+        error: Optional[BaseException] = None
+    ):
+        """
+        Publish the leader's outcome and wake all waiters
+        
+        Args:
+            key: Coalescing key passed to acquire()
+            flight: Flight returned by acquire()
+            result: Result shared with waiters
+            error: Exception re-raised in waiters instead of a result
+        """
+        with self.lock:
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+        
+        flight.finish(result=result, error=error)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing statistics
+        
+        Returns:
+            Dict with single-flight stats
+        """
+        with self.lock:
+            return {
+                'in_flight': len(self.flights),
+                'executions': self.executions,
+                'coalesced': self.coalesced
+            }
+
+
+# Pipeline stages with their own cache (see AnimationPipelineV2)
+STAGES = ('analysis', 'keyframes', 'frames')
+
+# Global cache instances
+_animation_cache: Optional[AnimationCache] = None
+_stage_caches: Optional[Dict[str, AnimationCache]] = None
+_negative_cache: Optional[AnimationCache] = None
+_negative_cache_loaded = False
+
+
+def _create_cache(
+    max_size: int,
+    ttl_seconds: int,
+    max_bytes: int,
+    table: str,
+    soft_ttl_seconds: int = 0,
+    compress_level: int = 0
+) -> AnimationCache:
+    """
+    Create a cache on the backend selected by CACHE_BACKEND (0 bytes/seconds: unlimited/off)
+    
+    compress_level only applies to the memory backend; SQLite entries live on disk.
+    """
+    backend = os.getenv('CACHE_BACKEND', 'memory')
+    limits = {
+        'max_size': max_size,
+        'ttl_seconds': ttl_seconds,
+        'soft_ttl_seconds': soft_ttl_seconds or None,
+        'max_bytes': max_bytes or None,
+        'max_entry_bytes': int(os.getenv('CACHE_MAX_ENTRY_BYTES', str(16 * 1024 * 1024))) or None,
+        'reap_interval': float(os.getenv('CACHE_REAP_INTERVAL_SECONDS', '60')) or None
+    }
+    if backend == 'sqlite':
+        return SQLiteCache(
+            path=os.getenv('CACHE_SQLITE_PATH', 'data/animation_cache.db'),
+            table=table,
+            **limits
+        )
+    if backend == 'memory':
+        return LRUCache(compress_level=compress_level, **limits)
+    raise ValueError(f"Unsupported cache backend: {backend}")
+
+
+def get_animation_cache() -> AnimationCache:
+    """Get or create animation cache singleton (backend from CACHE_BACKEND)"""
     global _animation_cache
     if _animation_cache is None:
-        _animation_cache = LRUCache(
-            max_size=1000,
-            ttl_seconds=3600  # 1 hour
+        _animation_cache = _create_cache(
+            max_size=int(os.getenv('CACHE_MAX_SIZE', '1000')),
+            ttl_seconds=int(os.getenv('CACHE_TTL_SECONDS', '86400')),  # hard: 1 day
+            soft_ttl_seconds=int(os.getenv('CACHE_SOFT_TTL_SECONDS', '3600')),  # 1 hour
+            max_bytes=int(os.getenv('CACHE_MAX_BYTES', str(256 * 1024 * 1024))),
+            table='animation_cache',
+            compress_level=int(os.getenv('CACHE_COMPRESS_LEVEL', '0'))
         )
     return _animation_cache
+
+
+def get_stage_caches() -> Dict[str, AnimationCache]:
+    """
+    Get or create the per-stage caches, one per entry in STAGES
+    
+    They use the same backend as the animation cache. Returns an empty
+    dict when CACHE_STAGES_ENABLED is false.
+    """
+    global _stage_caches
+    if _stage_caches is None:
+        if os.getenv('CACHE_STAGES_ENABLED', 'true').lower() != 'true':
+            _stage_caches = {}
+        else:
+            max_size = int(os.getenv('CACHE_STAGE_MAX_SIZE', '2000'))
+            ttl_seconds = int(os.getenv('CACHE_STAGE_TTL_SECONDS', '86400'))  # 1 day
+            max_bytes = int(os.getenv('CACHE_STAGE_MAX_BYTES', str(128 * 1024 * 1024)))
+            _stage_caches = {
+                stage: _create_cache(max_size, ttl_seconds, max_bytes, table=f'{stage}_cache')
+                for stage in STAGES
+            }
+    return _stage_caches
+
+
+def get_negative_cache() -> Optional[AnimationCache]:
+    """
+    Get or create the negative cache (recent generation failures)
+    
+    Same backend as the animation cache, short TTL. Returns None when
+    CACHE_NEGATIVE_TTL_SECONDS is 0.
+    """
+    global _negative_cache, _negative_cache_loaded
+    if not _negative_cache_loaded:
+        ttl_seconds = int(os.getenv('CACHE_NEGATIVE_TTL_SECONDS', '30'))
+        if ttl_seconds > 0:
+            _negative_cache = _create_cache(
+                max_size=int(os.getenv('CACHE_NEGATIVE_MAX_SIZE', '1000')),
+                ttl_seconds=ttl_seconds,
+                max_bytes=0,
+                table='negative_cache'
+            )
+        _negative_cache_loaded = True
+    return _negative_cache
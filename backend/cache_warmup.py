@@ -0,0 +1,158 @@
+"""
+Cache Warm-up - Pre-generate Animations for a Story Corpus
+
+Runs a list of stories through the animation service before traffic
+arrives, so the first users of popular stories get cache hits instead
+of full LLM latency. Stories that are already cached are skipped.
+
+Corpus file: one story per line, or one JSON object per line with
+"story" and optional "dof_level" / "interpolate" (same fields and
+validation as POST /api/generate). Blank lines and lines starting with
+'#' are ignored.
+
+Used by warm_cache.py (CLI) and by app startup when
+cache.warmup_corpus is set.
+
+Author: Shenzhen Wang & AI
+License: MIT
+"""
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Sequence, Callable
+from backend.routes.api import _parse_generate_request
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, int, Dict[str, Any]], None]
+
+
+def load_corpus(path: str, dof_levels: Sequence[str] = ('12dof',)) -> List[Dict[str, Any]]:
+    """
+    Read and validate a corpus file
+
+    Args:
+        path: Corpus file
+        dof_levels: DOF levels for plain-text lines (one item per level)
+
+    Returns:
+        Generation params [{"story", "dof_level", "use_cache", "interpolate"}]
+
+    Raises:
+        ValueError: If a line is not a valid generate request
+    """
+    items = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            if line.startswith('{'):
+                try:
+                    requests = [json.loads(line)]
+                except ValueError as e:
+                    raise ValueError(f"{path}:{line_no}: invalid JSON: {e}")
+            else:
+                requests = [{'story': line, 'dof_level': dof} for dof in dof_levels]
+
+            for data in requests:
+                params, error = _parse_generate_request(data)
+                if error:
+                    raise ValueError(f"{path}:{line_no}: {error}")
+                items.append(params)
+    return items
+
+
+def warm_cache(
+    service,
+    items: List[Dict[str, Any]],
+    concurrency: int = 4,
+    progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """
+    Generate and cache every item that is not cached yet
+
+    Args:
+        service: AnimationService whose cache is filled
+        items: Params from load_corpus (duplicates are generated once)
+        concurrency: Pipelines run at the same time
+        progress: Called as progress(done, total, outcome) after each item
+
+    Returns:
+        Summary {"total", "skipped", "generated", "failed", "elapsed_ms"}
+    """
+    start_time = time.time()
+    unique: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        key = service.cache.make_key(
+            item['story'], dof_level=item['dof_level'], interpolate=item['interpolate']
+        )
+        unique.setdefault(key, item)
+
+    summary = {'total': len(unique), 'skipped': 0, 'generated': 0, 'failed': 0}
+    lock = threading.Lock()
+    done = 0
+
+    def record(item: Dict[str, Any], status: str, elapsed_ms: float, error: Optional[str] = None):
+        nonlocal done
+        with lock:
+            summary[status] += 1
+            done += 1
+            count = done
+        if progress:
+            progress(count, summary['total'], {
+                'story': item['story'],
+                'dof_level': item['dof_level'],
+                'status': status,
+                'elapsed_ms': elapsed_ms,
+                'error': error
+            })
+
+    pending = []
+    for item in unique.values():
+        # Fresh or stale both count as cached; stale entries refresh on their next hit
+        if service.cache.get_entry(item['story'], dof_level=item['dof_level'], interpolate=item['interpolate']):
+            record(item, 'skipped', 0.0)
+        else:
+            pending.append(item)
+
+    def run(item: Dict[str, Any]):
+        item_start = time.time()
+        try:
+            result = service.generate(**{**item, 'use_cache': True})
+        except Exception as e:
+            logger.error(f"Warm-up item failed: {str(e)}", exc_info=True)
+            result = {'success': False, 'error': str(e)}
+        elapsed_ms = (time.time() - item_start) * 1000
+        if result['success']:
+            record(item, 'generated', elapsed_ms)
+        else:
+            record(item, 'failed', elapsed_ms, result.get('error'))
+
+    if pending:
+        workers = max(1, min(concurrency, len(pending)))
+        logger.info(
+            f"Cache warm-up: {len(pending)} to generate, "
+            f"{summary['skipped']} already cached, concurrency={workers}"
+        )
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cache-warmup") as executor:
+            for future in as_completed([executor.submit(run, item) for item in pending]):
+                future.result()
+
+    summary['elapsed_ms'] = (time.time() - start_time) * 1000
+    logger.info(f"Cache warm-up finished: {summary}")
+    return summary
+
+
+def log_progress(done: int, total: int, outcome: Dict[str, Any]):
+    """Default progress callback: one log line per item"""
+    message = (
+        f"[{done}/{total}] {outcome['status']} {outcome['dof_level']} "
+        f"{outcome['story'][:40]!r} ({outcome['elapsed_ms']:.0f}ms)"
+    )
+    if outcome['error']:
+        message += f": {outcome['error']}"
+    logger.info(message)
@@ -78,6 +78,31 @@ class ConfigLoader:
         provider = llm_system_config.get('provider', 'openai')
         os.environ['LLM_PROVIDER'] = provider
         
+        # Shared HTTP connection pool
+        http_config = llm_system_config.get('http', {})
+        os.environ['LLM_HTTP_MAX_CONNECTIONS'] = str(http_config.get('max_connections', 20))
+        os.environ['LLM_HTTP_MAX_KEEPALIVE'] = str(http_config.get('max_keepalive', 10))
+        os.environ['LLM_HTTP_KEEPALIVE_EXPIRY'] = str(http_config.get('keepalive_expiry', 60))
+        os.environ['LLM_HTTP_PREWARM_CONNECTIONS'] = str(http_config.get('prewarm_connections', 2))
+        
+        # Retries and hedging to a secondary provider
+        retry_config = llm_system_config.get('retry', {})
+        os.environ['LLM_RETRY_BACKOFF_BASE_SECONDS'] = str(retry_config.get('backoff_base_seconds', 0.5))
+        os.environ['LLM_RETRY_BACKOFF_MAX_SECONDS'] = str(retry_config.get('backoff_max_seconds', 8))
+        hedge_config = llm_system_config.get('hedge', {})
+        os.environ['LLM_HEDGE_PROVIDER'] = hedge_config.get('provider') or ''
+        os.environ['LLM_HEDGE_PERCENTILE'] = str(hedge_config.get('percentile', 95))
+        os.environ['LLM_HEDGE_MIN_SAMPLES'] = str(hedge_config.get('min_samples', 20))
+        os.environ['LLM_HEDGE_DEFAULT_DELAY_SECONDS'] = str(hedge_config.get('default_delay_seconds', 20))
+        
+        # Record / replay of LLM responses (YAML reads a bare off as false)
+        store_config = llm_system_config.get('response_store', {})
+        os.environ['LLM_RESPONSE_STORE_MODE'] = store_config.get('mode') or 'off'
+        os.environ['LLM_RESPONSE_STORE_PATH'] = store_config.get('path', 'data/llm_responses')
+        
+        # Streamed keyframe generation
+        os.environ['LLM_STREAM_KEYFRAMES'] = str(llm_system_config.get('stream_keyframes', False)).lower()
+        
         # OpenAI configuration
         if 'openai' in llm_system_config:
             openai_system = llm_system_config['openai']
@@ -158,6 +183,52 @@ class ConfigLoader:
             os.environ['MAX_SCENES'] = str(animation_config.get('max_scenes', 10))
             os.environ['MAX_CHARACTERS'] = str(animation_config.get('max_characters', 5))
             os.environ['MAX_FRAMES_PER_SCENE'] = str(animation_config.get('max_frames_per_scene', 20))
+            os.environ['TEMPLATE_MEMO_SIZE'] = str(animation_config.get('template_memo_size', 256))
+        
+        # Animation cache configuration
+        if 'cache' in self.config:
+            cache_config = self.config['cache']
+            os.environ['CACHE_BACKEND'] = cache_config.get('backend', 'memory')
+            os.environ['CACHE_MAX_SIZE'] = str(cache_config.get('max_size', 1000))
+            os.environ['CACHE_TTL_SECONDS'] = str(cache_config.get('ttl_seconds', 86400))
+            os.environ['CACHE_SOFT_TTL_SECONDS'] = str(cache_config.get('soft_ttl_seconds', 3600))
+            os.environ['CACHE_REAP_INTERVAL_SECONDS'] = str(cache_config.get('reap_interval_seconds', 60))
+            os.environ['CACHE_REFRESH_WORKERS'] = str(cache_config.get('refresh_workers', 2))
+            os.environ['CACHE_WARMUP_CORPUS'] = cache_config.get('warmup_corpus') or ''
+            os.environ['CACHE_WARMUP_CONCURRENCY'] = str(cache_config.get('warmup_concurrency', 4))
+            os.environ['CACHE_MAX_BYTES'] = str(cache_config.get('max_bytes', 256 * 1024 * 1024))
+            os.environ['CACHE_MAX_ENTRY_BYTES'] = str(cache_config.get('max_entry_bytes', 16 * 1024 * 1024))
+            os.environ['CACHE_COMPRESS_LEVEL'] = str(cache_config.get('compress_level', 0))
+            os.environ['CACHE_SQLITE_PATH'] = cache_config.get('sqlite_path', 'data/animation_cache.db')
+            os.environ['CACHE_STAGES_ENABLED'] = str(cache_config.get('stages_enabled', True)).lower()
+            os.environ['CACHE_STAGE_MAX_SIZE'] = str(cache_config.get('stage_max_size', 2000))
+            os.environ['CACHE_STAGE_TTL_SECONDS'] = str(cache_config.get('stage_ttl_seconds', 86400))
+            os.environ['CACHE_STAGE_MAX_BYTES'] = str(cache_config.get('stage_max_bytes', 128 * 1024 * 1024))
+            os.environ['CACHE_NEGATIVE_TTL_SECONDS'] = str(cache_config.get('negative_ttl_seconds', 30))
+            os.environ['CACHE_NEGATIVE_MAX_SIZE'] = str(cache_config.get('negative_max_size', 1000))
+        
+        # Hot key analytics
+        if 'analytics' in self.config:
+            analytics_config = self.config['analytics']
+            os.environ['HOT_KEYS_CAPACITY'] = str(analytics_config.get('hot_keys_capacity', 200))
+        
+        # Job queue configuration
+        if 'jobs' in self.config:
+            jobs_config = self.config['jobs']
+            os.environ['JOB_MAX_WORKERS'] = str(jobs_config.get('max_workers', 4))
+            os.environ['JOB_MAX_PENDING'] = str(jobs_config.get('max_pending', 100))
+            os.environ['JOB_RESULT_TTL_SECONDS'] = str(jobs_config.get('result_ttl_seconds', 600))
+        
+        # Batch generation configuration
+        if 'batch' in self.config:
+            batch_config = self.config['batch']
+            os.environ['BATCH_MAX_ITEMS'] = str(batch_config.get('max_items', 30))
+            os.environ['BATCH_MAX_CONCURRENCY'] = str(batch_config.get('max_concurrency', 4))
+        
+        # Per-endpoint request deadlines
+        if 'deadlines' in self.config:
+            for endpoint, seconds in self.config['deadlines'].items():
+                os.environ[f'DEADLINE_{endpoint.upper()}_SECONDS'] = str(seconds)
         
         # Logging configuration
         if 'logging' in self.config:
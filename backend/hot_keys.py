@@ -0,0 +1,179 @@
+"""
+Hot Key Analytics
+
+Approximate top-K counters (Space-Saving algorithm) over the stories,
+dof levels and action types the service sees. Each sketch keeps at most
+`capacity` counters no matter how many distinct keys arrive; a reported
+count overestimates the true count by at most its `error`.
+
+Counters are per process (each gunicorn worker reports its own traffic).
+Per-story keys contain user text, so top() reports them hashed unless
+asked for the raw labels.
+
+Author: Shenzhen Wang & AI
+License: MIT
+"""
+import os
+import heapq
+import hashlib
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitters sketch
+
+    When full, a new key replaces the key with the smallest count and
+    inherits that count as its error bound. Thread-safe implementation.
+    """
+
+    def __init__(self, capacity: int = 200):
+        """
+        Initialize sketch
+
+        Args:
+            capacity: Maximum number of tracked keys
+        """
+        self.capacity = capacity
+        self.counters: Dict[str, List[int]] = {}  # key -> [count, error]
+        self.total = 0
+        self.lock = threading.Lock()
+        # Min-heap of (count, key); entries whose count is outdated are skipped
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, key: str, count: int = 1):
+        """
+        Count occurrences of a key
+
+        Args:
+            key: Tracked key
+            count: Weight to add (e.g. LLM calls)
+        """
+        with self.lock:
+            self.total += count
+            entry = self.counters.get(key)
+            if entry is None:
+                if len(self.counters) < self.capacity:
+                    entry = [0, 0]
+                else:
+                    min_count = self._evict_min()
+                    entry = [min_count, min_count]
+                self.counters[key] = entry
+            entry[0] += count
+            heapq.heappush(self._heap, (entry[0], key))
+
+            if len(self._heap) > 4 * self.capacity:
+                self._heap = [(e[0], k) for k, e in self.counters.items()]
+                heapq.heapify(self._heap)
+
+    def _evict_min(self) -> int:
+        """Remove the key with the smallest count, returning that count (caller holds the lock)"""
+        while True:
+            count, key = heapq.heappop(self._heap)
+            entry = self.counters.get(key)
+            if entry is not None and entry[0] == count:
+                del self.counters[key]
+                return count
+
+    def top(self, k: int = 20) -> List[Dict[str, Any]]:
+        """
+        Get the k keys with the highest counts
+
+        Args:
+            k: Number of keys
+
+        Returns:
+            [{"key", "count", "error"}], highest count first
+        """
+        with self.lock:
+            items = heapq.nlargest(k, self.counters.items(), key=lambda kv: kv[1][0])
+            return [{'key': key, 'count': count, 'error': error} for key, (count, error) in items]
+
+    def clear(self):
+        """Clear all counters"""
+        with self.lock:
+            self.counters.clear()
+            self._heap.clear()
+            self.total = 0
+
+
+class HotKeyTracker:
+    """
+    Named Space-Saving sketches for service traffic
+
+    - requests: generation requests per story (label "<dof> | <story>")
+    - misses: cache misses per story
+    - llm_calls: LLM calls spent per story
+    - dof_levels: requests per dof level
+    - action_types: analyzed key action types
+    - untemplated_actions: action types that had to be generated by the LLM
+    """
+
+    SKETCHES = ('requests', 'misses', 'llm_calls', 'dof_levels', 'action_types', 'untemplated_actions')
+
+    # Sketches keyed by story_label()
+    STORY_SKETCHES = ('requests', 'misses', 'llm_calls')
+
+    # Longest story prefix kept in a label
+    MAX_LABEL_LENGTH = 120
+
+    def __init__(self, capacity: int = 200):
+        """
+        Initialize tracker
+
+        Args:
+            capacity: Keys tracked per sketch
+        """
+        self.capacity = capacity
+        self.sketches = {name: SpaceSaving(capacity) for name in self.SKETCHES}
+
+    def story_label(self, story: str, dof_level: str) -> str:
+        """Key for per-story sketches (normalized like cache keys)"""
+        return f"{dof_level} | {story.strip().lower()[:self.MAX_LABEL_LENGTH]}"
+
+    def record(self, sketch: str, key: str, count: int = 1):
+        """Count a key in one sketch"""
+        self.sketches[sketch].add(key, count)
+
+    def top(self, k: int = 20, raw_stories: bool = False) -> Dict[str, Any]:
+        """
+        Get the top keys of every sketch
+
+        Args:
+            k: Keys per sketch
+            raw_stories: Report story labels as-is instead of hashed (see hash_label)
+
+        Returns:
+            {sketch: {"total", "top": [{"key", "count", "error"}]}}
+        """
+        result = {}
+        for name, sketch in self.sketches.items():
+            top = sketch.top(k)
+            if name in self.STORY_SKETCHES and not raw_stories:
+                top = [{**item, 'key': self.hash_label(item['key'])} for item in top]
+            result[name] = {'total': sketch.total, 'top': top}
+        return result
+
+    @staticmethod
+    def hash_label(label: str) -> str:
+        """Story label with the story replaced by a short SHA-256 ("<dof> | sha256:<16 hex>")"""
+        dof_level, _, story = label.partition(' | ')
+        return f"{dof_level} | sha256:{hashlib.sha256(story.encode('utf-8')).hexdigest()[:16]}"
+
+    def clear(self):
+        """Clear all sketches"""
+        for sketch in self.sketches.values():
+            sketch.clear()
+
+
+# Global tracker instance
+_hot_key_tracker: Optional[HotKeyTracker] = None
+
+
+def get_hot_key_tracker() -> HotKeyTracker:
+    """Get or create hot key tracker singleton"""
+    global _hot_key_tracker
+    if _hot_key_tracker is None:
+        _hot_key_tracker = HotKeyTracker(capacity=int(os.getenv('HOT_KEYS_CAPACITY', '200')))
+    return _hot_key_tracker
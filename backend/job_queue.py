@@ -0,0 +1,226 @@
+"""
+Job Queue
+
+Runs long animation generations on a bounded worker pool so that
+request threads are not held for the whole LLM round trip.
+
+Author: Shenzhen Wang & AI
+License: MIT
+"""
+import os
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the queue already holds max_pending unfinished jobs"""
+
+
+class JobStatus:
+    """Job lifecycle states"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    FINISHED = (SUCCEEDED, FAILED)
+
+
+@dataclass
+class Job:
+    """A unit of work submitted to the queue"""
+    id: str
+    status: str = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in JobStatus.FINISHED
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Status view of the job (without the result payload)"""
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+        if self.started_at is not None:
+            end = self.finished_at or time.time()
+            data['queue_time_ms'] = (self.started_at - self.created_at) * 1000
+            data['run_time_ms'] = (end - self.started_at) * 1000
+        if self.error is not None:
+            data['error'] = self.error
+        return data
+
+
+class JobQueue:
+    """
+    Thread-safe job queue backed by a fixed-size worker pool
+
+    Finished jobs are kept for result_ttl_seconds so clients can poll
+    for the result, then dropped.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_pending: int = 100,
+        result_ttl_seconds: int = 600
+    ):
+        """
+        Initialize job queue
+
+        Args:
+            max_workers: Number of worker threads running jobs
+            max_pending: Maximum number of queued + running jobs
+            result_ttl_seconds: How long finished jobs are kept (seconds)
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl_seconds = result_ttl_seconds
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='job-worker'
+        )
+        self.jobs: Dict[str, Job] = {}
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """
+        Queue a callable for execution
+
+        Args:
+            fn: Callable to run on a worker thread
+            *args, **kwargs: Arguments passed to fn
+
+        Returns:
+            The queued Job
+
+        Raises:
+            QueueFullError: If max_pending jobs are already unfinished
+        """
+        with self.lock:
+            self._purge_finished()
+
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise QueueFullError(
+                    f"Job queue is full ({self.pending}/{self.max_pending} pending)"
+                )
+
+            job = Job(id=uuid.uuid4().hex)
+            self.jobs[job.id] = job
+            self.pending += 1
+            self.submitted += 1
+
+        self.executor.submit(self._run, job, fn, args, kwargs)
+        logger.info(f"Job queued: {job.id}")
+        return job
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple, kwargs: dict):
+        """Worker entry point"""
+        job.started_at = time.time()
+        job.status = JobStatus.RUNNING
+
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}", exc_info=True)
+            job.error = str(e)
+            status = JobStatus.FAILED
+        else:
+            job.result = result
+            status = JobStatus.SUCCEEDED
+
+        with self.lock:
+            job.finished_at = time.time()
+            job.status = status
+            self.pending -= 1
+            if status == JobStatus.SUCCEEDED:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Look up a job
+
+        Args:
+            job_id: Job identifier returned by submit()
+
+        Returns:
+            Job or None if unknown/expired
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None and self._expired(job, time.time()):
+                del self.jobs[job_id]
+                return None
+            return job
+
+    def _expired(self, job: Job, now: float) -> bool:
+        return job.finished and now - job.finished_at > self.result_ttl_seconds
+
+    def _purge_finished(self):
+        """Drop finished jobs older than result_ttl_seconds (caller holds lock)"""
+        now = time.time()
+        expired = [job_id for job_id, job in self.jobs.items() if self._expired(job, now)]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get queue statistics
+
+        Returns:
+            Dict with queue stats
+        """
+        with self.lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'tracked_jobs': len(self.jobs),
+                'submitted': self.submitted,
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+                'rejected': self.rejected
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and optionally wait for running jobs"""
+        self.executor.shutdown(wait=wait)
+
+
+# Global job queue instance
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Get or create job queue singleton"""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(
+            max_workers=int(os.getenv('JOB_MAX_WORKERS', '4')),
+            max_pending=int(os.getenv('JOB_MAX_PENDING', '100')),
+            result_ttl_seconds=int(os.getenv('JOB_RESULT_TTL_SECONDS', '600'))
+        )
+    return _job_queue
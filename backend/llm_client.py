@@ -7,34 +7,159 @@ LLM Client - Unified LLM Interface
 2. 提供统一的completion接口
 3. 处理不同provider的差异
 4. 支持依赖注入和测试
+5. 持有进程内共用的长连接池（keep-alive），可在启动时预先建立连接
+6. 失败重试（指数退避）与对冲请求：主提供商迟迟不返回时请求备用提供商，取先返回的结果
+7. 可选的响应录制/回放（ResponseStore）：离线可复现的基准测试，temperature=0 的请求不重复付费
+8. 按服务统计每次调用的 token 用量、耗时与首 token 时间（TTFT），并写入调试会话
+9. 流式调用：逐段产出生成的文本，消费方可边生成边解析，发现错误时提前中止
 
 Author: Shenzhen Wang & AI
 License: MIT
 """
 import os
 import json
+import math
+import time
+import random
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+import itertools
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, List, Optional, Tuple, Deque, Iterator, AsyncIterator
+import httpx
 import litellm
+from backend.utils.deadline import Deadline, DeadlineExceeded
+from backend.llm_response_store import ResponseStore, ResponseNotRecorded, get_response_store
+from backend.llm_metrics import LLMCallMetrics
+from backend.utils.debug_logger import get_debug_logger
 
 logger = logging.getLogger(__name__)
 
+# 未配置 api_base 时各提供商的默认地址（用于连接预热）
+DEFAULT_API_BASES = {
+    'openai': 'https://api.openai.com/v1',
+    'anthropic': 'https://api.anthropic.com'
+}
+
+# 可重试的 HTTP 状态码（超时、冲突、限流、服务端错误）
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# 每类请求保留的最近成功调用延迟数（用于计算对冲等待时间）
+LATENCY_WINDOW = 200
+
+# 同一进程内所有 LLMClient（包括对冲用的备用提供商）共用的连接池
+_http_pool: Optional[Tuple[httpx.Client, httpx.AsyncClient]] = None
+_http_pool_pid: Optional[int] = None
+_http_pool_lock = threading.Lock()
+
+
+def _shared_http_pool(client: 'LLMClient') -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """
+    获取（必要时创建）本进程的长连接池，并设为 litellm 的全局 HTTP 会话
+    
+    fork 继承的连接属于父进程，子进程第一次使用时重建连接池
+    （与缓存清理线程相同的 pid 检查）。
+    """
+    global _http_pool, _http_pool_pid
+    pid = os.getpid()
+    with _http_pool_lock:
+        if _http_pool is None or _http_pool_pid != pid:
+            limits = httpx.Limits(
+                max_connections=client.http_max_connections,
+                max_keepalive_connections=client.http_max_keepalive,
+                keepalive_expiry=client.http_keepalive_expiry
+            )
+            _http_pool = (
+                httpx.Client(limits=limits, timeout=client.timeout),
+                httpx.AsyncClient(limits=limits, timeout=client.timeout)
+            )
+            _http_pool_pid = pid
+            litellm.client_session, litellm.aclient_session = _http_pool
+            logger.info(
+                f"LLM HTTP pool created: max_connections={client.http_max_connections}, "
+                f"max_keepalive={client.http_max_keepalive}, pid={pid}"
+            )
+        return _http_pool
+
+
+def _is_retryable(error: Exception) -> bool:
+    """超时、连接错误、限流与服务端错误可以重试；请求本身无效（其他 4xx）不重试"""
+    if isinstance(error, DeadlineExceeded):
+        return False
+    status_code = getattr(error, 'status_code', None)
+    if isinstance(status_code, int):
+        return status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (TimeoutError, ConnectionError, httpx.TransportError))
+
+
+def _usage_tokens(response: Any) -> int:
+    """响应消耗的总 token 数（无 usage 信息时为 0）"""
+    usage = getattr(response, 'usage', None)
+    return getattr(usage, 'total_tokens', 0) or 0
+
+
+def _usage_counts(response: Any) -> Tuple[int, int]:
+    """响应的 (prompt_tokens, completion_tokens)（无 usage 信息时为 0）"""
+    usage = getattr(response, 'usage', None)
+    return getattr(usage, 'prompt_tokens', 0) or 0, getattr(usage, 'completion_tokens', 0) or 0
+
+
+def _delta_text(chunk: Any) -> str:
+    """流式响应片段中的新增文本（usage 等无内容的片段为空串）"""
+    choices = getattr(chunk, 'choices', None)
+    if not choices:
+        return ''
+    delta = getattr(choices[0], 'delta', None)
+    return getattr(delta, 'content', None) or ''
+
 
 class LLMClient:
     """统一的LLM客户端"""
     
-    def __init__(self, provider: Optional[str] = None):
+    def __init__(
+        self,
+        provider: Optional[str] = None,
+        hedge_client: Optional['LLMClient'] = None,
+        response_store: Optional[ResponseStore] = None
+    ):
         """
         初始化LLM客户端
         
         Args:
             provider: LLM提供商，如果不指定则从环境变量读取
+            hedge_client: 备用提供商的客户端（对冲请求），None 为不启用
+            response_store: 响应录制/回放存储，None 为不启用
         """
         self.provider = provider or self._get_required_env('LLM_PROVIDER')
+        self.hedge_client = hedge_client
+        self.response_store = response_store
         self._load_config()
+        self._load_http_config()
+        self._load_resilience_config()
+        self.http_client: Optional[httpx.Client] = None
+        self.async_http_client: Optional[httpx.AsyncClient] = None
+        self._http_pid: Optional[int] = None
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._hedge_executor_pid: Optional[int] = None
+        self._stats_lock = threading.Lock()
+        self._latencies: Dict[int, Deque[float]] = {}
+        self.call_metrics = LLMCallMetrics()
+        self.stats = {
+            'calls': 0,
+            'retries': 0,
+            'hedged': 0,
+            'fallbacks': 0,
+            'wins': {},
+            'wasted_calls': 0,
+            'wasted_tokens': 0
+        }
         logger.info(
             f"LLM Client initialized: provider={self.provider}, "
             f"model={self.model}, max_tokens={self.max_tokens}"
+            + (f", hedge={hedge_client.provider}" if hedge_client else "")
+            + (f", response_store={response_store.mode}" if response_store else "")
         )
     
     def _get_required_env(self, key: str) -> str:
@@ -77,6 +202,102 @@ class LLMClient:
             
         else:
             raise ValueError(f"Unsupported LLM provider: {provider}")
+        
+        # 单次请求超时（秒）与重试次数
+        self.timeout = float(os.getenv(f'{provider.upper()}_TIMEOUT', '60'))
+        self.max_retries = int(os.getenv(f'{provider.upper()}_MAX_RETRIES', '3'))
+    
+    def _load_http_config(self):
+        """连接池配置（所有提供商共用）"""
+        self.http_max_connections = int(os.getenv('LLM_HTTP_MAX_CONNECTIONS', '20'))
+        self.http_max_keepalive = int(os.getenv('LLM_HTTP_MAX_KEEPALIVE', '10'))
+        self.http_keepalive_expiry = float(os.getenv('LLM_HTTP_KEEPALIVE_EXPIRY', '60'))
+        self.http_prewarm_connections = int(os.getenv('LLM_HTTP_PREWARM_CONNECTIONS', '2'))
+    
+    def _load_resilience_config(self):
+        """重试退避与对冲请求配置（所有提供商共用）"""
+        self.backoff_base = float(os.getenv('LLM_RETRY_BACKOFF_BASE_SECONDS', '0.5'))
+        self.backoff_max = float(os.getenv('LLM_RETRY_BACKOFF_MAX_SECONDS', '8'))
+        self.hedge_percentile = float(os.getenv('LLM_HEDGE_PERCENTILE', '95'))
+        self.hedge_min_samples = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20'))
+        self.hedge_default_delay = float(os.getenv('LLM_HEDGE_DEFAULT_DELAY_SECONDS', '20'))
+    
+    def _ensure_http_pool(self):
+        """
+        使用进程内共用的长连接池
+        
+        所有服务共用 get_llm_client() 单例（备用提供商的客户端也共用同一个连接池），
+        相同 api_base 的请求复用已建立的 TLS 连接。
+        """
+        if self._http_pid != os.getpid():
+            self.http_client, self.async_http_client = _shared_http_pool(self)
+            self._http_pid = os.getpid()
+    
+    def _prewarm_url(self) -> Optional[str]:
+        return self.api_base or DEFAULT_API_BASES.get(self.provider.lower())
+    
+    def _prewarm_count(self, connections: Optional[int]) -> int:
+        count = self.http_prewarm_connections if connections is None else connections
+        return max(0, min(count, self.http_max_keepalive))
+    
+    def prewarm(self, connections: Optional[int] = None):
+        """
+        在后台线程中预先建立到 API 地址的连接（同步连接池）
+        
+        并发发送 N 个轻量 HEAD 请求：任何 HTTP 响应（包括 401/404）都说明
+        TCP + TLS 握手已完成，连接随后留在连接池中，首批真实请求不再付握手开销。
+        
+        Args:
+            connections: 预热连接数，默认使用 LLM_HTTP_PREWARM_CONNECTIONS（0 为不预热）
+        """
+        if self._replay_only():
+            return
+        count = self._prewarm_count(connections)
+        url = self._prewarm_url()
+        if count and url:
+            self._warm_threads(url, count)
+        
+        if self.hedge_client is not None:
+            self.hedge_client.prewarm(connections)
+    
+    def _warm_threads(self, url: str, count: int):
+        """在后台线程中并发建立 count 个连接"""
+        self._ensure_http_pool()
+        
+        def warm():
+            try:
+                self.http_client.head(url)
+            except httpx.HTTPError as e:
+                logger.warning(f"LLM connection pre-warm failed: {str(e)}")
+        
+        # 并发请求才会各自建立连接（顺序请求会复用同一个连接）
+        for _ in range(count):
+            threading.Thread(target=warm, name="llm-prewarm", daemon=True).start()
+        logger.info(f"Pre-warming {count} LLM connections to {url}")
+    
+    async def aprewarm(self, connections: Optional[int] = None):
+        """prewarm 的异步版本：在当前事件循环中预热异步连接池（ASGI 启动时使用）"""
+        if self._replay_only():
+            return
+        count = self._prewarm_count(connections)
+        url = self._prewarm_url()
+        if count and url:
+            self._ensure_http_pool()
+            logger.info(f"Pre-warming {count} async LLM connections to {url}")
+            results = await asyncio.gather(
+                *(self.async_http_client.head(url) for _ in range(count)),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.warning(f"LLM connection pre-warm failed: {str(result)}")
+        
+        if self.hedge_client is not None:
+            await self.hedge_client.aprewarm(connections)
+    
+    def _replay_only(self) -> bool:
+        """回放模式不访问网络，无需预热连接"""
+        return self.response_store is not None and self.response_store.mode == 'replay'
     
     def get_service_max_tokens(self, service_name: str) -> int:
         """
@@ -98,33 +319,29 @@ class LLMClient:
         logger.debug(f"Using default max_tokens for {service_name}: {self.max_tokens}")
         return self.max_tokens
     
-    def completion(
+    def _build_request_params(
         self,
         messages: List[Dict[str, str]],
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
         response_format: Optional[Dict[str, str]] = None,
+        deadline: Optional[Deadline] = None,
         **kwargs
-    ) -> Any:
-        """
-        调用LLM completion
+    ) -> Dict[str, Any]:
+        """构建单次 litellm 请求参数（completion / acompletion 共用）"""
+        self._ensure_http_pool()
+        
+        # 有截止时间时，单次超时不超过剩余时间
+        timeout = deadline.llm_timeout(self.timeout) if deadline is not None else self.timeout
         
-        Args:
-            messages: 消息列表
-            max_tokens: 最大token数，如果不指定则使用配置值
-            temperature: 温度参数，如果不指定则使用配置值
-            response_format: 响应格式，如 {"type": "json_object"}
-            **kwargs: 其他litellm参数
-            
-        Returns:
-            LLM响应对象
-        """
         request_params = {
             'model': self.model,
             'api_key': self.api_key,
             'messages': messages,
             'temperature': temperature if temperature is not None else self.temperature,
             'max_tokens': max_tokens if max_tokens is not None else self.max_tokens,
+            'timeout': timeout,
+            'max_retries': 0,  # 重试由 LLMClient 负责（指数退避）
         }
         
         # 添加api_base（如果有）
@@ -138,14 +355,570 @@ class LLMClient:
         # 添加其他参数
         request_params.update(kwargs)
         
-        logger.debug(f"Calling LLM: model={self.model}, max_tokens={request_params['max_tokens']}")
+        return request_params
+    
+    def completion(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        response_format: Optional[Dict[str, str]] = None,
+        deadline: Optional[Deadline] = None,
+        service: Optional[str] = None,
+        **kwargs
+    ) -> Any:
+        """
+        调用LLM completion
+        
+        可重试的错误（超时、限流、5xx）按指数退避重试，最多 max_retries 次。
+        配置了备用提供商时，主提供商超过对冲等待时间仍未返回（或以可重试
+        错误失败），且截止时间未到，向备用提供商发出相同请求，返回先成功的结果。
         
+        Args:
+            messages: 消息列表
+            max_tokens: 最大token数，如果不指定则使用配置值
+            temperature: 温度参数，如果不指定则使用配置值
+            response_format: 响应格式，如 {"type": "json_object"}
+            deadline: 请求截止时间，单次超时与重试次数按剩余时间收紧
+            service: 调用方服务名（如 story_planner / animator），用于分服务统计 token 与耗时
+            **kwargs: 其他litellm参数
+            
+        Returns:
+            LLM响应对象
+            
+        Raises:
+            DeadlineExceeded: 调用前或调用失败时截止时间已过
+            ResponseNotRecorded: 回放模式下该请求没有录制的响应
+        """
+        call = dict(
+            messages=messages, max_tokens=max_tokens, temperature=temperature,
+            response_format=response_format, deadline=deadline, **kwargs
+        )
+        self._count('calls')
+        start = time.monotonic()
         try:
-            response = litellm.completion(**request_params)
-            return response
+            key, response = self._replay(call)
+            replayed = response is not None
+            if not replayed:
+                if self.hedge_client is None:
+                    response = self._completion_with_retries(call)
+                else:
+                    response = self._hedged_completion(call)
+                self._record_response(key, call, response)
+        except Exception as e:
+            self._record_call(service, start, error=e)
+            raise
+        self._record_call(service, start, response=response, replayed=replayed)
+        return response
+    
+    async def acompletion(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        response_format: Optional[Dict[str, str]] = None,
+        deadline: Optional[Deadline] = None,
+        service: Optional[str] = None,
+        **kwargs
+    ) -> Any:
+        """
+        异步调用LLM completion（litellm.acompletion），参数、重试与对冲同 completion
+        
+        等待响应期间不占用线程，单个事件循环可同时挂起大量请求。
+        
+        Returns:
+            LLM响应对象
+        """
+        call = dict(
+            messages=messages, max_tokens=max_tokens, temperature=temperature,
+            response_format=response_format, deadline=deadline, **kwargs
+        )
+        self._count('calls')
+        start = time.monotonic()
+        try:
+            key, response = self._replay(call)
+            replayed = response is not None
+            if not replayed:
+                if self.hedge_client is None:
+                    response = await self._acompletion_with_retries(call)
+                else:
+                    response = await self._ahedged_completion(call)
+                self._record_response(key, call, response)
         except Exception as e:
-            logger.error(f"LLM completion failed: {str(e)}")
+            self._record_call(service, start, error=e)
+            raise
+        self._record_call(service, start, response=response, replayed=replayed)
+        return response
+    
+    def completion_stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        response_format: Optional[Dict[str, str]] = None,
+        deadline: Optional[Deadline] = None,
+        service: Optional[str] = None,
+        **kwargs
+    ) -> Iterator[str]:
+        """
+        流式调用LLM completion，逐段产出生成的文本
+        
+        参数同 completion。收到第一段之前的失败按指数退避重试；已产出的文本无法撤回，
+        因此之后的失败直接抛出，也不做对冲。响应存储照常生效（回放时一次产出全部文本，
+        录制的是拼接后的完整响应）。消费方提前关闭生成器（如发现输出格式错误）时
+        关闭连接，不再等待剩余输出。
+        
+        Yields:
+            文本片段
+        """
+        call = dict(
+            messages=messages, max_tokens=max_tokens, temperature=temperature,
+            response_format=response_format, deadline=deadline, **kwargs
+        )
+        self._count('calls')
+        start = time.monotonic()
+        ttft = None
+        stream = None
+        try:
+            key, response = self._replay(call)
+            replayed = response is not None
+            if replayed:
+                yield response.choices[0].message.content or ''
+            else:
+                first, stream = self._open_stream(call)
+                ttft = time.monotonic() - start
+                chunks = []
+                for chunk in itertools.chain([first], stream):
+                    chunks.append(chunk)
+                    text = _delta_text(chunk)
+                    if text:
+                        yield text
+                response = litellm.stream_chunk_builder(chunks, messages=messages)
+                self._record_response(key, call, response)
+        except (Exception, GeneratorExit) as e:
+            self._record_call(service, start, error=e, ttft=ttft)
+            raise
+        finally:
+            close = getattr(stream, 'close', None)
+            if callable(close):
+                close()
+        self._record_call(service, start, response=response, replayed=replayed, ttft=ttft)
+    
+    async def acompletion_stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        response_format: Optional[Dict[str, str]] = None,
+        deadline: Optional[Deadline] = None,
+        service: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """completion_stream 的异步版本（litellm.acompletion）"""
+        call = dict(
+            messages=messages, max_tokens=max_tokens, temperature=temperature,
+            response_format=response_format, deadline=deadline, **kwargs
+        )
+        self._count('calls')
+        start = time.monotonic()
+        ttft = None
+        stream = None
+        try:
+            key, response = self._replay(call)
+            replayed = response is not None
+            if replayed:
+                yield response.choices[0].message.content or ''
+            else:
+                first, stream = await self._aopen_stream(call)
+                ttft = time.monotonic() - start
+                chunks = [first]
+                text = _delta_text(first)
+                if text:
+                    yield text
+                async for chunk in stream:
+                    chunks.append(chunk)
+                    text = _delta_text(chunk)
+                    if text:
+                        yield text
+                response = litellm.stream_chunk_builder(chunks, messages=messages)
+                self._record_response(key, call, response)
+        except (Exception, GeneratorExit, asyncio.CancelledError) as e:
+            self._record_call(service, start, error=e, ttft=ttft)
             raise
+        finally:
+            aclose = getattr(stream, 'aclose', None)
+            if callable(aclose):
+                await aclose()
+        self._record_call(service, start, response=response, replayed=replayed, ttft=ttft)
+    
+    def _open_stream(self, call: Dict[str, Any]) -> Tuple[Any, Iterator[Any]]:
+        """发起流式请求并等到第一段，返回 (第一段, 流)；失败按指数退避重试"""
+        deadline = call['deadline']
+        attempt = 0
+        while True:
+            request_params = {**self._build_request_params(**call), 'stream': True}
+            logger.debug(f"Calling LLM (stream): model={self.model}, attempt={attempt + 1}")
+            try:
+                stream = litellm.completion(**request_params)
+                first = next(stream, None)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, deadline)
+                attempt += 1
+                time.sleep(delay)
+                continue
+            if first is None:
+                raise ValueError("LLM stream ended without any output")
+            return first, stream
+    
+    async def _aopen_stream(self, call: Dict[str, Any]) -> Tuple[Any, AsyncIterator[Any]]:
+        """_open_stream 的异步版本"""
+        deadline = call['deadline']
+        attempt = 0
+        while True:
+            request_params = {**self._build_request_params(**call), 'stream': True}
+            logger.debug(f"Calling LLM (async stream): model={self.model}, attempt={attempt + 1}")
+            try:
+                stream = await litellm.acompletion(**request_params)
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                raise ValueError("LLM stream ended without any output")
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, deadline)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            return first, stream
+    
+    def _record_call(
+        self,
+        service: Optional[str],
+        start: float,
+        response: Any = None,
+        replayed: bool = False,
+        error: Optional[Exception] = None,
+        ttft: Optional[float] = None
+    ):
+        """
+        记录一次调用（含重试与对冲的总耗时）：计入分服务统计，并写入当前调试会话
+        
+        非流式调用在完整响应返回时才拿到第一个 token，TTFT 等于总耗时；
+        流式调用的 TTFT 为收到第一段的时间。
+        """
+        latency = time.monotonic() - start
+        ttft = latency if ttft is None else ttft
+        prompt_tokens, completion_tokens = _usage_counts(response)
+        service = service or 'other'
+        self.call_metrics.record(
+            service, latency, ttft=ttft,
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+            error=error is not None, replayed=replayed
+        )
+        get_debug_logger().log_llm_call({
+            'service': service,
+            'model': self.model,
+            'latency_seconds': round(latency, 3),
+            'ttft_seconds': round(ttft, 3),
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'replayed': replayed,
+            'error': f"{type(error).__name__}: {error}" if error is not None else None
+        })
+    
+    def _store_params(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        """决定响应内容的请求参数（模型、消息与生成参数，已填入默认值），用作存储键"""
+        params = {
+            'model': self.model,
+            'messages': call['messages'],
+            'temperature': call['temperature'] if call['temperature'] is not None else self.temperature,
+            'max_tokens': call['max_tokens'] if call['max_tokens'] is not None else self.max_tokens,
+        }
+        if call['response_format']:
+            params['response_format'] = call['response_format']
+        params.update(
+            (k, v) for k, v in call.items()
+            if k not in ('messages', 'max_tokens', 'temperature', 'response_format', 'deadline')
+        )
+        return params
+    
+    def _replay(self, call: Dict[str, Any]) -> Tuple[Optional[str], Any]:
+        """
+        从响应存储中查找录制的响应
+        
+        Returns:
+            (存储键, 响应)；本次请求不读写存储时键为 None，需要调用提供商时响应为 None
+            
+        Raises:
+            ResponseNotRecorded: 回放模式下未命中
+        """
+        store = self.response_store
+        if store is None:
+            return None, None
+        params = self._store_params(call)
+        if not store.reads(params) and not store.writes(params):
+            return None, None
+        
+        key = store.make_key(params)
+        if store.reads(params):
+            data = store.get(key)
+            if data is not None:
+                logger.debug(f"LLM response replayed: key={key[:16]}")
+                return key, litellm.ModelResponse(**data)
+            if store.mode == 'replay':
+                raise ResponseNotRecorded(
+                    f"No recorded LLM response for this request (key={key[:16]}) in {store.path}"
+                )
+        return key, None
+    
+    def _record_response(self, key: Optional[str], call: Dict[str, Any], response: Any):
+        """把提供商的响应写入响应存储（写入失败只记录警告，不影响本次调用）"""
+        if key is None:
+            return
+        try:
+            self.response_store.put(key, self._store_params(call), response.model_dump())
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Failed to record LLM response: {str(e)}")
+    
+    def _completion_with_retries(self, call: Dict[str, Any]) -> Any:
+        """向本提供商发出请求，失败时按指数退避重试"""
+        deadline = call['deadline']
+        attempt = 0
+        while True:
+            request_params = self._build_request_params(**call)
+            logger.debug(
+                f"Calling LLM: model={self.model}, max_tokens={request_params['max_tokens']}, "
+                f"timeout={request_params['timeout']:.1f}s, attempt={attempt + 1}"
+            )
+            start = time.monotonic()
+            try:
+                response = litellm.completion(**request_params)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, deadline)
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self._record_latency(request_params['max_tokens'], time.monotonic() - start)
+            return response
+    
+    async def _acompletion_with_retries(self, call: Dict[str, Any]) -> Any:
+        """_completion_with_retries 的异步版本"""
+        deadline = call['deadline']
+        attempt = 0
+        while True:
+            request_params = self._build_request_params(**call)
+            logger.debug(
+                f"Calling LLM (async): model={self.model}, max_tokens={request_params['max_tokens']}, "
+                f"attempt={attempt + 1}"
+            )
+            start = time.monotonic()
+            try:
+                response = await litellm.acompletion(**request_params)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, deadline)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self._record_latency(request_params['max_tokens'], time.monotonic() - start)
+            return response
+    
+    def _retry_delay(
+        self,
+        error: Exception,
+        attempt: int,
+        deadline: Optional[Deadline]
+    ) -> float:
+        """
+        请求失败后的处理：可以重试时返回退避等待时间（秒），否则抛出异常
+        
+        第 n 次重试前等待 backoff_base × 2^n 秒（上限 backoff_max），
+        乘以 0.5~1 的随机抖动，避免大量请求同时重试。
+        有截止时间时在每次失败后重新判断：退避结束前剩余时间已用完则不再重试；
+        重试的单次超时同样截短到剩余时间（见 _build_request_params）。
+        """
+        logger.error(f"LLM completion failed ({self.provider}): {str(error)}")
+        self._raise_if_expired(deadline, error)
+        if attempt >= self.max_retries or not _is_retryable(error):
+            raise error
+        
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+        if deadline is not None and deadline.remaining() <= delay:
+            raise error
+        
+        self._count('retries')
+        logger.warning(f"Retrying LLM call in {delay:.2f}s (retry {attempt + 1}/{self.max_retries})")
+        return delay
+    
+    def _hedged_completion(self, call: Dict[str, Any]) -> Any:
+        """
+        主提供商迟迟不返回或以可重试错误失败时请求备用提供商，返回先成功的结果
+        
+        主提供商的错误不可重试（请求本身无效、截止时间已过），或截止时间
+        已用完时，不发备用请求。
+        """
+        executor = self._get_hedge_executor()
+        primary = executor.submit(self._completion_with_retries, call)
+        wait([primary], timeout=self.hedge_delay(self._latency_key(call)))
+        if not self._should_hedge(primary, call['deadline']):
+            response = primary.result()
+            self._record_win(self.provider)
+            return response
+        
+        self._start_hedge(primary.done())
+        secondary = executor.submit(self.hedge_client._completion_with_retries, call)
+        providers = {primary: self.provider, secondary: self.hedge_client.provider}
+        pending = set(providers)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._record_win(providers[future])
+                    # 落后的请求无法中止，完成后计入浪费
+                    for loser in pending:
+                        loser.add_done_callback(self._record_waste)
+                    return future.result()
+        self._log_hedge_failure(primary.exception(), secondary.exception())
+        raise primary.exception()
+    
+    async def _ahedged_completion(self, call: Dict[str, Any]) -> Any:
+        """_hedged_completion 的异步版本：落后的请求直接取消"""
+        primary = asyncio.ensure_future(self._acompletion_with_retries(call))
+        providers = {primary: self.provider}
+        try:
+            await asyncio.wait({primary}, timeout=self.hedge_delay(self._latency_key(call)))
+            if not self._should_hedge(primary, call['deadline']):
+                response = await primary
+                self._record_win(self.provider)
+                return response
+            
+            self._start_hedge(primary.done())
+            secondary = asyncio.ensure_future(self.hedge_client._acompletion_with_retries(call))
+            providers[secondary] = self.hedge_client.provider
+            pending = set(providers)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._record_win(providers[task])
+                        for _ in pending:
+                            self._count('wasted_calls')
+                        return task.result()
+            self._log_hedge_failure(primary.exception(), secondary.exception())
+            raise primary.exception()
+        finally:
+            for task in providers:
+                if not task.done():
+                    task.cancel()
+    
+    def _should_hedge(self, primary: Any, deadline: Optional[Deadline]) -> bool:
+        """
+        对冲等待结束后是否请求备用提供商
+        
+        主提供商仍未返回（慢）或以可重试错误失败（重试已用完）时请求；
+        已成功、错误不可重试或截止时间已用完时不请求。
+        
+        Args:
+            primary: 主提供商请求（concurrent.futures.Future 或 asyncio.Task）
+            deadline: 请求截止时间
+        """
+        if deadline is not None and deadline.expired:
+            return False
+        if not primary.done():
+            return True
+        error = primary.exception()
+        return error is not None and _is_retryable(error)
+    
+    def _log_hedge_failure(self, primary_error: BaseException, secondary_error: BaseException):
+        """主、备提供商都失败：抛出主提供商的错误前记录备用提供商的错误"""
+        logger.error(
+            f"LLM call failed on both providers: {self.provider}: {primary_error!r}; "
+            f"{self.hedge_client.provider}: {secondary_error!r}"
+        )
+    
+    def _start_hedge(self, primary_failed: bool):
+        if primary_failed:
+            self._count('fallbacks')
+            logger.warning(f"LLM call to {self.provider} failed, falling back to {self.hedge_client.provider}")
+        else:
+            self._count('hedged')
+            logger.warning(f"LLM call to {self.provider} is slow, hedging with {self.hedge_client.provider}")
+    
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        """对冲请求使用的线程池（fork 后重建：子进程不继承父进程的线程）"""
+        pid = os.getpid()
+        with self._stats_lock:
+            if self._hedge_executor is None or self._hedge_executor_pid != pid:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=2 * self.http_max_connections,
+                    thread_name_prefix="llm-hedge"
+                )
+                self._hedge_executor_pid = pid
+            return self._hedge_executor
+    
+    def _latency_key(self, call: Dict[str, Any]) -> int:
+        """延迟分类：按 max_tokens 区分（各服务的输出上限不同，延迟差别很大）"""
+        return call['max_tokens'] if call['max_tokens'] is not None else self.max_tokens
+    
+    def _record_latency(self, key: int, seconds: float):
+        with self._stats_lock:
+            window = self._latencies.get(key)
+            if window is None:
+                window = self._latencies[key] = deque(maxlen=LATENCY_WINDOW)
+            window.append(seconds)
+    
+    def hedge_delay(self, key: int) -> float:
+        """
+        对冲等待时间：本提供商最近成功调用延迟的 hedge_percentile 百分位数
+        
+        样本少于 hedge_min_samples 时使用 hedge_default_delay。
+        """
+        with self._stats_lock:
+            samples = sorted(self._latencies.get(key, ()))
+        if len(samples) < max(1, self.hedge_min_samples):
+            return self.hedge_default_delay
+        index = min(len(samples) - 1, max(0, math.ceil(self.hedge_percentile / 100 * len(samples)) - 1))
+        return samples[index]
+    
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[name] += amount
+    
+    def _record_win(self, provider: str):
+        with self._stats_lock:
+            self.stats['wins'][provider] = self.stats['wins'].get(provider, 0) + 1
+    
+    def _record_waste(self, future: Future):
+        """落后的对冲请求完成：计入浪费的调用与 token"""
+        tokens = 0
+        if not future.cancelled() and future.exception() is None:
+            tokens = _usage_tokens(future.result())
+        with self._stats_lock:
+            self.stats['wasted_calls'] += 1
+            self.stats['wasted_tokens'] += tokens
+    
+    def _raise_if_expired(self, deadline: Optional[Deadline], error: Exception):
+        """调用失败且截止时间已过时，以 DeadlineExceeded 上报（如超时被截断）"""
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded(f"Deadline of {deadline.seconds:g}s exceeded during LLM call") from error
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        调用统计
+        
+        Returns:
+            calls / retries、对冲次数（hedged: 主提供商慢，fallbacks: 主提供商失败）、
+            各提供商胜出次数 wins、浪费的调用与 token、各延迟分类当前的对冲等待时间，
+            响应存储的命中统计，以及分服务的调用统计 services
+            （token 用量与耗时、TTFT、token 数的直方图）
+        """
+        with self._stats_lock:
+            stats = {**self.stats, 'wins': dict(self.stats['wins'])}
+            keys = list(self._latencies)
+        stats['provider'] = self.provider
+        stats['hedge_provider'] = self.hedge_client.provider if self.hedge_client else None
+        stats['response_store'] = self.response_store.get_stats() if self.response_store else None
+        stats['services'] = self.call_metrics.snapshot()
+        if self.hedge_client is not None:
+            stats['hedge_delay_seconds'] = {str(key): round(self.hedge_delay(key), 3) for key in keys}
+        return stats
     
     def get_config_summary(self) -> Dict[str, Any]:
         """获取配置摘要（用于调试）"""
@@ -155,7 +928,26 @@ class LLMClient:
             'temperature': self.temperature,
             'max_tokens': self.max_tokens,
             'max_context_tokens': self.max_context_tokens,
-            'api_base': self.api_base if self.api_base else 'default'
+            'timeout': self.timeout,
+            'max_retries': self.max_retries,
+            'api_base': self.api_base if self.api_base else 'default',
+            'http_pool': {
+                'max_connections': self.http_max_connections,
+                'max_keepalive': self.http_max_keepalive,
+                'keepalive_expiry': self.http_keepalive_expiry,
+                'prewarm_connections': self.http_prewarm_connections
+            },
+            'retry_backoff': {'base_seconds': self.backoff_base, 'max_seconds': self.backoff_max},
+            'hedge': {
+                'provider': self.hedge_client.provider,
+                'percentile': self.hedge_percentile,
+                'min_samples': self.hedge_min_samples,
+                'default_delay_seconds': self.hedge_default_delay
+            } if self.hedge_client else None,
+            'response_store': {
+                'mode': self.response_store.mode,
+                'path': self.response_store.path
+            } if self.response_store else None
         }
 
 
@@ -167,6 +959,11 @@ def get_llm_client(provider: Optional[str] = None) -> LLMClient:
     """
     获取全局LLM客户端实例（单例模式）
     
+    LLM_HEDGE_PROVIDER 指定了其他提供商时，同时创建备用客户端用于对冲请求；
+    备用提供商配置不完整时记录错误并不启用对冲。
+    LLM_RESPONSE_STORE_MODE 不为 off 时启用响应录制/回放（只作用于主提供商的请求，
+    对冲得到的响应同样按主提供商的请求录制）。
+    
     Args:
         provider: LLM提供商，如果不指定则使用环境变量
         
@@ -176,7 +973,14 @@ def get_llm_client(provider: Optional[str] = None) -> LLMClient:
     global _global_client
     
     if _global_client is None:
-        _global_client = LLMClient(provider)
+        hedge_client = None
+        hedge_provider = os.getenv('LLM_HEDGE_PROVIDER', '')
+        if hedge_provider and hedge_provider != (provider or os.getenv('LLM_PROVIDER')):
+            try:
+                hedge_client = LLMClient(hedge_provider)
+            except ValueError as e:
+                logger.error(f"LLM hedging disabled, cannot configure {hedge_provider}: {e}")
+        _global_client = LLMClient(provider, hedge_client=hedge_client, response_store=get_response_store())
     
     return _global_client
 
@@ -0,0 +1,176 @@
+"""
+LLM Call Metrics
+
+Per-service accounting of LLM calls: token usage, wall time and
+time to first token (TTFT), aggregated into fixed-bucket histograms.
+Services tag their calls (story_planner, animator), so the metrics
+show which prompts are slow and which are expensive.
+
+Wall time covers the whole LLMClient call, including retries, backoff
+and hedging. For a non-streaming call the first token arrives with the
+complete response, so its TTFT equals its wall time.
+
+Counters are per process (each gunicorn worker reports its own calls).
+
+Author: Shenzhen Wang & AI
+License: MIT
+"""
+import bisect
+import threading
+from typing import Dict, Any, Optional, Sequence
+
+# Histogram upper bounds (the last bucket, "+Inf", catches everything above)
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+
+class Histogram:
+    """Fixed-bucket histogram (not thread-safe; LLMCallMetrics holds the lock)"""
+
+    def __init__(self, bounds: Sequence[float]):
+        """
+        Initialize histogram
+
+        Args:
+            bounds: Ascending bucket upper bounds
+        """
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        """Add one observation"""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Approximate quantile: upper bound of the bucket holding it
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Bucket bound (max observed value for the last bucket), None if empty
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen and seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counts per bucket ("le" bound -> count, not cumulative) and summary values"""
+        labels = [str(bound) for bound in self.bounds] + ['+Inf']
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'mean': round(self.sum / self.count, 3) if self.count else 0,
+            'max': round(self.max, 3),
+            'p50': _round(self.quantile(0.5)),
+            'p95': _round(self.quantile(0.95)),
+            'buckets': dict(zip(labels, self.counts))
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+class ServiceCallMetrics:
+    """Counters and histograms of one service's LLM calls"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.replayed = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.histograms = {
+            'latency_seconds': Histogram(LATENCY_BUCKETS),
+            'ttft_seconds': Histogram(LATENCY_BUCKETS),
+            'prompt_tokens': Histogram(TOKEN_BUCKETS),
+            'completion_tokens': Histogram(TOKEN_BUCKETS)
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'replayed': self.replayed,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'histograms': {name: h.snapshot() for name, h in self.histograms.items()}
+        }
+
+
+class LLMCallMetrics:
+    """
+    LLM call metrics keyed by service
+
+    Failed calls only count as errors. Calls answered from the response
+    store count as replayed and stay out of the token and latency figures,
+    which describe provider calls only. Thread-safe implementation.
+    """
+
+    def __init__(self):
+        self.services: Dict[str, ServiceCallMetrics] = {}
+        self.lock = threading.Lock()
+
+    def record(
+        self,
+        service: str,
+        latency: float,
+        ttft: Optional[float] = None,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        error: bool = False,
+        replayed: bool = False
+    ):
+        """
+        Record one LLM call
+
+        Args:
+            service: Calling service (e.g. story_planner, animator)
+            latency: Wall time of the call in seconds
+            ttft: Time to first token in seconds (defaults to latency)
+            prompt_tokens: Prompt tokens reported by the provider
+            completion_tokens: Completion tokens reported by the provider
+            error: The call failed
+            replayed: The response came from the response store
+        """
+        with self.lock:
+            metrics = self.services.get(service)
+            if metrics is None:
+                metrics = self.services[service] = ServiceCallMetrics()
+            metrics.calls += 1
+            if error:
+                metrics.errors += 1
+                return
+            if replayed:
+                metrics.replayed += 1
+                return
+            metrics.prompt_tokens += prompt_tokens
+            metrics.completion_tokens += completion_tokens
+            metrics.histograms['latency_seconds'].observe(latency)
+            metrics.histograms['ttft_seconds'].observe(latency if ttft is None else ttft)
+            metrics.histograms['prompt_tokens'].observe(prompt_tokens)
+            metrics.histograms['completion_tokens'].observe(completion_tokens)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Metrics of every service seen so far"""
+        with self.lock:
+            return {service: metrics.snapshot() for service, metrics in self.services.items()}
+
+    def clear(self):
+        """Clear all metrics"""
+        with self.lock:
+            self.services.clear()
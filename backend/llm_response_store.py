@@ -0,0 +1,187 @@
+"""
+LLM Response Store - Record / Replay of LLM Calls
+
+A content-addressed store of LLM responses on disk, keyed on the model,
+the messages and every generation parameter. LLMClient consults it
+before calling the provider:
+
+- record: always call the provider and store every response
+- replay: serve only stored responses; a call that was never recorded
+  fails with ResponseNotRecorded and nothing goes over the network
+- passthrough: serve stored responses for deterministic calls
+  (temperature 0), call the provider on a miss and store the result;
+  other calls go straight to the provider
+
+Record a benchmark run once with `record`, then replay it on a machine
+without network access for deterministic, free full-pipeline runs.
+
+Each response is one JSON file, <path>/<key[:2]>/<key>.json, written
+atomically, so all worker processes can share a store directory.
+
+Author: Shenzhen Wang & AI
+License: MIT
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+MODES = ('off', 'record', 'replay', 'passthrough')
+
+# Request parameters that do not change the response
+IGNORED_PARAMS = ('api_key', 'api_base', 'timeout', 'max_retries', 'deadline')
+
+
+class ResponseNotRecorded(LookupError):
+    """Replay mode found no stored response for a call"""
+
+
+class ResponseStore:
+    """Content-addressed LLM response store (one JSON file per response)"""
+
+    def __init__(self, path: str, mode: str = 'passthrough'):
+        """
+        Initialize store
+
+        Args:
+            path: Store directory (created on first write)
+            mode: record | replay | passthrough
+
+        Raises:
+            ValueError: If mode is unknown
+        """
+        if mode not in MODES or mode == 'off':
+            raise ValueError(f"Unsupported response store mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+    def make_key(self, params: Dict[str, Any]) -> str:
+        """
+        Key for a request
+
+        Args:
+            params: Resolved request parameters (model, messages, temperature, ...)
+
+        Returns:
+            SHA256 of the canonical JSON of the response-relevant parameters
+        """
+        key_data = {k: v for k, v in params.items() if k not in IGNORED_PARAMS}
+        key_str = json.dumps(key_data, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(key_str.encode('utf-8')).hexdigest()
+
+    def reads(self, params: Dict[str, Any]) -> bool:
+        """Whether this call may be answered from the store"""
+        if self.mode == 'replay':
+            return True
+        return self.mode == 'passthrough' and _is_deterministic(params)
+
+    def writes(self, params: Dict[str, Any]) -> bool:
+        """Whether the provider's response to this call is stored"""
+        if self.mode == 'record':
+            return True
+        return self.mode == 'passthrough' and _is_deterministic(params)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a stored response
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            Response dict, or None if not recorded
+        """
+        try:
+            with open(self._file(key), 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            record = None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable LLM response record {key[:16]}: {e}")
+            record = None
+
+        with self.lock:
+            if record is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return record['response'] if record else None
+
+    def put(self, key: str, params: Dict[str, Any], response: Dict[str, Any]):
+        """
+        Store a response (atomically replaces an older record)
+
+        Args:
+            key: Key from make_key
+            params: Request parameters (kept in the record for inspection)
+            response: JSON-serializable response
+        """
+        target = self._file(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        record = {
+            'key': key,
+            'recorded_at': time.time(),
+            'request': {k: v for k, v in params.items() if k not in IGNORED_PARAMS},
+            'response': response
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, target)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        with self.lock:
+            self.recorded += 1
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], f"{key}.json")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics (per process)"""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'mode': self.mode,
+                'path': self.path,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total > 0 else 0,
+                'recorded': self.recorded
+            }
+
+
+def _is_deterministic(params: Dict[str, Any]) -> bool:
+    return params.get('temperature') == 0
+
+
+# Global store instance
+_response_store: Optional[ResponseStore] = None
+_response_store_loaded = False
+
+
+def get_response_store() -> Optional[ResponseStore]:
+    """Get or create the response store (None when LLM_RESPONSE_STORE_MODE is off)"""
+    global _response_store, _response_store_loaded
+    if not _response_store_loaded:
+        mode = os.getenv('LLM_RESPONSE_STORE_MODE', 'off')
+        if mode != 'off':
+            _response_store = ResponseStore(
+                path=os.getenv('LLM_RESPONSE_STORE_PATH', 'data/llm_responses'),
+                mode=mode
+            )
+            logger.info(f"LLM response store: mode={mode}, path={_response_store.path}")
+        _response_store_loaded = True
+    return _response_store
@@ -20,7 +20,7 @@ License: MIT
 """
 
 # 基础类
-from .base_skeleton import BaseSkeleton, SkeletonConfig
+from .base_skeleton import BaseSkeleton, SkeletonConfig, ValidationReport
 
 # 骨骼系统
 from .skeleton_6dof import Skeleton6DOF, Pose6DOF
@@ -40,6 +40,7 @@ __all__ = [
     # 基础类
     'BaseSkeleton',
     'SkeletonConfig',
+    'ValidationReport',
     
     # 骨骼系统
     'Skeleton6DOF',
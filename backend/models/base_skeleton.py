@@ -14,7 +14,7 @@ License: MIT
 """
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Union
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -37,6 +37,23 @@ class SkeletonConfig:
             self.tolerance = {}
 
 
+@dataclass
+class ValidationReport:
+    """
+    姿态验证结果
+    
+    structural: 结构错误（缺少关节、数据类型错误），无法自动修正
+    constraints: 约束警告（骨骼长度、画布边界等），可由优化阶段修正
+    """
+    structural: List[str] = field(default_factory=list)
+    constraints: List[str] = field(default_factory=list)
+    
+    @property
+    def errors(self) -> List[str]:
+        """错误列表（有结构错误时只含结构错误，与 validate 的返回一致）"""
+        return self.structural or self.constraints
+
+
 class BaseSkeleton(ABC):
     """骨骼系统抽象基类"""
     
@@ -74,6 +91,20 @@ class BaseSkeleton(ABC):
         """
         pass
     
+    def check(self, data: Union[Dict[str, Any], Any]) -> ValidationReport:
+        """
+        验证姿态数据，区分结构错误和约束警告
+        
+        默认把 validate 的结果都当作约束警告，子类应覆盖。
+        
+        Args:
+            data: 姿态数据
+            
+        Returns:
+            ValidationReport
+        """
+        return ValidationReport(constraints=self.validate(data))
+    
     @abstractmethod
     def get_default_pose(self) -> Dict[str, Any]:
         """
@@ -28,7 +28,7 @@ License: MIT
 import math
 from typing import Dict, Any, List, Tuple, Union
 from dataclasses import dataclass
-from backend.models.base_skeleton import BaseSkeleton, SkeletonConfig
+from backend.models.base_skeleton import BaseSkeleton, SkeletonConfig, ValidationReport
 from backend.models.skeleton_config_loader import get_skeleton_config
 
 
@@ -46,6 +46,13 @@ class Joint:
 class Skeleton12DOF(BaseSkeleton):
     """12自由度火柴人骨骼系统"""
     
+    # 必需关节及其固定顺序（验证与列式编码共用）
+    JOINT_NAMES = (
+        "head", "neck", "waist",
+        "left_shoulder", "left_hand", "right_shoulder", "right_hand",
+        "left_hip", "left_foot", "right_hip", "right_foot"
+    )
+    
     def __init__(self, config: SkeletonConfig = None):
         """
         初始化12DOF系统
@@ -193,10 +200,7 @@ class Skeleton12DOF(BaseSkeleton):
         Returns:
             错误列表，空列表表示验证通过
         """
-        if not isinstance(data, dict):
-            return ["数据格式错误：必须是字典类型"]
-        
-        return self.validate_joints(data)
+        return self.check_joints(data).errors
     
     def validate_joints(self, joints: Dict[str, Dict[str, float]]) -> List[str]:
         """
@@ -208,17 +212,43 @@ class Skeleton12DOF(BaseSkeleton):
         Returns:
             错误列表，空列表表示验证通过
         """
-        errors = []
+        return self.check_joints(joints).errors
+    
+    def check(self, data: Union[Dict[str, Dict[str, float]], Any]) -> ValidationReport:
+        """验证关节数据，区分结构错误和约束警告（见 check_joints）"""
+        return self.check_joints(data)
+    
+    def check_joints(self, joints: Dict[str, Dict[str, float]]) -> ValidationReport:
+        """
+        验证12DOF关节，区分结构错误和约束警告
         
-        # 检查必需关节是否存在
-        required = ["head", "neck", "waist",
-                   "left_shoulder", "left_hand", "right_shoulder", "right_hand",
-                   "left_hip", "left_foot", "right_hip", "right_foot"]
+        结构错误（非字典、缺少关节、关节缺少数值坐标）时不再检查约束。
+        
+        Args:
+            joints: 关节字典
+            
+        Returns:
+            ValidationReport
+        """
+        report = ValidationReport()
+        if not isinstance(joints, dict):
+            report.structural.append("数据格式错误：必须是字典类型")
+            return report
         
-        for joint_name in required:
+        # 检查必需关节是否存在
+        for joint_name in self.JOINT_NAMES:
             if joint_name not in joints:
-                errors.append(f"缺少关节: {joint_name}")
-                return errors  # 缺少关节则无法继续验证
+                report.structural.append(f"缺少关节: {joint_name}")
+        
+        # 检查坐标类型（包括可选关节，画布边界检查会用到）
+        for joint_name, joint in joints.items():
+            if not isinstance(joint, dict) or not all(
+                isinstance(joint.get(axis), (int, float)) for axis in ("x", "y")
+            ):
+                report.structural.append(f"数据格式错误：关节 {joint_name} 缺少数值坐标x/y")
+        
+        if report.structural:
+            return report
         
         # 检查骨骼长度
         bone_checks = [
@@ -238,15 +268,15 @@ class Skeleton12DOF(BaseSkeleton):
             
             if actual_length < min_allowed or actual_length > max_allowed:
                 deviation = abs(actual_length - expected_length) / expected_length * 100
-                errors.append(
+                report.constraints.append(
                     f"骨骼 {bone_name} 长度异常: {actual_length:.1f}px "
                     f"(期望{expected_length}px ±{tolerance*100:.0f}%, 偏差{deviation:.1f}%)"
                 )
         
         # 使用基类的画布边界验证
         for joint_name, joint in joints.items():
-            errors.extend(
+            report.constraints.extend(
                 self.validate_canvas_bounds(joint["x"], joint["y"], joint_name)
             )
         
-        return errors
+        return report
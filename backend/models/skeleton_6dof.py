@@ -21,7 +21,7 @@ License: MIT
 import math
 from typing import Dict, Any, List, Union
 from dataclasses import dataclass, asdict
-from backend.models.base_skeleton import BaseSkeleton, SkeletonConfig
+from backend.models.base_skeleton import BaseSkeleton, SkeletonConfig, ValidationReport
 from backend.models.skeleton_config_loader import get_skeleton_config
 
 
@@ -168,6 +168,30 @@ class Skeleton6DOF(BaseSkeleton):
         
         return self.validate_pose(pose)
     
+    def check(self, data: Union[Dict[str, Any], Pose6DOF]) -> ValidationReport:
+        """
+        验证6DOF姿态，区分结构错误和约束警告
+        
+        Args:
+            data: Pose6DOF对象或字典
+            
+        Returns:
+            ValidationReport（非字典或字段不是数值时为结构错误）
+        """
+        if isinstance(data, Pose6DOF):
+            return ValidationReport(constraints=self.validate_pose(data))
+        if not isinstance(data, dict):
+            return ValidationReport(structural=["数据格式错误：必须是字典类型"])
+        
+        structural = [
+            f"数据格式错误：{name} 必须是数值"
+            for name in self.default_pose.to_dict()
+            if name in data and not isinstance(data[name], (int, float))
+        ]
+        if structural:
+            return ValidationReport(structural=structural)
+        return ValidationReport(constraints=self.validate(data))
+    
     def validate_pose(self, pose: Pose6DOF) -> List[str]:
         """
         验证6DOF姿态的有效性（保持兼容性）
@@ -37,16 +37,20 @@ class RateLimiter:
         self.last_update = time.time()
         self.lock = threading.Lock()
     
-    def acquire(self, timeout: Optional[float] = None) -> bool:
+    def acquire(self, timeout: Optional[float] = None, tokens: int = 1) -> bool:
         """
-        Acquire a token, blocking if necessary
+        Acquire tokens, blocking if necessary
         
         Args:
             timeout: Maximum time to wait (None = wait forever)
+            tokens: Tokens to consume at once (more than burst_size never succeeds)
             
         Returns:
-            True if token acquired, False if timeout
+            True if tokens acquired, False if timeout
         """
+        if tokens > self.burst_size:
+            return False
+        
         deadline = None if timeout is None else time.time() + timeout
         
         while True:
@@ -61,9 +65,9 @@ class RateLimiter:
                 )
                 self.last_update = now
                 
-                # Try to consume a token
-                if self.tokens >= 1:
-                    self.tokens -= 1
+                # Try to consume the tokens
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
                     return True
                 
                 # Check timeout
@@ -73,14 +77,17 @@ class RateLimiter:
             # Wait a bit before retrying
             time.sleep(0.01)
     
-    def try_acquire(self) -> bool:
+    def try_acquire(self, tokens: int = 1) -> bool:
         """
-        Try to acquire a token without blocking
+        Try to acquire tokens without blocking
         
+        Args:
+            tokens: Tokens to consume at once
+            
         Returns:
-            True if token acquired, False otherwise
+            True if tokens acquired, False otherwise
         """
-        return self.acquire(timeout=0)
+        return self.acquire(timeout=0, tokens=tokens)
     
     def reset(self):
         """Reset the rate limiter to full capacity"""
@@ -113,20 +120,27 @@ class PerUserRateLimiter:
         self.limiters = {}
         self.lock = threading.Lock()
     
+    @property
+    def capacity(self) -> int:
+        """Most tokens one acquire can ever take (a full bucket)"""
+        return self.burst_size or self.requests_per_minute
+    
     def acquire(
         self,
         user_id: str,
-        timeout: Optional[float] = None
+        timeout: Optional[float] = None,
+        tokens: int = 1
     ) -> bool:
         """
-        Acquire a token for a specific user
+        Acquire tokens for a specific user
         
         Args:
             user_id: User identifier
             timeout: Maximum time to wait
+            tokens: Tokens to consume at once
             
         Returns:
-            True if token acquired, False if timeout
+            True if tokens acquired, False if timeout
         """
         with self.lock:
             if user_id not in self.limiters:
@@ -135,19 +149,20 @@ class PerUserRateLimiter:
                     self.burst_size
                 )
         
-        return self.limiters[user_id].acquire(timeout)
+        return self.limiters[user_id].acquire(timeout, tokens)
     
-    def try_acquire(self, user_id: str) -> bool:
+    def try_acquire(self, user_id: str, tokens: int = 1) -> bool:
         """
-        Try to acquire a token for a user without blocking
+        Try to acquire tokens for a user without blocking
         
         Args:
             user_id: User identifier
+            tokens: Tokens to consume at once
             
         Returns:
-            True if token acquired, False otherwise
+            True if tokens acquired, False otherwise
         """
-        return self.acquire(user_id, timeout=0)
+        return self.acquire(user_id, timeout=0, tokens=tokens)
     
     def reset(self, user_id: str):
         """Reset rate limiter for a specific user"""
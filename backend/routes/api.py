@@ -6,30 +6,37 @@ License: MIT
 """
 import time
 import logging
-from flask import Blueprint, request, current_app
+from typing import Dict, Any, Iterator, Optional, Tuple
+from flask import Blueprint, Response, request, current_app, url_for, stream_with_context
 from backend.services.animation_pipeline import AnimationPipelineV2
-from backend.utils.response import success_response, error_response
+from backend.utils.response import success_response, error_response, sse_event
 from backend.utils.version import get_version
-from backend.security import sanitize_input, validate_content_type, validate_request_size
+from backend.security import sanitize_input, validate_content_type, validate_request_size, require_api_key
 from backend.rate_limiter import PerUserRateLimiter
-from backend.cache_service import get_animation_cache
+from backend.job_queue import JobQueue, JobStatus, QueueFullError, get_job_queue
+from backend.services.animation_service import AnimationService, get_animation_service
+from backend.models.skeleton_12dof import Skeleton12DOF
+from backend.utils.frame_codec import encode_columnar, CONTENT_TYPE as COLUMNAR_CONTENT_TYPE
+from backend.utils.http_cache import generate_body, generate_fields, precompress_json, precompressed_response
+from backend.utils.deadline import Deadline
+from backend.llm_client import get_llm_client
 import os
 
 logger = logging.getLogger(__name__)
 
 bp = Blueprint('api', __name__, url_prefix='/api')
 
-_pipelines = {}
+# 'columnar': frames x joints x 2 float32 payload (see backend/utils/frame_codec.py)
+RESPONSE_FORMATS = ('json', 'columnar')
+
+# End-to-end request budgets in seconds (DEADLINE_<ENDPOINT>_SECONDS, 0 = none)
+DEADLINE_DEFAULTS = {'generate': 90, 'stream': 120, 'batch': 180, 'async': 300}
+
 _rate_limiter = None
-_cache = None
 
 
 def get_pipeline(dof_level: str = '12dof') -> AnimationPipelineV2:
-    global _pipelines
-    if dof_level not in _pipelines:
-        logger.info(f"Creating pipeline for {dof_level}")
-        _pipelines[dof_level] = AnimationPipelineV2(dof_level=dof_level, enable_optimization=True)
-    return _pipelines[dof_level]
+    return get_service().get_pipeline(dof_level)
 
 
 def get_rate_limiter() -> PerUserRateLimiter:
@@ -39,80 +46,379 @@ def get_rate_limiter() -> PerUserRateLimiter:
     return _rate_limiter
 
 
-def get_cache():
-    global _cache
-    if _cache is None:
-        _cache = get_animation_cache()
-    return _cache
+def get_service() -> AnimationService:
+    if hasattr(current_app, 'animation_service'):
+        return current_app.animation_service
+    return get_animation_service()
 
 
-@bp.route('/generate', methods=['POST'])
-@validate_content_type('application/json')
-@validate_request_size()
-def generate_animation():
-    start_time = time.time()
-    data = request.get_json()
+def get_queue() -> JobQueue:
+    if hasattr(current_app, 'job_queue'):
+        return current_app.job_queue
+    return get_job_queue()
+
+
+def _parse_generate_request(data: Optional[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Validate a generate request body
     
+    Returns:
+        (params, error_message) - exactly one of them is None
+    """
     if not data or 'story' not in data:
-        return error_response('Missing story parameter')
+        return None, 'Missing story parameter'
     
-    story = data['story'].strip()
     dof_level = data.get('dof_level', '12dof')
-    use_cache = data.get('use_cache', True)
-    
     if dof_level not in ['6dof', '12dof']:
-        return error_response(f'Invalid dof_level: {dof_level}')
+        return None, f'Invalid dof_level: {dof_level}'
+    
+    interpolate = data.get('interpolate', True)
+    if not isinstance(interpolate, bool):
+        return None, 'Invalid interpolate: must be a boolean'
     
     try:
-        story = sanitize_input(story)
+        story = sanitize_input(data['story'].strip())
     except ValueError as e:
-        return error_response(str(e))
+        return None, str(e)
     
+    return {
+        'story': story,
+        'dof_level': dof_level,
+        'use_cache': data.get('use_cache', True),
+        'interpolate': interpolate
+    }, None
+
+
+def get_deadline(endpoint: str) -> Optional[Deadline]:
+    """Start the configured deadline for an endpoint"""
+    seconds = float(os.getenv(f'DEADLINE_{endpoint.upper()}_SECONDS', DEADLINE_DEFAULTS[endpoint]))
+    return Deadline.after(seconds)
+
+
+def _failure_status(result: Dict[str, Any]) -> int:
+    return 504 if result.get('timed_out') else 500
+
+
+def _failure_fields(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Extra error-body fields for a failure replayed from the negative cache"""
+    if not result.get('negative_cached'):
+        return {}
+    return {'negative_cached': True, 'retry_after': round(result['retry_after'], 1)}
+
+
+def animation_location(key: str) -> str:
+    """Path of a cached animation (see get_cached_animation)"""
+    return f'{bp.url_prefix}/animations/{key}'
+
+
+def _request_rate_limiter() -> PerUserRateLimiter:
+    return current_app.rate_limiter if hasattr(current_app, 'rate_limiter') else get_rate_limiter()
+
+
+def _check_rate_limit(cost: int = 1) -> bool:
+    """Take `cost` tokens from the client's rate limit bucket (all or nothing)"""
     client_ip = request.headers.get('X-Forwarded-For', request.remote_addr)
+    return _request_rate_limiter().try_acquire(client_ip, tokens=cost)
+
+
+def _parse_max_concurrency(value: Any) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Validate a batch max_concurrency (optional positive integer)
     
-    rate_limiter = current_app.rate_limiter if hasattr(current_app, 'rate_limiter') else get_rate_limiter()
-    if not rate_limiter.try_acquire(client_ip):
-        return error_response('Rate limit exceeded', status_code=429)
+    Returns:
+        (limit clamped to BATCH_MAX_CONCURRENCY or None, error_message)
+    """
+    if value is None:
+        return None, None
+    if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+        return None, 'Invalid max_concurrency: must be a positive integer'
+    return min(value, int(os.getenv('BATCH_MAX_CONCURRENCY', '4'))), None
+
+
+@bp.route('/generate', methods=['POST'])
+@validate_content_type('application/json')
+@validate_request_size()
+def generate_animation():
+    start_time = time.time()
+    deadline = get_deadline('generate')
+    data = request.get_json()
+    params, error = _parse_generate_request(data)
+    if error:
+        return error_response(error)
     
-    cache = current_app.animation_cache if hasattr(current_app, 'animation_cache') else get_cache()
-    cache_key = f"{story}:{dof_level}"
+    response_format = data.get('format', 'json')
+    if response_format not in RESPONSE_FORMATS:
+        return error_response(f'Invalid format: {response_format}')
+    if response_format == 'columnar' and params['dof_level'] != '12dof':
+        return error_response('Columnar format requires dof_level 12dof')
     
-    if use_cache:
-        cached_result = cache.get(cache_key)
-        if cached_result:
-            elapsed_ms = (time.time() - start_time) * 1000
-            return success_response(
-                data=cached_result['data'],
-                message='Cached',
-                cached=True,
-                latency_ms=elapsed_ms
-            )
+    if not _check_rate_limit():
+        return error_response('Rate limit exceeded', status_code=429)
     
     try:
-        if hasattr(current_app, 'pipelines') and dof_level in current_app.pipelines:
-            pipeline = current_app.pipelines[dof_level]
+        result = get_service().generate(**params, deadline=deadline)
+    except Exception as e:
+        logger.error(f"Error: {str(e)}", exc_info=True)
+        return error_response(str(e), status_code=500)
+    
+    if not result['success']:
+        return error_response(
+            result.get('error', 'Failed'), status_code=_failure_status(result), **_failure_fields(result)
+        )
+    
+    elapsed_ms = (time.time() - start_time) * 1000
+    
+    if response_format == 'columnar':
+        payload = encode_columnar(
+            result['data'],
+            Skeleton12DOF.JOINT_NAMES,
+            extra_header={
+                'metadata': result.get('metadata'),
+                'cached': result['cached'],
+                'coalesced': result['coalesced'],
+                'latency_ms': elapsed_ms
+            }
+        )
+        return Response(payload, mimetype=COLUMNAR_CONTENT_TYPE)
+    
+    headers = {'Server-Timing': f'app;dur={elapsed_ms:.2f}'}
+    encoded = result.get('encoded_response')
+    if encoded is not None:
+        # Cached: clients can revalidate the ETag against the GET resource
+        key = get_service().animation_key(params['story'], params['dof_level'], params['interpolate'])
+        headers['Content-Location'] = animation_location(key)
+    else:
+        encoded = precompress_json(generate_body(result))
+    return precompressed_response(encoded, generate_fields(result, elapsed_ms), **headers)
+
+
+@bp.route('/animations/<key>', methods=['GET'])
+def get_cached_animation(key: str):
+    """
+    A cached animation by key (the Content-Location of a generate response)
+    
+    Same body as POST /api/generate. Answers 304 when If-None-Match
+    matches the ETag; HEAD is served from this route by Flask.
+    """
+    start_time = time.time()
+    result = get_service().cached_result(key)
+    if result is None:
+        return error_response('Animation not cached', status_code=404)
+    elapsed_ms = (time.time() - start_time) * 1000
+    return precompressed_response(
+        result['encoded_response'],
+        generate_fields(result, elapsed_ms),
+        **{'Server-Timing': f'app;dur={elapsed_ms:.2f}'}
+    )
+
+
+@bp.route('/generate/batch', methods=['POST'])
+@validate_content_type('application/json')
+@validate_request_size()
+def generate_batch():
+    """Generate many stories in one request with bounded concurrency"""
+    start_time = time.time()
+    deadline = get_deadline('batch')
+    data = request.get_json()
+    items = data.get('items') if isinstance(data, dict) else None
+    
+    if not isinstance(items, list) or not items:
+        return error_response('Missing items parameter')
+    
+    max_items = int(os.getenv('BATCH_MAX_ITEMS', '30'))
+    if len(items) > max_items:
+        return error_response(f'Too many items: {len(items)} (max {max_items})')
+    
+    max_concurrency, error = _parse_max_concurrency(data.get('max_concurrency'))
+    if error:
+        return error_response(error)
+    
+    responses = [None] * len(items)
+    valid_indexes, valid_params = [], []
+    for index, item in enumerate(items):
+        params, error = _parse_generate_request(item if isinstance(item, dict) else None)
+        if error:
+            responses[index] = {'index': index, 'success': False, 'error': error}
         else:
-            pipeline = get_pipeline(dof_level)
-        
-        result = pipeline.generate(story=story)
-        
+            valid_indexes.append(index)
+            valid_params.append(params)
+    
+    # One token per generation the batch will run (at least one per request),
+    # capped at a full bucket so every accepted batch size can be admitted
+    service = get_service()
+    cost = min(max(1, service.count_uncached(valid_params)), _request_rate_limiter().capacity)
+    if not _check_rate_limit(cost):
+        return error_response(
+            f'Rate limit exceeded: batch needs {cost} requests of allowance',
+            status_code=429
+        )
+    
+    results = service.generate_batch(
+        valid_params,
+        max_concurrency=max_concurrency,
+        deadline=deadline
+    )
+    
+    for index, result in zip(valid_indexes, results):
         if result['success']:
-            if use_cache:
-                cache.put(cache_key, result)
-            
-            elapsed_ms = (time.time() - start_time) * 1000
-            return success_response(
-                data=result['data'],
-                message='Success',
-                cached=False,
-                latency_ms=elapsed_ms,
-                metadata=result['metadata']
-            )
+            responses[index] = {
+                'index': index,
+                'success': True,
+                'cached': result['cached'],
+                'data': result['data'],
+                'metadata': result.get('metadata')
+            }
         else:
-            return error_response(result.get('error', 'Failed'), status_code=500)
+            responses[index] = {
+                'index': index,
+                'success': False,
+                'error': result.get('error', 'Failed'),
+                'timed_out': result.get('timed_out', False),
+                **_failure_fields(result)
+            }
+    
+    succeeded = sum(1 for r in responses if r['success'])
+    elapsed_ms = (time.time() - start_time) * 1000
+    return success_response(
+        data={'items': responses, 'succeeded': succeeded, 'failed': len(responses) - succeeded},
+        message='Batch complete',
+        latency_ms=elapsed_ms
+    )
+
+
+@bp.route('/generate/stream', methods=['POST'])
+@validate_content_type('application/json')
+@validate_request_size()
+def stream_animation():
+    """Stream pipeline stages as Server-Sent Events"""
+    deadline = get_deadline('stream')
+    params, error = _parse_generate_request(request.get_json())
+    if error:
+        return error_response(error)
+    
+    if not _check_rate_limit():
+        return error_response('Rate limit exceeded', status_code=429)
+    
+    events = get_service().generate_stream(**params, deadline=deadline)
+    return Response(
+        stream_with_context(_format_sse(events)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def _format_sse(events: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    """Turn service events into SSE messages"""
+    try:
+        for event in events:
+            yield sse_message(event)
     except Exception as e:
-        logger.error(f"Error: {str(e)}", exc_info=True)
+        logger.error(f"Stream error: {str(e)}", exc_info=True)
+        yield sse_event('error', {'message': str(e)})
+
+
+def sse_message(event: Dict[str, Any]) -> str:
+    """
+    Format one service event as an SSE message
+    
+    A streamed `complete` event omits the keyframes already sent in the
+    `keyframes` event. A cached or coalesced one carries the full
+    animation: those requests received no `keyframes`/`frames` events.
+    """
+    name, data = event['event'], event['data']
+    if name == 'complete':
+        data = {k: v for k, v in data.items() if k != 'encoded_response'}
+        if not data['cached'] and not data.get('coalesced'):
+            animation = {k: v for k, v in data['data'].items() if k != 'keyframes'}
+            data = {**data, 'data': animation}
+    elif name == 'error':
+        data = {
+            'message': data.get('error', 'Failed'),
+            'timed_out': data.get('timed_out', False),
+            'metadata': data.get('metadata'),
+            **_failure_fields(data)
+        }
+    return sse_event(name, data)
+
+
+@bp.route('/interpolate', methods=['POST'])
+@validate_content_type('application/json')
+@validate_request_size()
+def interpolate_animation():
+    """Interpolate keyframes on demand (for clients that requested interpolate=false)"""
+    data = request.get_json()
+    animation = data.get('data') if isinstance(data, dict) else None
+    if not isinstance(animation, dict) or not isinstance(animation.get('keyframes'), list):
+        return error_response('Missing data.keyframes parameter')
+    
+    dof_level = data.get('dof_level', '12dof')
+    if dof_level not in ['6dof', '12dof']:
+        return error_response(f'Invalid dof_level: {dof_level}')
+    
+    target_fps = data.get('target_fps', 30)
+    if not isinstance(target_fps, int) or not 1 <= target_fps <= 60:
+        return error_response('Invalid target_fps: must be an integer between 1 and 60')
+    
+    try:
+        result = get_service().interpolate(animation, dof_level=dof_level, target_fps=target_fps)
+    except Exception as e:
+        logger.error(f"Interpolation error: {str(e)}", exc_info=True)
         return error_response(str(e), status_code=500)
+    
+    return success_response(data=result, frame_count=len(result['keyframes']))
+
+
+@bp.route('/generate/async', methods=['POST'])
+@validate_content_type('application/json')
+@validate_request_size()
+def submit_generation_job():
+    """Queue a generation and return its job id immediately"""
+    # Time spent waiting in the queue counts against the budget
+    deadline = get_deadline('async')
+    params, error = _parse_generate_request(request.get_json())
+    if error:
+        return error_response(error)
+    
+    if not _check_rate_limit():
+        return error_response('Rate limit exceeded', status_code=429)
+    
+    try:
+        job = get_queue().submit(get_service().generate, **params, deadline=deadline)
+    except QueueFullError as e:
+        return error_response(str(e), status_code=503)
+    
+    response, _ = success_response(
+        data={
+            **job.to_dict(),
+            'status_url': url_for('api.get_generation_job', job_id=job.id)
+        },
+        message='Accepted'
+    )
+    return response, 202
+
+
+@bp.route('/jobs/<job_id>', methods=['GET'])
+def get_generation_job(job_id: str):
+    """Poll a queued generation; includes the animation once it succeeded"""
+    job = get_queue().get(job_id)
+    if job is None:
+        return error_response(f'Job not found: {job_id}', status_code=404)
+    
+    data = job.to_dict()
+    if job.status == JobStatus.SUCCEEDED:
+        result = job.result
+        if not result['success']:
+            data['status'] = JobStatus.FAILED
+            data['error'] = result.get('error', 'Failed')
+            data['timed_out'] = result.get('timed_out', False)
+            data.update(_failure_fields(result))
+        else:
+            data['result'] = result['data']
+            data['metadata'] = result.get('metadata')
+            data['cached'] = result['cached']
+            data['coalesced'] = result['coalesced']
+    
+    return success_response(data=data, message=data['status'])
 
 
 @bp.route('/health', methods=['GET'])
@@ -122,17 +428,17 @@ def health_check():
     uptime_seconds = time.time() - start_time
     
     pipeline_status = {}
-    if hasattr(current_app, 'pipelines'):
-        for dof in ['6dof', '12dof']:
-            if dof in current_app.pipelines:
-                stats = current_app.pipelines[dof].get_stats()
-                pipeline_status[dof] = {
-                    'initialized': True,
-                    'requests': stats['total_requests'],
-                    'success_rate': stats['successful'] / stats['total_requests'] if stats['total_requests'] > 0 else 0
-                }
-            else:
-                pipeline_status[dof] = {'initialized': False}
+    pipelines = get_service().pipelines
+    for dof in ['6dof', '12dof']:
+        if dof in pipelines:
+            stats = pipelines[dof].get_stats()
+            pipeline_status[dof] = {
+                'initialized': True,
+                'requests': stats['total_requests'],
+                'success_rate': stats['successful'] / stats['total_requests'] if stats['total_requests'] > 0 else 0
+            }
+        else:
+            pipeline_status[dof] = {'initialized': False}
     
     return success_response(
         data={
@@ -150,11 +456,36 @@ def health_check():
 @bp.route('/metrics', methods=['GET'])
 def get_metrics():
     data = {'version': get_version(), 'pipelines': {}}
-    for dof, p in _pipelines.items():
+    for dof, p in list(get_service().pipelines.items()):
         data['pipelines'][dof] = p.get_stats()
+    data['jobs'] = get_queue().get_stats()
+    data['llm'] = get_llm_client().get_stats()
+    data.update(get_service().get_stats())
     return success_response(data=data)
 
 
+@bp.route('/analytics/hot-keys', methods=['GET'])
+@require_api_key
+def get_hot_keys():
+    """
+    Approximate top-K stories, dof levels and action types (per worker)
+    
+    Stories are reported hashed unless an API key is configured (and was
+    checked by require_api_key).
+    
+    Query: k - keys per sketch (default 20)
+    """
+    hot_keys = get_service().hot_keys
+    k = request.args.get('k', 20, type=int)
+    if k is None or not 1 <= k <= hot_keys.capacity:
+        return error_response(f'k must be between 1 and {hot_keys.capacity}', status_code=400)
+    
+    return success_response(data={
+        'capacity': hot_keys.capacity,
+        'sketches': hot_keys.top(k, raw_stories=bool(os.getenv('API_KEY')))
+    })
+
+
 @bp.route('/version', methods=['GET'])
 def version_info():
     return success_response(data={
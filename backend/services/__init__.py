@@ -16,5 +16,6 @@ __all__ = [
     "StoryAnalyzer",
     "AnimationGenerator", 
     "AnimationOptimizer",
-    "AnimationPipelineV2"
+    "AnimationPipelineV2",
+    "AnimationService"
 ]
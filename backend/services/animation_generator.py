@@ -6,13 +6,19 @@ Animation Generator - Level 2 (V2)
 1. 模板生成 (优先): 使用算法，0次LLM调用
 2. LLM批量生成 (备用): 一次生成所有关键帧
 
+LLM批量生成可以流式进行（llm.stream_keyframes）：边接收边解析 keyframes 数组，
+每个关键帧完整且结构有效时立即产出，输出格式错误时提前中止。
+
 Author: Shenzhen Wang & AI
 License: MIT
 """
+import os
 import json
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterator, AsyncIterator
 from backend.llm_client import LLMClient, get_llm_client
+from backend.utils.deadline import Deadline, DeadlineExceeded
+from backend.utils.json_stream import JsonArrayStream
 from backend.models.base_skeleton import BaseSkeleton
 from backend.models.skeleton_factory import create_skeleton
 from .story_analyzer import StoryAnalysis, KeyAction, Character
@@ -40,6 +46,7 @@ class AnimationGenerator:
         self.llm_client = llm_client or get_llm_client()
         self.max_tokens = self.llm_client.get_service_max_tokens('animator')
         self.skeleton = create_skeleton(dof_level)
+        self.streaming = os.getenv('LLM_STREAM_KEYFRAMES', 'false').lower() == 'true'
         
         # 注册所有模板
         register_all_templates(dof_level)
@@ -49,31 +56,159 @@ class AnimationGenerator:
             f"(dof={dof_level}, templates={len(TEMPLATE_REGISTRY.list_available())})"
         )
     
-    def generate(self, story_analysis: StoryAnalysis) -> Dict[str, Any]:
+    def generate(
+        self,
+        story_analysis: StoryAnalysis,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
         """
         生成动画数据
         
         Args:
             story_analysis: 故事分析结果
+            deadline: 请求截止时间（仅LLM生成使用）
             
         Returns:
             动画数据字典
         """
-        key_actions = story_analysis.key_actions
-        characters = story_analysis.characters
-        
-        # 检查是否所有动作都有模板
-        all_have_templates = all(
-            TEMPLATE_REGISTRY.has(action.type) 
-            for action in key_actions
-        )
+        if self._all_have_templates(story_analysis):
+            logger.info("所有动作都有模板，使用模板生成 (0次LLM调用)")
+            return self._generate_with_templates(story_analysis)
+        else:
+            logger.info("部分动作无模板，使用LLM批量生成 (1次LLM调用)")
+            return self._generate_with_llm(story_analysis, deadline)
+    
+    async def agenerate(
+        self,
+        story_analysis: StoryAnalysis,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """
+        generate 的异步版本：模板生成为纯计算直接执行，LLM生成异步等待
         
-        if all_have_templates:
+        Args:
+            story_analysis: 故事分析结果
+            deadline: 请求截止时间（仅LLM生成使用）
+            
+        Returns:
+            动画数据字典
+        """
+        if self._all_have_templates(story_analysis):
             logger.info("所有动作都有模板，使用模板生成 (0次LLM调用)")
             return self._generate_with_templates(story_analysis)
         else:
             logger.info("部分动作无模板，使用LLM批量生成 (1次LLM调用)")
-            return self._generate_with_llm(story_analysis)
+            return await self._agenerate_with_llm(story_analysis, deadline)
+    
+    def uses_streaming(self, story_analysis: StoryAnalysis) -> bool:
+        """该故事是否走流式LLM生成（启用了流式且有动作没有模板）"""
+        return self.streaming and not self._all_have_templates(story_analysis)
+    
+    def stream_keyframes(
+        self,
+        story_analysis: StoryAnalysis,
+        deadline: Optional[Deadline] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        流式LLM批量生成：每个关键帧接收完整并通过结构检查后立即产出
+        
+        全部产出后用 build_animation_data 组装动画数据（与 _generate_with_llm 的结果相同）。
+        JSON 格式错误或关键帧结构无效时立即中止LLM请求并抛出异常。
+        
+        Args:
+            story_analysis: 故事分析结果
+            deadline: 请求截止时间（传给LLM调用）
+            
+        Yields:
+            关键帧
+        """
+        logger.info("Calling LLM for streamed batch generation...")
+        parser = JsonArrayStream("keyframes")
+        deltas = self.llm_client.completion_stream(
+            messages=self._build_llm_messages(story_analysis),
+            max_tokens=self.max_tokens,
+            response_format={"type": "json_object"},
+            deadline=deadline,
+            service='animator'
+        )
+        try:
+            for delta in deltas:
+                for keyframe in parser.feed(delta):
+                    yield self._check_keyframe(keyframe, parser.count - 1)
+            parser.close()
+            logger.info(f"LLM流式生成成功: {parser.count}个关键帧")
+            
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"LLM流式生成失败: {str(e)}")
+            raise Exception(f"Failed to generate animation: {str(e)}") from e
+        finally:
+            deltas.close()
+    
+    async def astream_keyframes(
+        self,
+        story_analysis: StoryAnalysis,
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """stream_keyframes 的异步版本（使用 LLMClient.acompletion_stream）"""
+        logger.info("Calling LLM for streamed batch generation (async)...")
+        parser = JsonArrayStream("keyframes")
+        deltas = self.llm_client.acompletion_stream(
+            messages=self._build_llm_messages(story_analysis),
+            max_tokens=self.max_tokens,
+            response_format={"type": "json_object"},
+            deadline=deadline,
+            service='animator'
+        )
+        try:
+            async for delta in deltas:
+                for keyframe in parser.feed(delta):
+                    yield self._check_keyframe(keyframe, parser.count - 1)
+            parser.close()
+            logger.info(f"LLM流式生成成功: {parser.count}个关键帧")
+            
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"LLM流式生成失败: {str(e)}")
+            raise Exception(f"Failed to generate animation: {str(e)}") from e
+        finally:
+            await deltas.aclose()
+    
+    def _check_keyframe(self, keyframe: Any, index: int) -> Dict[str, Any]:
+        """
+        检查流式收到的关键帧结构
+        
+        缺少字段或 skeleton.check 报告结构错误（缺少关节、数据类型错误）时
+        抛出 ValueError（无法修正，中止生成）；骨骼长度、画布边界等约束警告
+        只记录，交给 Level 3 自动修正。
+        
+        Raises:
+            ValueError: 关键帧结构无效
+        """
+        if not isinstance(keyframe, dict) or not isinstance(keyframe.get("characters"), dict):
+            raise ValueError(f"关键帧 {index} 缺少characters字段")
+        if not isinstance(keyframe.get("timestamp_ms"), (int, float)):
+            raise ValueError(f"关键帧 {index} 缺少timestamp_ms字段")
+        
+        data_field = self.skeleton.get_data_field_name()
+        for char_id, char_data in keyframe["characters"].items():
+            if not isinstance(char_data, dict) or data_field not in char_data:
+                raise ValueError(f"关键帧 {index} 角色 {char_id} 缺少{data_field}字段")
+            report = self.skeleton.check(char_data[data_field])
+            if report.structural:
+                raise ValueError(f"关键帧 {index} 角色 {char_id}: {'; '.join(report.structural)}")
+            if report.constraints:
+                logger.debug(f"关键帧 {index} 有 {len(report.constraints)} 个约束问题，将在优化阶段修正")
+        return keyframe
+    
+    def _all_have_templates(self, story_analysis: StoryAnalysis) -> bool:
+        """检查是否所有动作都有模板"""
+        return all(
+            TEMPLATE_REGISTRY.has(action.type) 
+            for action in story_analysis.key_actions
+        )
     
     def _generate_with_templates(self, story_analysis: StoryAnalysis) -> Dict[str, Any]:
         """
@@ -89,12 +224,6 @@ class AnimationGenerator:
         current_time = 0
         
         for action in story_analysis.key_actions:
-            template = TEMPLATE_REGISTRY.get(action.type)
-            
-            if template is None:
-                logger.warning(f"No template for action type: {action.type}")
-                continue
-            
             # 使用第一个角色
             character = story_analysis.characters[0]
             character_dict = {
@@ -103,101 +232,153 @@ class AnimationGenerator:
                 "color": character.color
             }
             
-            # 生成关键帧
-            action_keyframes = template.generate(character_dict, action.params)
+            # 生成关键帧（相同动作+参数命中模板缓存），时间戳已平移到 current_time 之后
+            generated = TEMPLATE_REGISTRY.generate(
+                action.type, character_dict, action.params, offset_ms=current_time
+            )
             
-            # 获取动作时长（用于计算下一个动作的起始时间）
-            action_duration = template.get_duration(action.params)
+            if generated is None:
+                logger.warning(f"No template for action type: {action.type}")
+                continue
             
-            # 调整时间戳并添加关键帧
-            for kf in action_keyframes:
-                kf.timestamp_ms += current_time
-                keyframes.append(kf.to_dict())
+            # 动作时长（用于计算下一个动作的起始时间）
+            action_keyframes, action_duration = generated
+            keyframes.extend(action_keyframes)
             
             # 更新当前时间：使用最后一个关键帧的时间戳 + 50ms缓冲
             # 这样下一个动作会在这个动作的最后一帧之后开始，避免时间戳重复
             if action_keyframes:
-                last_kf_time = action_keyframes[-1].timestamp_ms
+                last_kf_time = action_keyframes[-1]["timestamp_ms"]
                 current_time = last_kf_time + 50  # 50ms缓冲避免重复
             else:
                 current_time += action_duration
         
         # 构建动画数据
-        return {
-            "characters": [
-                {
-                    "id": c.id,
-                    "name": c.name,
-                    "color": c.color,
-                    "role": c.role
-                }
-                for c in story_analysis.characters
-            ],
-            "keyframes": keyframes,
-            "dof_level": self.dof_level,
-            "generation_method": "template"
-        }
+        return self.build_animation_data(story_analysis, keyframes, "template")
     
-    def _generate_with_llm(self, story_analysis: StoryAnalysis) -> Dict[str, Any]:
+    def _generate_with_llm(
+        self,
+        story_analysis: StoryAnalysis,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
         """
         使用LLM批量生成所有关键帧 (1次LLM调用)
         
         Args:
             story_analysis: 故事分析结果
+            deadline: 请求截止时间（传给LLM调用）
             
         Returns:
             动画数据
         """
-        prompt = self._build_batch_prompt(story_analysis)
-        
         try:
-            messages = [
-                {"role": "system", "content": self.skeleton.get_system_prompt()},
-                {"role": "user", "content": prompt}
-            ]
-            
             logger.info("Calling LLM for batch generation...")
             response = self.llm_client.completion(
-                messages=messages,
+                messages=self._build_llm_messages(story_analysis),
                 max_tokens=self.max_tokens,
-                response_format={"type": "json_object"}
+                response_format={"type": "json_object"},
+                deadline=deadline,
+                service='animator'
             )
+            return self._parse_llm_response(response, story_analysis)
             
-            content = response.choices[0].message.content
-            
-            # 处理markdown包裹
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-            
-            result = json.loads(content)
-            
-            # 确保有keyframes字段
-            if "keyframes" not in result:
-                raise ValueError("LLM响应缺少keyframes字段")
-            
-            keyframes = result["keyframes"]
-            logger.info(f"LLM批量生成成功: {len(keyframes)}个关键帧")
-            
-            return {
-                "characters": [
-                    {
-                        "id": c.id,
-                        "name": c.name,
-                        "color": c.color,
-                        "role": c.role
-                    }
-                    for c in story_analysis.characters
-                ],
-                "keyframes": keyframes,
-                "dof_level": self.dof_level,
-                "generation_method": "llm_batch"
-            }
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"LLM批量生成失败: {str(e)}")
+            raise Exception(f"Failed to generate animation: {str(e)}") from e
+    
+    async def _agenerate_with_llm(
+        self,
+        story_analysis: StoryAnalysis,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """
+        _generate_with_llm 的异步版本（使用 LLMClient.acompletion）
+        
+        Args:
+            story_analysis: 故事分析结果
+            deadline: 请求截止时间（传给LLM调用）
             
+        Returns:
+            动画数据
+        """
+        try:
+            logger.info("Calling LLM for batch generation (async)...")
+            response = await self.llm_client.acompletion(
+                messages=self._build_llm_messages(story_analysis),
+                max_tokens=self.max_tokens,
+                response_format={"type": "json_object"},
+                deadline=deadline,
+                service='animator'
+            )
+            return self._parse_llm_response(response, story_analysis)
+            
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"LLM批量生成失败: {str(e)}")
-            raise Exception(f"Failed to generate animation: {str(e)}")
+            raise Exception(f"Failed to generate animation: {str(e)}") from e
+    
+    def _build_llm_messages(self, story_analysis: StoryAnalysis) -> List[Dict[str, str]]:
+        """构建批量生成的LLM消息列表"""
+        return [
+            {"role": "system", "content": self.skeleton.get_system_prompt()},
+            {"role": "user", "content": self._build_batch_prompt(story_analysis)}
+        ]
+    
+    def _parse_llm_response(self, response: Any, story_analysis: StoryAnalysis) -> Dict[str, Any]:
+        """解析LLM批量生成的响应"""
+        content = response.choices[0].message.content
+        
+        # 处理markdown包裹
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0].strip()
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0].strip()
+        
+        result = json.loads(content)
+        
+        # 确保有keyframes字段
+        if "keyframes" not in result:
+            raise ValueError("LLM响应缺少keyframes字段")
+        
+        keyframes = result["keyframes"]
+        logger.info(f"LLM批量生成成功: {len(keyframes)}个关键帧")
+        
+        return self.build_animation_data(story_analysis, keyframes, "llm_batch")
+    
+    def build_animation_data(
+        self,
+        story_analysis: StoryAnalysis,
+        keyframes: List[Dict[str, Any]],
+        generation_method: str
+    ) -> Dict[str, Any]:
+        """
+        组装动画数据
+        
+        Args:
+            story_analysis: 故事分析结果
+            keyframes: 关键帧列表
+            generation_method: template 或 llm_batch（流式生成也是 llm_batch）
+            
+        Returns:
+            动画数据
+        """
+        return {
+            "characters": [
+                {
+                    "id": c.id,
+                    "name": c.name,
+                    "color": c.color,
+                    "role": c.role
+                }
+                for c in story_analysis.characters
+            ],
+            "keyframes": keyframes,
+            "dof_level": self.dof_level,
+            "generation_method": generation_method
+        }
     
     def _build_batch_prompt(self, story_analysis: StoryAnalysis) -> str:
         """
@@ -13,7 +13,7 @@ License: MIT
 """
 import logging
 import math
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional, Iterator
 from backend.models.base_skeleton import BaseSkeleton
 from backend.models.skeleton_factory import create_skeleton
 
@@ -53,6 +53,33 @@ class AnimationOptimizer:
         Returns:
             优化后的动画数据
         """
+        for _ in self.optimize_iter(animation_data, auto_fix, interpolate, target_fps):
+            pass
+        return animation_data
+    
+    def optimize_iter(
+        self,
+        animation_data: Dict[str, Any],
+        auto_fix: bool = True,
+        interpolate: bool = True,
+        target_fps: int = 30,
+        chunk_size: int = 30
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        优化动画数据，并按块逐步产出最终帧
+        
+        生成器耗尽后 animation_data 已更新为优化结果（与 optimize 相同）。
+        
+        Args:
+            animation_data: 动画数据
+            auto_fix: 是否自动修正错误
+            interpolate: 是否进行插值
+            target_fps: 目标帧率（插值时使用）
+            chunk_size: 每块帧数
+            
+        Yields:
+            帧列表（每块最多 chunk_size 帧）
+        """
         keyframes = animation_data.get("keyframes", [])
         
         if not keyframes:
@@ -79,16 +106,27 @@ class AnimationOptimizer:
                     logger.warning(f"自动修正后仍有 {len(errors_after_fix)} 个错误")
         
         # Step 3: 插值（可选，生成所有帧）
+        source = self._iter_interpolated_frames(keyframes, target_fps) if interpolate else iter(keyframes)
+        
+        frames = []
+        chunk = []
+        for frame in source:
+            chunk.append(frame)
+            if len(chunk) >= chunk_size:
+                frames.extend(chunk)
+                yield chunk
+                chunk = []
+        if chunk:
+            frames.extend(chunk)
+            yield chunk
+        
         if interpolate:
-            keyframes = self._interpolate_keyframes(keyframes, target_fps)
-            logger.info(f"插值后共 {len(keyframes)} 帧 ({target_fps}fps)")
+            logger.info(f"插值后共 {len(frames)} 帧 ({target_fps}fps)")
         
         # 更新动画数据
-        animation_data["keyframes"] = keyframes
+        animation_data["keyframes"] = frames
         animation_data["optimized"] = True
         animation_data["target_fps"] = target_fps if interpolate else None
-        
-        return animation_data
     
     def _validate_all_keyframes(
         self, 
@@ -260,13 +298,17 @@ class AnimationOptimizer:
         
         joints = char_data[data_field]
         
-        # 约束所有关节到画布内
-        for joint_name, joint in joints.items():
-            if isinstance(joint, dict) and "x" in joint and "y" in joint:
-                joint["x"] = max(0, min(800, joint["x"]))
-                joint["y"] = max(0, min(600, joint["y"]))
+        # 约束所有关节到画布内；生成新的字典而不修改原关键帧（模板缓存共享关节数据）
+        clamped = {
+            joint_name: {**joint, "x": max(0, min(800, joint["x"])), "y": max(0, min(600, joint["y"]))}
+            if isinstance(joint, dict) and "x" in joint and "y" in joint else joint
+            for joint_name, joint in joints.items()
+        }
         
-        return keyframe
+        return {
+            **keyframe,
+            "characters": {**characters, char_id: {**char_data, data_field: clamped}}
+        }
     
     def _interpolate_keyframes(
         self,
@@ -283,36 +325,50 @@ class AnimationOptimizer:
         Returns:
             插值后的帧列表（包含所有中间帧）
         """
+        return list(self._iter_interpolated_frames(keyframes, target_fps))
+    
+    def _iter_interpolated_frames(
+        self,
+        keyframes: List[Dict[str, Any]],
+        target_fps: int = 30
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        逐帧产出插值结果（_interpolate_keyframes 的惰性版本）
+        
+        Args:
+            keyframes: 关键帧列表
+            target_fps: 目标帧率
+            
+        Yields:
+            关键帧及其间的插值帧
+        """
         if len(keyframes) < 2:
-            return keyframes
+            yield from keyframes
+            return
         
-        interpolated = []
+        frame_interval = 1000 / target_fps  # 每帧时长(ms)
         
         for i in range(len(keyframes) - 1):
             kf1 = keyframes[i]
             kf2 = keyframes[i + 1]
             
-            interpolated.append(kf1)
+            yield kf1
             
             # 计算需要插入多少帧
             time_diff = kf2["timestamp_ms"] - kf1["timestamp_ms"]
             if time_diff <= 0:
                 continue
             
-            frame_interval = 1000 / target_fps  # 每帧时长(ms)
             num_frames = int(time_diff / frame_interval) - 1
             
             if num_frames > 0:
                 # 线性插值
                 for j in range(1, num_frames + 1):
                     t = j / (num_frames + 1)
-                    interp_frame = self._lerp_keyframes(kf1, kf2, t)
-                    interpolated.append(interp_frame)
+                    yield self._lerp_keyframes(kf1, kf2, t)
         
         # 添加最后一帧
-        interpolated.append(keyframes[-1])
-        
-        return interpolated
+        yield keyframes[-1]
     
     def _lerp_keyframes(
         self,
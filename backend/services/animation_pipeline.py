@@ -7,26 +7,81 @@ Level 1: Story Analyzer - 故事分析 (1次LLM)
 Level 2: Animation Generator - 动画生成 (模板:0次 或 LLM:1次)
 Level 3: Animation Optimizer - 动画优化 (0次LLM)
 
+每一级的结果单独缓存：
+- 故事分析按规范化后的故事文本缓存
+- 原始关键帧按 StoryAnalysis 指纹 + dof 缓存
+- 优化后的帧按 StoryAnalysis 指纹 + dof + 是否插值缓存
+措辞不同但分析结果相同的故事可跳过 Level 2 / 3。
+
 Author: Shenzhen Wang & AI
 License: MIT
 """
 import time
+import asyncio
 import logging
-from typing import Dict, Any, Optional
-from .story_analyzer import StoryAnalyzer
+import threading
+from contextlib import closing
+from typing import Dict, Any, Optional, Iterator, AsyncIterator, Tuple, List
+from .story_analyzer import StoryAnalyzer, StoryAnalysis
 from .animation_generator import AnimationGenerator
 from .animation_optimizer import AnimationOptimizer
 from backend.utils.debug_logger import get_debug_logger
+from backend.utils.deadline import Deadline, DeadlineExceeded
+from backend.utils.frozen import freeze, thaw
+from backend.utils.blocking import run_blocking
+from backend.cache_service import AnimationCache, get_stage_caches
+from backend.llm_client import _is_retryable
 
 logger = logging.getLogger(__name__)
 
+# Level 3 插值帧率与流式输出时每块的帧数
+TARGET_FPS = 30
+FRAME_CHUNK_SIZE = 30
+
+# generate_stream 的终止事件
+FINAL_EVENTS = ("complete", "error")
+
+
+def _root_cause(error: BaseException) -> BaseException:
+    """各级以 raise ... from e 包装的原始异常（用于错误类型与是否可重试）"""
+    while error.__cause__ is not None:
+        error = error.__cause__
+    return error
+
+
+def _next_or_return(iterator: Iterator[Any]) -> Tuple[bool, Any]:
+    """
+    推进生成器一步：返回 (False, 产出值)，结束时返回 (True, 生成器返回值)
+
+    StopIteration 无法穿过线程池的 Future，因此在工作线程内转换为返回值。
+    """
+    try:
+        return False, next(iterator)
+    except StopIteration as stop:
+        return True, stop.value
+
 
 class AnimationPipelineV2:
     """3级流水线 - 新一代动画生成系统"""
     
-    def __init__(self, dof_level: str = "12dof", enable_optimization: bool = True):
+    def __init__(
+        self,
+        dof_level: str = "12dof",
+        enable_optimization: bool = True,
+        stage_caches: Optional[Dict[str, AnimationCache]] = None
+    ):
+        """
+        初始化流水线
+        
+        Args:
+            dof_level: 骨骼自由度
+            enable_optimization: 是否执行 Level 3
+            stage_caches: 各级缓存 {"analysis" | "keyframes" | "frames": cache}，
+                默认使用全局的 get_stage_caches()；缺少的级别不缓存
+        """
         self.dof_level = dof_level
         self.enable_optimization = enable_optimization
+        self.stage_caches = stage_caches if stage_caches is not None else get_stage_caches()
         
         logger.info(f"Initializing Animation Pipeline (dof={dof_level})")
         
@@ -36,6 +91,8 @@ class AnimationPipelineV2:
         
         self.debug_logger = get_debug_logger()
         
+        # 流水线可被多个工作线程并发调用
+        self._stats_lock = threading.Lock()
         self.stats = {
             "total_requests": 0,
             "successful": 0,
@@ -44,126 +101,486 @@ class AnimationPipelineV2:
             "total_time_ms": 0,
             "llm_calls_total": 0,
             "template_generations": 0,
-            "llm_generations": 0
+            "llm_generations": 0,
+            "analysis_cache_hits": 0,
+            "keyframes_cache_hits": 0,
+            "frames_cache_hits": 0
         }
         
         logger.info("Animation Pipeline initialized successfully")
     
-    def generate(self, story: str) -> Dict[str, Any]:
+    def generate(
+        self,
+        story: str,
+        interpolate: bool = True,
+        deadline: Optional[Deadline] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
         """完整的动画生成流程"""
-        start_time = time.time()
-        self.stats["total_requests"] += 1
+        for event in self.generate_stream(story, interpolate=interpolate, deadline=deadline, use_cache=use_cache):
+            if event["event"] in FINAL_EVENTS:
+                return event["data"]
+    
+    async def agenerate(
+        self,
+        story: str,
+        interpolate: bool = True,
+        deadline: Optional[Deadline] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """generate 的异步版本"""
+        async for event in self.agenerate_stream(
+            story, interpolate=interpolate, deadline=deadline, use_cache=use_cache
+        ):
+            if event["event"] in FINAL_EVENTS:
+                return event["data"]
+    
+    def generate_stream(
+        self,
+        story: str,
+        interpolate: bool = True,
+        deadline: Optional[Deadline] = None,
+        use_cache: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        流式动画生成流程，每个阶段完成后立即产出事件
         
-        session_id = self.debug_logger.start_session(story, self.dof_level)
+        interpolate=False 时跳过服务端插值，只返回验证/修正后的关键帧及
+        interpolation 元数据（target_fps 为 None，前端用 GSAP 插值）。
+        
+        给定 deadline 时每个阶段开始前检查剩余时间，并据此收紧LLM调用的超时；
+        超时后以 error 事件结束（timed_out 为 True）。
+        
+        use_cache=True 时依次查询各级缓存：命中的级别直接使用缓存结果，
+        只执行未命中的级别。优化后的帧仅在关键帧也命中时使用，
+        保证 keyframes 与 frames 事件来自同一次生成。
         
+        事件 ({"event": 名称, "data": 内容}):
+        - analysis: Level 1 的 StoryAnalysis
+        - keyframe: 流式LLM生成时每收到一个关键帧产出一次（{"index", "keyframe"}）
+        - keyframes: Level 2 的原始关键帧
+        - frames: Level 3 的最终帧（分块，含 start 偏移）
+        - complete / error: 与 generate() 返回值相同的结果字典
+        
+        事件数据在生成器恢复后可能被后续阶段修改，消费方应在收到时立即序列化。
+        """
+        start_time, session_id = self._begin(story)
         llm_calls = 0
+        cache_hits = {}
         
         try:
-            logger.info(f"Starting animation generation (length: {len(story)})")
-            
             logger.info("Level 1: Story Analysis...")
-            story_analysis = self.story_analyzer.analyze(story)
-            llm_calls += 1
+            story_analysis = self._cached_analysis(story, use_cache, cache_hits)
+            if story_analysis is None:
+                self._check_deadline(deadline, "story analysis")
+                story_analysis = self.story_analyzer.analyze(story, deadline=deadline)
+                llm_calls += 1
+                self._store_stage("analysis", story, story_analysis.to_dict(), use_cache)
+            fingerprint = story_analysis.fingerprint()
+            
+            yield {"event": "analysis", "data": story_analysis.to_dict()}
+            self._log_analysis(story_analysis)
             
-            self.debug_logger.log_custom(
-                "01_story_analysis.json",
-                story_analysis.to_dict()
+            logger.info("Level 2: Animation Generation...")
+            animation_data = self._cached_stage("keyframes", fingerprint, use_cache, cache_hits)
+            if animation_data is None:
+                self._check_deadline(deadline, "animation generation")
+                if self.animation_generator.uses_streaming(story_analysis):
+                    keyframes = []
+                    with closing(self.animation_generator.stream_keyframes(story_analysis, deadline=deadline)) as stream:
+                        for keyframe in stream:
+                            yield self._keyframe_event(keyframes, keyframe)
+                    animation_data = self.animation_generator.build_animation_data(
+                        story_analysis, keyframes, "llm_batch"
+                    )
+                else:
+                    animation_data = self.animation_generator.generate(story_analysis, deadline=deadline)
+                llm_calls += self._record_generation(animation_data)
+                self._store_stage("keyframes", fingerprint, animation_data, use_cache)
+            
+            yield {"event": "keyframes", "data": animation_data}
+            self._log_keyframes(animation_data)
+            
+            self._check_deadline(deadline, "animation optimization")
+            animation_data = yield from self._frames_stream(
+                animation_data, fingerprint, interpolate, use_cache, cache_hits
             )
             
-            logger.info(
-                f"Story analyzed: {len(story_analysis.characters)} characters, "
-                f"{len(story_analysis.key_actions)} key actions"
+            final_event = self._complete_event(
+                animation_data, story_analysis, interpolate, start_time, llm_calls, session_id, cache_hits
             )
             
-            logger.info("Level 2: Animation Generation...")
-            animation_data = self.animation_generator.generate(story_analysis)
+        except GeneratorExit:
+            # 消费方提前关闭（如客户端断开连接）
+            self._abandon(session_id)
+            raise
             
-            if animation_data.get("generation_method") == "llm_batch":
+        except Exception as e:
+            final_event = self._error_event(e, start_time, llm_calls, session_id)
+        
+        # 在 try 之外产出，generate() 取到结果后关闭生成器不会被误记为中断
+        yield final_event
+    
+    async def agenerate_stream(
+        self,
+        story: str,
+        interpolate: bool = True,
+        deadline: Optional[Deadline] = None,
+        use_cache: bool = True
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        generate_stream 的异步版本，事件与 generate_stream 相同
+        
+        LLM 调用期间让出事件循环；其余阻塞步骤（各级缓存读写、调试文件与SVG、
+        Level 3 插值计算）通过 run_blocking 在线程池中执行，不阻塞事件循环。
+        """
+        start_time, session_id = await run_blocking(self._begin, story)
+        llm_calls = 0
+        cache_hits = {}
+        
+        try:
+            logger.info("Level 1: Story Analysis (async)...")
+            story_analysis = await run_blocking(self._cached_analysis, story, use_cache, cache_hits)
+            if story_analysis is None:
+                self._check_deadline(deadline, "story analysis")
+                story_analysis = await self.story_analyzer.aanalyze(story, deadline=deadline)
                 llm_calls += 1
-                self.stats["llm_generations"] += 1
-            else:
-                self.stats["template_generations"] += 1
+                await run_blocking(self._store_stage, "analysis", story, story_analysis.to_dict(), use_cache)
+            fingerprint = story_analysis.fingerprint()
             
-            self.debug_logger.log_custom(
-                "02_animation_raw.json",
-                animation_data
-            )
+            yield {"event": "analysis", "data": story_analysis.to_dict()}
+            await run_blocking(self._log_analysis, story_analysis)
+            
+            logger.info("Level 2: Animation Generation (async)...")
+            animation_data = await run_blocking(self._cached_stage, "keyframes", fingerprint, use_cache, cache_hits)
+            if animation_data is None:
+                self._check_deadline(deadline, "animation generation")
+                if self.animation_generator.uses_streaming(story_analysis):
+                    keyframes = []
+                    stream = self.animation_generator.astream_keyframes(story_analysis, deadline=deadline)
+                    try:
+                        async for keyframe in stream:
+                            yield self._keyframe_event(keyframes, keyframe)
+                    finally:
+                        await stream.aclose()
+                    animation_data = self.animation_generator.build_animation_data(
+                        story_analysis, keyframes, "llm_batch"
+                    )
+                else:
+                    animation_data = await self.animation_generator.agenerate(story_analysis, deadline=deadline)
+                llm_calls += self._record_generation(animation_data)
+                await run_blocking(self._store_stage, "keyframes", fingerprint, animation_data, use_cache)
             
-            # 生成关键帧SVG可视化
-            self.debug_logger._generate_keyframe_svgs(animation_data)
+            yield {"event": "keyframes", "data": animation_data}
+            await run_blocking(self._log_keyframes, animation_data)
             
-            logger.info(
-                f"Generated {len(animation_data.get('keyframes', []))} keyframes "
-                f"(method: {animation_data.get('generation_method')})"
+            self._check_deadline(deadline, "animation optimization")
+            # 每块帧（插值计算、帧缓存读写与调试记录）在线程池中产出
+            frames = self._frames_stream(animation_data, fingerprint, interpolate, use_cache, cache_hits)
+            while True:
+                done, value = await run_blocking(_next_or_return, frames)
+                if done:
+                    animation_data = value
+                    break
+                yield value
+            
+            final_event = await run_blocking(
+                self._complete_event,
+                animation_data, story_analysis, interpolate, start_time, llm_calls, session_id, cache_hits
             )
             
-            if self.enable_optimization:
-                logger.info("Level 3: Animation Optimization...")
-                animation_data = self.animation_optimizer.optimize(
-                    animation_data,
-                    auto_fix=True,
-                    interpolate=True,  # 开启后端插值，生成所有帧
-                    target_fps=30  # 30fps足够流畅，避免数据过大
-                )
-                
-                self.debug_logger.log_custom(
-                    "03_animation_optimized.json",
-                    animation_data
-                )
-                
-                # 生成插值后所有帧的SVG
-                self.debug_logger._generate_keyframe_svgs(animation_data)
-                
-                logger.info(
-                    f"Optimized to {len(animation_data.get('keyframes', []))} frames"
-                )
+        except (GeneratorExit, asyncio.CancelledError):
+            # 消费方提前关闭或任务被取消
+            self._abandon(session_id)
+            raise
             
-            elapsed_ms = (time.time() - start_time) * 1000
+        except Exception as e:
+            final_event = await run_blocking(self._error_event, e, start_time, llm_calls, session_id)
+        
+        yield final_event
+    
+    def _begin(self, story: str) -> Tuple[float, str]:
+        """记录请求并开启调试会话，返回 (开始时间, session_id)"""
+        start_time = time.time()
+        with self._stats_lock:
+            self.stats["total_requests"] += 1
+        
+        session_id = self.debug_logger.start_session(story, self.dof_level)
+        logger.info(f"Starting animation generation (length: {len(story)})")
+        return start_time, session_id
+    
+    def _check_deadline(self, deadline: Optional[Deadline], stage: str):
+        """阶段开始前检查截止时间，已超时则放弃后续阶段"""
+        if deadline is not None:
+            deadline.check(stage)
+    
+    def _cached_stage(
+        self,
+        stage: str,
+        key: str,
+        use_cache: bool,
+        cache_hits: Dict[str, bool],
+        frozen: bool = False,
+        **params
+    ) -> Optional[Any]:
+        """
+        查询某一级的缓存并记录是否命中
+        
+        缓存中存放只读（冻结）数据。frozen=True 时直接返回共享的只读数据，
+        供只读取结果的调用方使用；否则返回可修改的深拷贝。
+        """
+        cache = self.stage_caches.get(stage) if use_cache else None
+        if cache is None:
+            return None
+        
+        cached = cache.get(key, **self._stage_params(stage, params))
+        cache_hits[stage] = cached is not None
+        if cached is None:
+            return None
+        
+        with self._stats_lock:
+            self.stats[f"{stage}_cache_hits"] += 1
+        logger.info(f"Stage cache hit: {stage}")
+        return cached if frozen else thaw(cached)
+    
+    def _store_stage(self, stage: str, key: str, value: Any, use_cache: bool, **params):
+        """写入某一级的缓存（存入冻结的副本）"""
+        cache = self.stage_caches.get(stage) if use_cache else None
+        if cache is not None:
+            cache.put(key, freeze(value), **self._stage_params(stage, params))
+    
+    def _stage_params(self, stage: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """缓存键参数：故事分析与 dof 无关，关键帧与帧按 dof 区分"""
+        if stage == "analysis":
+            return params
+        return {"dof_level": self.dof_level, **params}
+    
+    def _cached_analysis(
+        self,
+        story: str,
+        use_cache: bool,
+        cache_hits: Dict[str, bool]
+    ) -> Optional[StoryAnalysis]:
+        """Level 1 缓存（按规范化故事文本）"""
+        cached = self._cached_stage("analysis", story, use_cache, cache_hits)
+        return StoryAnalysis.from_dict(cached) if cached is not None else None
+    
+    def _frames_stream(
+        self,
+        animation_data: Dict[str, Any],
+        fingerprint: str,
+        interpolate: bool,
+        use_cache: bool,
+        cache_hits: Dict[str, bool]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Level 3：关键帧命中缓存时先查询优化结果缓存，否则执行优化并写入缓存
+        
+        Returns（生成器返回值）:
+            最终的动画数据
+        """
+        if not self.enable_optimization:
+            return animation_data
+        
+        if cache_hits.get("keyframes"):
+            # 命中的帧只被读取（分块产出、构建结果），直接使用只读数据
+            optimized = self._cached_stage(
+                "frames", fingerprint, use_cache, cache_hits, frozen=True, interpolate=interpolate
+            )
+            if optimized is not None:
+                yield from self._replay_frames(optimized)
+                return optimized
+        
+        yield from self._optimize_stream(animation_data, interpolate)
+        # 最终帧此后只被读取：冻结一次，缓存与结果共享同一份数据
+        animation_data = freeze(animation_data)
+        self._store_stage("frames", fingerprint, animation_data, use_cache, interpolate=interpolate)
+        return animation_data
+    
+    def _replay_frames(self, animation_data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """按与 _optimize_stream 相同的分块产出缓存的最终帧"""
+        frames: List[Dict[str, Any]] = animation_data.get("keyframes", [])
+        for start in range(0, len(frames), FRAME_CHUNK_SIZE):
+            yield {
+                "event": "frames",
+                "data": {
+                    "start": start,
+                    "frames": frames[start:start + FRAME_CHUNK_SIZE],
+                    "target_fps": animation_data.get("target_fps")
+                }
+            }
+        logger.info(f"Replayed {len(frames)} cached frames")
+    
+    def _log_analysis(self, story_analysis: StoryAnalysis):
+        """Level 1 完成后的调试记录"""
+        self.debug_logger.log_custom(
+            "01_story_analysis.json",
+            story_analysis.to_dict()
+        )
+        
+        logger.info(
+            f"Story analyzed: {len(story_analysis.characters)} characters, "
+            f"{len(story_analysis.key_actions)} key actions"
+        )
+    
+    def _record_generation(self, animation_data: Dict[str, Any]) -> int:
+        """统计 Level 2 的生成方式，返回其LLM调用次数"""
+        with self._stats_lock:
+            if animation_data.get("generation_method") == "llm_batch":
+                self.stats["llm_generations"] += 1
+                return 1
+            self.stats["template_generations"] += 1
+            return 0
+    
+    def _keyframe_event(self, keyframes: List[Dict[str, Any]], keyframe: Dict[str, Any]) -> Dict[str, Any]:
+        """流式生成收到一个关键帧：加入列表并构建 keyframe 事件"""
+        keyframes.append(keyframe)
+        return {"event": "keyframe", "data": {"index": len(keyframes) - 1, "keyframe": keyframe}}
+    
+    def _log_keyframes(self, animation_data: Dict[str, Any]):
+        """Level 2 完成后的调试记录"""
+        self.debug_logger.log_custom(
+            "02_animation_raw.json",
+            animation_data
+        )
+        
+        # 生成关键帧SVG可视化
+        self.debug_logger._generate_keyframe_svgs(animation_data)
+        
+        logger.info(
+            f"Generated {len(animation_data.get('keyframes', []))} keyframes "
+            f"(method: {animation_data.get('generation_method')})"
+        )
+    
+    def _optimize_stream(self, animation_data: Dict[str, Any], interpolate: bool) -> Iterator[Dict[str, Any]]:
+        """Level 3：优化并分块产出 frames 事件（未启用优化时不产出）"""
+        if not self.enable_optimization:
+            return
+        
+        logger.info("Level 3: Animation Optimization...")
+        frame_start = 0
+        frames_fps = TARGET_FPS if interpolate else None
+        # 后端插值生成所有帧；30fps足够流畅，避免数据过大
+        for chunk in self.animation_optimizer.optimize_iter(
+            animation_data,
+            auto_fix=True,
+            interpolate=interpolate,
+            target_fps=TARGET_FPS,
+            chunk_size=FRAME_CHUNK_SIZE
+        ):
+            yield {
+                "event": "frames",
+                "data": {
+                    "start": frame_start,
+                    "frames": chunk,
+                    "target_fps": frames_fps
+                }
+            }
+            frame_start += len(chunk)
+        
+        animation_data["interpolation"] = {
+            "method": "linear",
+            "target_fps": TARGET_FPS,
+            "server_side": interpolate
+        }
+        
+        self.debug_logger.log_custom(
+            "03_animation_optimized.json",
+            animation_data
+        )
+        
+        # 生成插值后所有帧的SVG
+        self.debug_logger._generate_keyframe_svgs(animation_data)
+        
+        logger.info(
+            f"Optimized to {len(animation_data.get('keyframes', []))} frames"
+        )
+    
+    def _complete_event(
+        self,
+        animation_data: Dict[str, Any],
+        story_analysis: StoryAnalysis,
+        interpolate: bool,
+        start_time: float,
+        llm_calls: int,
+        session_id: str,
+        cache_hits: Dict[str, bool]
+    ) -> Dict[str, Any]:
+        """记录成功统计并构建 complete 事件"""
+        elapsed_ms = (time.time() - start_time) * 1000
+        with self._stats_lock:
             self.stats["successful"] += 1
             self.stats["total_time_ms"] += elapsed_ms
             self.stats["avg_time_ms"] = self.stats["total_time_ms"] / self.stats["successful"]
             self.stats["llm_calls_total"] += llm_calls
-            
-            logger.info(
-                f"Generation complete in {elapsed_ms:.0f}ms "
-                f"({llm_calls} LLM calls)"
-            )
-            
-            # 将 debug_session_id 添加到动画数据中
-            animation_data["debug_session_id"] = session_id
-            
-            result = {
-                "success": True,
-                "data": animation_data,
-                "metadata": {
-                    "dof_level": self.dof_level,
-                    "generation_time_ms": elapsed_ms,
-                    "keyframes_generated": len(animation_data.get("keyframes", [])),
-                    "llm_calls": llm_calls,
-                    "generation_method": animation_data.get("generation_method"),
-                    "optimization_enabled": self.enable_optimization,
-                    "story_analysis": story_analysis.to_dict(),
-                    "debug_session_id": session_id
-                }
+        
+        logger.info(
+            f"Generation complete in {elapsed_ms:.0f}ms "
+            f"({llm_calls} LLM calls)"
+        )
+        
+        # 将 debug_session_id 添加到动画数据中（浅拷贝：animation_data 可能是只读的缓存数据）
+        animation_data = {**animation_data, "debug_session_id": session_id}
+        
+        result = {
+            "success": True,
+            "data": animation_data,
+            "metadata": {
+                "dof_level": self.dof_level,
+                "generation_time_ms": elapsed_ms,
+                "keyframes_generated": len(animation_data.get("keyframes", [])),
+                "llm_calls": llm_calls,
+                "generation_method": animation_data.get("generation_method"),
+                "optimization_enabled": self.enable_optimization,
+                "interpolated": self.enable_optimization and interpolate,
+                "story_analysis": story_analysis.to_dict(),
+                "stage_cache_hits": cache_hits,
+                "debug_session_id": session_id
             }
-            
-            self.debug_logger.log_final_output(animation_data, result["metadata"])
-            self.debug_logger.end_session()
-            
-            return result
-            
-        except Exception as e:
+        }
+        
+        self.debug_logger.log_final_output(animation_data, result["metadata"])
+        self.debug_logger.end_session()
+        
+        return {"event": "complete", "data": result}
+    
+    def _abandon(self, session_id: str):
+        """消费方中途放弃时的统计与清理"""
+        with self._stats_lock:
             self.stats["failed"] += 1
-            elapsed_ms = (time.time() - start_time) * 1000
-            
-            logger.error(f"Animation generation failed: {str(e)}", exc_info=True)
-            
-            self.debug_logger.log_error(e, "Animation Generation")
-            self.debug_logger.end_session()
-            
-            return {
+        logger.warning(f"Animation generation abandoned by consumer (session: {session_id})")
+        self.debug_logger.end_session()
+    
+    def _error_event(
+        self,
+        error: Exception,
+        start_time: float,
+        llm_calls: int,
+        session_id: str
+    ) -> Dict[str, Any]:
+        """记录失败统计并构建 error 事件"""
+        with self._stats_lock:
+            self.stats["failed"] += 1
+        elapsed_ms = (time.time() - start_time) * 1000
+        
+        timed_out = isinstance(error, DeadlineExceeded)
+        if timed_out:
+            logger.warning(f"Animation generation abandoned: {str(error)}")
+        else:
+            logger.error(f"Animation generation failed: {str(error)}", exc_info=True)
+        
+        self.debug_logger.log_error(error, "Animation Generation")
+        self.debug_logger.end_session()
+        
+        cause = _root_cause(error)
+        return {
+            "event": "error",
+            "data": {
                 "success": False,
-                "error": str(e),
+                "error": str(error),
+                "error_type": type(cause).__name__,
+                "retryable": _is_retryable(cause),
+                "timed_out": timed_out,
                 "metadata": {
                     "dof_level": self.dof_level,
                     "generation_time_ms": elapsed_ms,
@@ -171,10 +588,12 @@ class AnimationPipelineV2:
                     "debug_session_id": session_id
                 }
             }
+        }
     
     def get_stats(self) -> Dict[str, Any]:
         """获取流水线统计数据"""
-        stats = self.stats.copy()
+        with self._stats_lock:
+            stats = self.stats.copy()
         
         if stats["total_requests"] > 0:
             stats["avg_llm_calls"] = stats["llm_calls_total"] / stats["total_requests"]
@@ -185,14 +604,18 @@ class AnimationPipelineV2:
     
     def reset_stats(self):
         """重置统计数据"""
-        self.stats = {
-            "total_requests": 0,
-            "successful": 0,
-            "failed": 0,
-            "avg_time_ms": 0,
-            "total_time_ms": 0,
-            "llm_calls_total": 0,
-            "template_generations": 0,
-            "llm_generations": 0
-        }
+        with self._stats_lock:
+            self.stats = {
+                "total_requests": 0,
+                "successful": 0,
+                "failed": 0,
+                "avg_time_ms": 0,
+                "total_time_ms": 0,
+                "llm_calls_total": 0,
+                "template_generations": 0,
+                "llm_generations": 0,
+                "analysis_cache_hits": 0,
+                "keyframes_cache_hits": 0,
+                "frames_cache_hits": 0
+            }
         logger.info("Pipeline stats reset")
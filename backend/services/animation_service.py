@@ -0,0 +1,580 @@
+"""
+Animation Service - 缓存感知的生成入口
+
+职责:
+1. 按 dof_level 管理流水线实例
+2. 在流水线之前查询 / 之后写入动画缓存
+3. 合并相同故事的并发请求（single-flight），只执行一次流水线
+4. 批量生成：去重后以有限并发执行
+5. 供同步路由与后台任务共用同一生成路径
+6. 过期缓存（超过软TTL）先返回旧结果，同时在后台重新生成一次
+7. 记录热点故事 / 动作类型（Space-Saving 近似 top-K）
+8. 失败结果短期缓存（负缓存）：相同的失败请求在 TTL 内直接返回原错误，不再调用LLM
+
+Author: Shenzhen Wang & AI
+License: MIT
+"""
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Iterator, AsyncIterator
+from .animation_pipeline import AnimationPipelineV2, FINAL_EVENTS
+from .templates import TEMPLATE_REGISTRY
+from backend.cache_service import (
+    AnimationCache, Flight, SingleFlight, get_animation_cache, get_negative_cache, with_fields
+)
+from backend.hot_keys import HotKeyTracker, get_hot_key_tracker
+from backend.utils.http_cache import generate_body, is_current, precompress_json
+from backend.utils.deadline import Deadline
+from backend.utils.frozen import freeze
+from backend.utils.blocking import run_blocking
+
+logger = logging.getLogger(__name__)
+
+
+class AnimationService:
+    """动画生成服务 - 流水线 + 缓存"""
+
+    def __init__(
+        self,
+        pipelines: Optional[Dict[str, AnimationPipelineV2]] = None,
+        cache: Optional[AnimationCache] = None,
+        batch_concurrency: int = 4,
+        refresh_workers: int = 2,
+        hot_keys: Optional[HotKeyTracker] = None,
+        negative_cache: Optional[AnimationCache] = None
+    ):
+        """
+        初始化服务
+
+        Args:
+            pipelines: 预先创建的流水线 {dof_level: pipeline}，缺失的按需创建
+            cache: 动画缓存实例
+            batch_concurrency: 批量生成时默认的并发流水线数
+            refresh_workers: 后台刷新过期缓存的线程数
+            hot_keys: 热点统计实例
+            negative_cache: 失败结果缓存，默认使用全局的 get_negative_cache()（可能为 None，即不启用）
+        """
+        self.pipelines = pipelines if pipelines is not None else {}
+        self.cache = cache or get_animation_cache()
+        self.hot_keys = hot_keys or get_hot_key_tracker()
+        self.negative_cache = negative_cache if negative_cache is not None else get_negative_cache()
+        self.batch_concurrency = batch_concurrency
+        self.flights = SingleFlight()
+        self._pipelines_lock = threading.Lock()
+        self._refresh_executor = ThreadPoolExecutor(
+            max_workers=refresh_workers,
+            thread_name_prefix="cache-refresh"
+        )
+        self._stats_lock = threading.Lock()
+        self.stale_refreshes = 0
+
+    def get_pipeline(self, dof_level: str = "12dof") -> AnimationPipelineV2:
+        """获取（必要时创建）指定自由度的流水线"""
+        pipeline = self.pipelines.get(dof_level)
+        if pipeline is not None:
+            return pipeline
+
+        with self._pipelines_lock:
+            if dof_level not in self.pipelines:
+                logger.info(f"Creating pipeline for {dof_level}")
+                self.pipelines[dof_level] = AnimationPipelineV2(
+                    dof_level=dof_level,
+                    enable_optimization=True
+                )
+            return self.pipelines[dof_level]
+
+    def preload(self, dof_levels: List[str]):
+        """
+        预先创建流水线（生产环境在 fork 之前调用，子进程写时复制共享）
+
+        Args:
+            dof_levels: 需要创建的自由度列表
+        """
+        for dof_level in dof_levels:
+            self.get_pipeline(dof_level)
+        logger.info(f"Pipelines preloaded: {list(self.pipelines.keys())}")
+
+    def generate(
+        self,
+        story: str,
+        dof_level: str = "12dof",
+        use_cache: bool = True,
+        interpolate: bool = True,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """
+        生成动画（优先读取缓存）
+
+        Args:
+            story: 已清洗的故事文本
+            dof_level: 骨骼自由度
+            use_cache: 是否读写缓存（包括流水线各级缓存）
+            interpolate: 是否在服务端插值（False 时只返回关键帧）
+            deadline: 请求截止时间，超时返回 timed_out 的失败结果
+
+        Returns:
+            流水线结果字典，附加 cached 字段
+        """
+        for event in self.generate_stream(story, dof_level, use_cache, interpolate, deadline):
+            if event["event"] in FINAL_EVENTS:
+                return event["data"]
+
+    async def agenerate(
+        self,
+        story: str,
+        dof_level: str = "12dof",
+        use_cache: bool = True,
+        interpolate: bool = True,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """generate 的异步版本（ASGI 入口使用）"""
+        async for event in self.agenerate_stream(story, dof_level, use_cache, interpolate, deadline):
+            if event["event"] in FINAL_EVENTS:
+                return event["data"]
+
+    def generate_stream(
+        self,
+        story: str,
+        dof_level: str = "12dof",
+        use_cache: bool = True,
+        interpolate: bool = True,
+        deadline: Optional[Deadline] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        流式生成动画，事件格式同 AnimationPipelineV2.generate_stream
+
+        启用缓存时成功结果另带 encoded_response（预先序列化并压缩的 HTTP 响应体）。
+        缓存命中时只产出一个 complete 事件；命中的条目已过软TTL时照常返回，
+        并在后台重新生成。相同请求最近失败过（负缓存命中）时只产出 error 事件，
+        其结果带 negative_cached 与原错误。相同故事已在生成中时，等待其结果
+        并只产出终止事件。终止事件的结果附加 cached / coalesced 字段。
+        """
+        cached_event = self._cached_event(story, dof_level, use_cache, interpolate)
+        if cached_event:
+            yield cached_event
+            return
+        
+        negative_event = self._negative_event(story, dof_level, use_cache, interpolate)
+        if negative_event:
+            yield negative_event
+            return
+
+        flight_key = self.cache.make_key(story, dof_level=dof_level, interpolate=interpolate)
+        flight, is_leader = self.flights.acquire(flight_key)
+
+        if not is_leader:
+            logger.info("Identical generation in flight, waiting for its result")
+            try:
+                result = flight.wait(timeout=_remaining(deadline))
+            except TimeoutError:
+                yield self._timeout_event(deadline)
+                return
+            yield self._coalesced_event(result)
+            return
+
+        yield from self._lead_stream(story, dof_level, use_cache, interpolate, deadline, flight_key, flight)
+    
+    def _lead_stream(
+        self,
+        story: str,
+        dof_level: str,
+        use_cache: bool,
+        interpolate: bool,
+        deadline: Optional[Deadline],
+        flight_key: str,
+        flight: Flight,
+        refresh: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        领头请求执行流水线并在结束时释放 flight
+        
+        refresh=True 用于后台刷新：跳过流水线各级缓存重新生成，结果写回动画缓存。
+        """
+        released = False
+        try:
+            for event in self.get_pipeline(dof_level).generate_stream(
+                story, interpolate=interpolate, deadline=deadline, use_cache=use_cache and not refresh
+            ):
+                if event["event"] in FINAL_EVENTS:
+                    event = self._finish(
+                        event, story, dof_level, use_cache or refresh, interpolate, flight_key, flight
+                    )
+                    released = True
+                yield event
+        except BaseException as e:
+            if not released:
+                self._abandon(flight_key, flight, e)
+            raise
+
+    async def agenerate_stream(
+        self,
+        story: str,
+        dof_level: str = "12dof",
+        use_cache: bool = True,
+        interpolate: bool = True,
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        generate_stream 的异步版本
+
+        与同步路径共用缓存与 single-flight：等待中的相同请求不占用线程，
+        无论领头请求运行在工作线程还是事件循环中。缓存读写与响应体压缩
+        在线程池中执行，不阻塞事件循环。
+        """
+        cached_event = await run_blocking(self._cached_event, story, dof_level, use_cache, interpolate)
+        if cached_event:
+            yield cached_event
+            return
+        
+        negative_event = await run_blocking(self._negative_event, story, dof_level, use_cache, interpolate)
+        if negative_event:
+            yield negative_event
+            return
+
+        flight_key = self.cache.make_key(story, dof_level=dof_level, interpolate=interpolate)
+        flight, is_leader = self.flights.acquire(flight_key)
+
+        if not is_leader:
+            logger.info("Identical generation in flight, waiting for its result")
+            try:
+                result = await flight.wait_async(timeout=_remaining(deadline))
+            except TimeoutError:
+                yield self._timeout_event(deadline)
+                return
+            yield self._coalesced_event(result)
+            return
+
+        released = False
+        try:
+            async for event in self.get_pipeline(dof_level).agenerate_stream(
+                story, interpolate=interpolate, deadline=deadline, use_cache=use_cache
+            ):
+                if event["event"] in FINAL_EVENTS:
+                    # 线程中的 _finish 总会释放 flight（取消不会中断它），先置位避免重复释放
+                    released = True
+                    event = await run_blocking(
+                        self._finish, event, story, dof_level, use_cache, interpolate, flight_key, flight
+                    )
+                yield event
+        except BaseException as e:
+            if not released:
+                self._abandon(flight_key, flight, e)
+            raise
+
+    def animation_key(self, story: str, dof_level: str = "12dof", interpolate: bool = True) -> str:
+        """动画缓存键（GET /api/animations/<key> 据此读取缓存的结果）"""
+        return self.cache.make_key(story, dof_level=dof_level, interpolate=interpolate)
+
+    def cached_result(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        按缓存键读取缓存的成功结果（不触发生成，也不刷新过期条目）
+
+        Returns:
+            附加 cached / coalesced 字段的结果，未缓存或响应体为旧版本时为 None
+        """
+        entry = self.cache.get_entry_by_key(key)
+        if not entry or not is_current(entry[0].get("encoded_response")):
+            return None
+        return with_fields(entry[0], cached=True, coalesced=False)
+
+    def _cached_event(
+        self,
+        story: str,
+        dof_level: str,
+        use_cache: bool,
+        interpolate: bool
+    ) -> Optional[Dict[str, Any]]:
+        """缓存命中时返回 complete 事件（过期条目同时触发后台刷新），否则返回 None"""
+        label = self.hot_keys.story_label(story, dof_level)
+        self.hot_keys.record("requests", label)
+        self.hot_keys.record("dof_levels", dof_level)
+        
+        entry = self.cache.get_entry(story, dof_level=dof_level, interpolate=interpolate) if use_cache else None
+        if entry and not is_current(entry[0].get("encoded_response")):
+            # 旧版本写入的响应体（持久化缓存中）：按未命中处理，重新生成后覆盖
+            entry = None
+        if not entry:
+            self.hot_keys.record("misses", label)
+            return None
+        cached_result, stale = entry
+        if stale:
+            self._refresh(story, dof_level, interpolate)
+        # 压缩存储的条目保持惰性解压：只读取 encoded_response 的 JSON 命中无需解压
+        return {"event": "complete", "data": with_fields(cached_result, cached=True, coalesced=False)}
+    
+    def _negative_event(
+        self,
+        story: str,
+        dof_level: str,
+        use_cache: bool,
+        interpolate: bool
+    ) -> Optional[Dict[str, Any]]:
+        """相同请求在负缓存 TTL 内失败过时返回 error 事件（原错误及原因），否则返回 None"""
+        if not use_cache or self.negative_cache is None:
+            return None
+        failure = self.negative_cache.get(story, dof_level=dof_level, interpolate=interpolate)
+        if failure is None:
+            return None
+        
+        logger.info(f"Negative cache hit, failing fast: {failure['error']}")
+        retry_after = max(0.0, failure["failed_at"] + self.negative_cache.ttl_seconds - time.time())
+        return {
+            "event": "error",
+            "data": {
+                **failure,
+                "success": False,
+                "timed_out": False,
+                "negative_cached": True,
+                "retry_after": retry_after,
+                "cached": True,
+                "coalesced": False
+            }
+        }
+    
+    def _refresh(self, story: str, dof_level: str, interpolate: bool):
+        """在后台重新生成过期条目；同一故事已在生成中时不重复提交"""
+        flight_key = self.cache.make_key(story, dof_level=dof_level, interpolate=interpolate)
+        flight = self.flights.try_acquire(flight_key)
+        if flight is None:
+            return
+        
+        with self._stats_lock:
+            self.stale_refreshes += 1
+        logger.info("Serving stale cache entry, refreshing in background")
+        try:
+            self._refresh_executor.submit(
+                self._run_refresh, story, dof_level, interpolate, flight_key, flight
+            )
+        except RuntimeError as e:
+            # 执行器已关闭（进程退出中）
+            self._abandon(flight_key, flight, e)
+    
+    def _run_refresh(self, story: str, dof_level: str, interpolate: bool, flight_key: str, flight: Flight):
+        try:
+            for event in self._lead_stream(
+                story, dof_level, True, interpolate, None, flight_key, flight, refresh=True
+            ):
+                if event["event"] == "error":
+                    logger.warning(f"Background cache refresh failed: {event['data'].get('error')}")
+        except Exception as e:
+            logger.error(f"Background cache refresh failed: {str(e)}", exc_info=True)
+
+    def _coalesced_event(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """等待者收到的终止事件"""
+        event_name = "complete" if result["success"] else "error"
+        return {"event": event_name, "data": {**result, "cached": False, "coalesced": True}}
+
+    def _timeout_event(self, deadline: Deadline) -> Dict[str, Any]:
+        """等待相同请求的结果时超过了自己的截止时间"""
+        return {
+            "event": "error",
+            "data": {
+                "success": False,
+                "error": f"Deadline of {deadline.seconds:g}s exceeded waiting for an identical generation",
+                "timed_out": True,
+                "cached": False,
+                "coalesced": True
+            }
+        }
+
+    def _finish(
+        self,
+        event: Dict[str, Any],
+        story: str,
+        dof_level: str,
+        use_cache: bool,
+        interpolate: bool,
+        flight_key: str,
+        flight: Flight
+    ) -> Dict[str, Any]:
+        """
+        领头请求拿到终止事件：写缓存、唤醒等待者，返回交给自己消费方的事件
+
+        成功结果冻结为只读数据后写入缓存并交给所有请求共享，不再需要防御性深拷贝。
+        写缓存时一次性完成响应体的序列化与压缩（encoded_response），
+        领头请求、等待者与之后的缓存命中都直接发送这份字节。
+        """
+        result = event["data"]
+        if result["success"]:
+            self._record_generation(story, dof_level, result["metadata"])
+        if result["success"] and use_cache:
+            result = freeze({**result, "encoded_response": precompress_json(generate_body(result))})
+            self.cache.put(story, result, dof_level=dof_level, interpolate=interpolate)
+        elif result["success"]:
+            result = freeze(result)
+        elif self._negative_cacheable(result, use_cache):
+            self.negative_cache.put(story, {
+                "error": result["error"],
+                "error_type": result.get("error_type"),
+                "failed_at": time.time()
+            }, dof_level=dof_level, interpolate=interpolate)
+        # 先唤醒等待者，再把终止事件交给自己的消费方
+        self.flights.release(flight_key, flight, result=result)
+        return {"event": event["event"], "data": {**result, "cached": False, "coalesced": False}}
+
+    def _negative_cacheable(self, result: Dict[str, Any], use_cache: bool) -> bool:
+        """
+        失败结果是否写入负缓存
+
+        只缓存请求本身导致的失败（解析、校验失败与不可重试的LLM错误）。
+        超时取决于调用方的截止时间；限流、5xx、连接错误等重试用尽后的失败
+        是暂时的，稍后重试可能成功，都不缓存。
+        """
+        return (
+            use_cache
+            and self.negative_cache is not None
+            and not result["timed_out"]
+            and not result.get("retryable", False)
+        )
+
+    def _record_generation(self, story: str, dof_level: str, metadata: Dict[str, Any]):
+        """热点统计：本次生成的LLM调用次数与动作类型"""
+        if metadata.get("llm_calls"):
+            self.hot_keys.record("llm_calls", self.hot_keys.story_label(story, dof_level), metadata["llm_calls"])
+        
+        llm_generated = metadata.get("generation_method") == "llm_batch"
+        for action in metadata.get("story_analysis", {}).get("key_actions", []):
+            self.hot_keys.record("action_types", action["type"])
+            if llm_generated and not TEMPLATE_REGISTRY.has(action["type"]):
+                self.hot_keys.record("untemplated_actions", action["type"])
+    
+    def _abandon(self, flight_key: str, flight: Flight, error: BaseException):
+        """领头请求未产出结果就结束时，把错误交给等待者"""
+        if not isinstance(error, Exception):
+            error = RuntimeError("In-flight generation was abandoned")
+        self.flights.release(flight_key, flight, error=error)
+
+    def generate_batch(
+        self,
+        items: List[Dict[str, Any]],
+        max_concurrency: Optional[int] = None,
+        deadline: Optional[Deadline] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        批量生成动画
+
+        相同故事 + dof_level 只生成一次；每个条目仍走缓存与 single-flight，
+        整批耗时接近最慢的单个条目。
+
+        Args:
+            items: 已校验的参数列表 [{"story", "dof_level", "use_cache"}]
+            max_concurrency: 并发流水线数（不超过 batch_concurrency）
+            deadline: 整批共用的截止时间
+
+        Returns:
+            与 items 一一对应的结果字典列表
+        """
+        keys, unique = self._dedupe(items)
+
+        limit = self.batch_concurrency
+        if isinstance(max_concurrency, int) and not isinstance(max_concurrency, bool) and max_concurrency > 0:
+            limit = min(limit, max_concurrency)
+        limit = min(limit, len(unique)) or 1
+        logger.info(
+            f"Batch generation: {len(items)} items, {len(unique)} unique, concurrency={limit}"
+        )
+
+        results: Dict[str, Dict[str, Any]] = {}
+        with ThreadPoolExecutor(max_workers=limit, thread_name_prefix="batch-worker") as executor:
+            futures = {key: executor.submit(self.generate, **item, deadline=deadline) for key, item in unique.items()}
+            for key, future in futures.items():
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    logger.error(f"Batch item failed: {str(e)}", exc_info=True)
+                    results[key] = {"success": False, "error": str(e), "cached": False, "coalesced": False}
+
+        return [results[key] for key in keys]
+
+    def count_uncached(self, items: List[Dict[str, Any]]) -> int:
+        """
+        批量请求中需要执行流水线的条目数（去重后未命中缓存的条目，用于限流计费）
+
+        不计入缓存命中统计，也不刷新 LRU 顺序。
+        """
+        _, unique = self._dedupe(items)
+        return sum(
+            1 for item in unique.values()
+            if not item.get("use_cache", True) or not self.cache.contains(
+                item["story"], dof_level=item["dof_level"], interpolate=item.get("interpolate", True)
+            )
+        )
+
+    def _dedupe(self, items: List[Dict[str, Any]]):
+        """批量条目按缓存键去重，返回 (每个条目的键, {键: 首个条目})"""
+        keys = []
+        unique: Dict[str, Dict[str, Any]] = {}
+        for item in items:
+            key = self.cache.make_key(
+                item["story"],
+                dof_level=item["dof_level"],
+                interpolate=item.get("interpolate", True)
+            )
+            keys.append(key)
+            unique.setdefault(key, item)
+        return keys, unique
+
+    def interpolate(
+        self,
+        animation_data: Dict[str, Any],
+        dof_level: str = "12dof",
+        target_fps: int = 30
+    ) -> Dict[str, Any]:
+        """
+        按需对关键帧做服务端插值（不调用LLM）
+
+        Args:
+            animation_data: 含 keyframes 的动画数据（如关键帧模式的返回结果）
+            dof_level: 骨骼自由度
+            target_fps: 目标帧率
+
+        Returns:
+            插值后的动画数据（新字典，不修改入参）
+        """
+        optimizer = self.get_pipeline(dof_level).animation_optimizer
+        return optimizer.optimize(
+            {**animation_data, "keyframes": list(animation_data.get("keyframes", []))},
+            auto_fix=True,
+            interpolate=True,
+            target_fps=target_fps
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取服务统计数据"""
+        stage_caches = {}
+        for pipeline in list(self.pipelines.values()):
+            for stage, cache in pipeline.stage_caches.items():
+                stage_caches.setdefault(stage, cache)
+        with self._stats_lock:
+            stale_refreshes = self.stale_refreshes
+        return {
+            "coalescing": self.flights.get_stats(),
+            "cache": self.cache.get_stats(),
+            "stale_refreshes": stale_refreshes,
+            "negative_cache": self.negative_cache.get_stats() if self.negative_cache is not None else None,
+            "template_memo": TEMPLATE_REGISTRY.get_stats(),
+            "stage_caches": {stage: cache.get_stats() for stage, cache in stage_caches.items()}
+        }
+
+
+def _remaining(deadline: Optional[Deadline]) -> Optional[float]:
+    """等待超时（秒）；无截止时间时为 None（一直等待）"""
+    return None if deadline is None else max(0.0, deadline.remaining())
+
+
+# 全局单例：流水线的唯一来源
+_animation_service: Optional[AnimationService] = None
+
+
+def get_animation_service() -> AnimationService:
+    """获取或创建动画服务单例"""
+    global _animation_service
+    if _animation_service is None:
+        _animation_service = AnimationService(
+            batch_concurrency=int(os.getenv("BATCH_MAX_CONCURRENCY", "4")),
+            refresh_workers=int(os.getenv("CACHE_REFRESH_WORKERS", "2"))
+        )
+    return _animation_service
@@ -13,10 +13,12 @@ Author: Shenzhen Wang & AI
 License: MIT
 """
 import json
+import hashlib
 import logging
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from backend.llm_client import LLMClient, get_llm_client
+from backend.utils.deadline import Deadline, DeadlineExceeded
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +62,21 @@ class StoryAnalysis:
             "key_actions": [a.to_dict() for a in self.key_actions],
             "duration_estimate": self.duration_estimate
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StoryAnalysis":
+        """从 to_dict() 的结果重建（用于缓存）"""
+        return cls(
+            story_intent=data["story_intent"],
+            characters=[Character(**c) for c in data["characters"]],
+            key_actions=[KeyAction(**a) for a in data["key_actions"]],
+            duration_estimate=data["duration_estimate"]
+        )
+    
+    def fingerprint(self) -> str:
+        """规范化 JSON 的 SHA256，语义相同的分析结果得到相同的值"""
+        canonical = json.dumps(self.to_dict(), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
 
 
 class StoryAnalyzer:
@@ -76,50 +93,91 @@ class StoryAnalyzer:
         self.max_tokens = self.llm_client.get_service_max_tokens('story_planner')
         logger.info(f"Story Analyzer V2 initialized (max_tokens={self.max_tokens})")
     
-    def analyze(self, story: str) -> StoryAnalysis:
+    def analyze(self, story: str, deadline: Optional[Deadline] = None) -> StoryAnalysis:
         """
         分析故事，提取结构化信息
         
         Args:
             story: 用户输入的故事文本
+            deadline: 请求截止时间（传给LLM调用）
             
         Returns:
             StoryAnalysis 对象
             
         Raises:
+            DeadlineExceeded: 截止时间已过
             Exception: LLM调用失败或解析失败
         """
-        prompt = self._build_prompt(story)
-        
         try:
-            messages = [
-                {"role": "system", "content": self._get_system_prompt()},
-                {"role": "user", "content": prompt}
-            ]
-            
             logger.info("Analyzing story with LLM...")
             response = self.llm_client.completion(
-                messages=messages,
+                messages=self._build_messages(story),
                 max_tokens=self.max_tokens,
-                response_format={"type": "json_object"}
+                response_format={"type": "json_object"},
+                deadline=deadline,
+                service='story_planner'
             )
+            return self._parse_response(response)
             
-            content = response.choices[0].message.content
-            
-            # 处理可能的markdown包裹
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Story analysis failed: {str(e)}")
+            raise Exception(f"Failed to analyze story: {str(e)}") from e
+    
+    async def aanalyze(self, story: str, deadline: Optional[Deadline] = None) -> StoryAnalysis:
+        """
+        analyze 的异步版本（使用 LLMClient.acompletion）
+        
+        Args:
+            story: 用户输入的故事文本
+            deadline: 请求截止时间（传给LLM调用）
             
-            result = json.loads(content)
-            logger.info(f"Story analysis complete: {len(result.get('key_actions', []))} actions")
+        Returns:
+            StoryAnalysis 对象
             
-            return self._parse_result(result)
+        Raises:
+            DeadlineExceeded: 截止时间已过
+            Exception: LLM调用失败或解析失败
+        """
+        try:
+            logger.info("Analyzing story with LLM (async)...")
+            response = await self.llm_client.acompletion(
+                messages=self._build_messages(story),
+                max_tokens=self.max_tokens,
+                response_format={"type": "json_object"},
+                deadline=deadline,
+                service='story_planner'
+            )
+            return self._parse_response(response)
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Story analysis failed: {str(e)}")
-            raise Exception(f"Failed to analyze story: {str(e)}")
+            raise Exception(f"Failed to analyze story: {str(e)}") from e
+    
+    def _build_messages(self, story: str) -> List[Dict[str, str]]:
+        """构建LLM消息列表"""
+        return [
+            {"role": "system", "content": self._get_system_prompt()},
+            {"role": "user", "content": self._build_prompt(story)}
+        ]
+    
+    def _parse_response(self, response: Any) -> StoryAnalysis:
+        """从LLM响应中提取JSON并解析"""
+        content = response.choices[0].message.content
+        
+        # 处理可能的markdown包裹
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0].strip()
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0].strip()
+        
+        result = json.loads(content)
+        logger.info(f"Story analysis complete: {len(result.get('key_actions', []))} actions")
+        
+        return self._parse_result(result)
     
     def _get_system_prompt(self) -> str:
         """系统提示词"""
@@ -1,6 +1,7 @@
 """
 模板初始化
 """
+import os
 from .template_engine import TEMPLATE_REGISTRY
 from .actions.walk import WalkTemplate
 from .actions.wave import WaveTemplate
@@ -8,7 +9,8 @@ from .actions.bow import BowTemplate
 
 # 注册所有模板
 def register_all_templates(dof_level: str = "12dof"):
-    """注册所有预定义模板"""
+    """注册所有预定义模板（在配置加载后调用，读取 TEMPLATE_MEMO_SIZE）"""
+    TEMPLATE_REGISTRY.memo_size = int(os.getenv("TEMPLATE_MEMO_SIZE", "256"))
     TEMPLATE_REGISTRY.register("walk", WalkTemplate(dof_level))
     TEMPLATE_REGISTRY.register("wave", WaveTemplate(dof_level))
     TEMPLATE_REGISTRY.register("bow", BowTemplate(dof_level))
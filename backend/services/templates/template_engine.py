@@ -12,9 +12,13 @@ Author: Shenzhen Wang & AI
 License: MIT
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
+from collections import OrderedDict
+import json
 import math
+import threading
+from backend.utils.frozen import freeze, thaw
 
 
 @dataclass
@@ -136,10 +140,28 @@ class ActionTemplate(ABC):
 
 
 class TemplateRegistry:
-    """模板注册表"""
+    """
+    模板注册表
     
-    def __init__(self):
+    模板生成是 (动作类型, 角色id, 参数, dof) 的纯函数，generate() 按此缓存结果
+    （有上限的LRU）。缓存的关键帧以 freeze() 冻结为只读数据；每次调用返回
+    thaw() 得到的可修改副本（时间戳已平移），后续阶段（如 AnimationOptimizer
+    的自动修正）原地修改关节数据不会影响缓存。
+    """
+    
+    def __init__(self, memo_size: int = 256):
+        """
+        初始化注册表
+        
+        Args:
+            memo_size: 最多缓存的 (动作类型, 参数) 组合数，0 为不缓存
+        """
         self.templates: Dict[str, ActionTemplate] = {}
+        self.memo_size = memo_size
+        self._memo: OrderedDict = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self.memo_hits = 0
+        self.memo_misses = 0
     
     def register(self, action_type: str, template: ActionTemplate):
         """
@@ -183,6 +205,80 @@ class TemplateRegistry:
             类型列表
         """
         return list(self.templates.keys())
+    
+    def generate(
+        self,
+        action_type: str,
+        character: Dict[str, Any],
+        params: Dict[str, Any],
+        offset_ms: int = 0
+    ) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """
+        用模板生成关键帧（带缓存）
+        
+        Args:
+            action_type: 动作类型
+            character: 角色信息（模板只使用 id）
+            params: 动作参数
+            offset_ms: 动作起始时间，加到每个关键帧的时间戳上
+            
+        Returns:
+            (关键帧字典列表, 动作时长ms)；没有该类型的模板时返回 None
+        """
+        template = self.templates.get(action_type)
+        if template is None:
+            return None
+        
+        key = (
+            action_type,
+            template.dof_level,
+            character["id"],
+            json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+        )
+        with self._memo_lock:
+            entry = self._memo.get(key)
+            if entry is not None:
+                self._memo.move_to_end(key)
+                self.memo_hits += 1
+            else:
+                self.memo_misses += 1
+        
+        if entry is None:
+            entry = (
+                freeze([kf.to_dict() for kf in template.generate(character, params)]),
+                template.get_duration(params)
+            )
+            if self.memo_size > 0:
+                with self._memo_lock:
+                    self._memo[key] = entry
+                    while len(self._memo) > self.memo_size:
+                        self._memo.popitem(last=False)
+        
+        frozen, duration = entry
+        keyframes = thaw(frozen)
+        for kf in keyframes:
+            kf["timestamp_ms"] += offset_ms
+        return keyframes, duration
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """模板缓存统计"""
+        with self._memo_lock:
+            total = self.memo_hits + self.memo_misses
+            return {
+                "templates": list(self.templates.keys()),
+                "memo_size": len(self._memo),
+                "memo_max_size": self.memo_size,
+                "hits": self.memo_hits,
+                "misses": self.memo_misses,
+                "hit_rate": self.memo_hits / total if total > 0 else 0
+            }
+    
+    def clear_memo(self):
+        """清空模板缓存（模板实现或画布参数变化时）"""
+        with self._memo_lock:
+            self._memo.clear()
+            self.memo_hits = 0
+            self.memo_misses = 0
 
 
 # 全局注册表
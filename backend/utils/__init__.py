@@ -8,6 +8,6 @@ License: MIT
 """
 
 from .version import get_version
-from .response import success_response, error_response
+from .response import success_response, error_response, sse_event
 
-__all__ = ['get_version', 'success_response', 'error_response']
+__all__ = ['get_version', 'success_response', 'error_response', 'sse_event']
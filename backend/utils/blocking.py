@@ -0,0 +1,46 @@
+"""
+Blocking Calls from Async Code
+
+The async pipeline still has blocking steps between its LLM calls:
+stage-cache reads and writes (SQLite), debug-log and SVG files, and the
+CPU-bound Level 3 interpolation. run_blocking() moves such a call to the
+event loop's default executor so other requests keep being served.
+
+The call runs in a copy of the caller's contextvars context, as with
+asyncio.to_thread(). Unlike to_thread, variables the call sets are
+copied back into the caller's context afterwards: the debug logger
+keeps its per-request session in context variables, and a session
+started in the worker thread must stay visible to the request.
+
+Author: Shenzhen Wang & AI
+License: MIT
+"""
+import asyncio
+import contextvars
+import functools
+from typing import Any, Callable, TypeVar
+
+T = TypeVar('T')
+
+_UNSET = object()
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking call in the default executor
+
+    Args:
+        func: Blocking callable
+        *args, **kwargs: Its arguments
+
+    Returns:
+        The call's return value (its exception is re-raised)
+    """
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, call)
+    finally:
+        for var, value in context.items():
+            if var.get(_UNSET) is not value:
+                var.set(value)
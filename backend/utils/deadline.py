@@ -0,0 +1,84 @@
+"""
+Deadline - End-to-end Time Budget for a Request
+
+A Deadline is created when a request arrives (or a job is queued) and is
+passed down through every pipeline stage. Stages call check() before
+starting work, and LLM attempts take their timeout from the
+remaining time, so a request that has run out of time is abandoned
+instead of holding a worker.
+
+Author: Shenzhen Wang & AI
+License: MIT
+"""
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request runs out of its time budget"""
+
+
+class Deadline:
+    """A point in (monotonic) time by which a request must finish"""
+
+    def __init__(self, seconds: float):
+        """
+        Start a deadline
+
+        Args:
+            seconds: Time budget from now (seconds)
+        """
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def after(cls, seconds: Optional[float]) -> Optional['Deadline']:
+        """Deadline for a budget in seconds; None or <= 0 means no deadline"""
+        if not seconds or seconds <= 0:
+            return None
+        return cls(seconds)
+
+    def remaining(self) -> float:
+        """Seconds left (negative once expired)"""
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, stage: str):
+        """
+        Raise if the budget is used up
+
+        Args:
+            stage: Name of the stage about to start (for the error message)
+
+        Raises:
+            DeadlineExceeded: If the deadline has passed
+        """
+        if self.expired:
+            raise DeadlineExceeded(
+                f"Deadline of {self.seconds:g}s exceeded before {stage}"
+            )
+
+    def llm_timeout(self, timeout: float) -> float:
+        """
+        Fit one LLM attempt into the remaining time
+
+        Retries are not budgeted up front: the client decides after each
+        failure whether the backoff still fits, and every attempt gets
+        its timeout cut to the time left at that point.
+
+        Args:
+            timeout: Configured per-attempt timeout (seconds)
+
+        Returns:
+            Timeout for this attempt
+
+        Raises:
+            DeadlineExceeded: If no time is left
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Deadline of {self.seconds:g}s exceeded before LLM call")
+        return min(timeout, remaining)
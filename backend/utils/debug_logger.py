@@ -8,6 +8,7 @@ License: MIT
 import json
 import os
 import logging
+import contextvars
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 from pathlib import Path
@@ -28,13 +29,33 @@ class DebugLogger:
         """
         self.enabled = enabled
         self.output_dir = output_dir
-        self.current_session_id = None
-        self.session_dir = None
+        # 会话状态按上下文隔离（线程 / asyncio 任务），并发请求互不干扰
+        self._session_id_var = contextvars.ContextVar(f"debug_session_id_{id(self)}", default=None)
+        self._session_dir_var = contextvars.ContextVar(f"debug_session_dir_{id(self)}", default=None)
+        self._llm_calls_var = contextvars.ContextVar(f"debug_llm_calls_{id(self)}", default=None)
         
         if self.enabled:
             self._ensure_output_dir()
             logger.info(f"Debug Logger initialized: output_dir={output_dir}")
     
+    @property
+    def current_session_id(self) -> Optional[str]:
+        """当前上下文的会话ID"""
+        return self._session_id_var.get()
+    
+    @current_session_id.setter
+    def current_session_id(self, value: Optional[str]):
+        self._session_id_var.set(value)
+    
+    @property
+    def session_dir(self) -> Optional[str]:
+        """当前上下文的会话目录"""
+        return self._session_dir_var.get()
+    
+    @session_dir.setter
+    def session_dir(self, value: Optional[str]):
+        self._session_dir_var.set(value)
+    
     def _ensure_output_dir(self):
         """确保输出目录存在"""
         Path(self.output_dir).mkdir(parents=True, exist_ok=True)
@@ -59,6 +80,7 @@ class DebugLogger:
         # 创建会话目录
         self.session_dir = os.path.join(self.output_dir, self.current_session_id)
         Path(self.session_dir).mkdir(parents=True, exist_ok=True)
+        self._llm_calls_var.set([])
         
         # 保存会话元数据
         metadata = {
@@ -114,6 +136,30 @@ class DebugLogger:
         })
         logger.debug(f"Logged custom data: {filename}")
     
+    def log_llm_call(self, call: Dict[str, Any]):
+        """
+        记录一次LLM调用（token 用量、耗时、TTFT），累计写入 04_llm_calls.json
+        
+        Args:
+            call: LLMClient 记录的调用信息
+        """
+        calls = self._llm_calls_var.get()
+        if not self.enabled or not self.session_dir or calls is None:
+            return
+        
+        calls.append({"timestamp": datetime.now().isoformat(), **call})
+        self._save_json("04_llm_calls.json", {
+            "stage": "LLM Calls",
+            "totals": {
+                "calls": len(calls),
+                "latency_seconds": round(sum(c["latency_seconds"] for c in calls), 3),
+                "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+                "completion_tokens": sum(c["completion_tokens"] for c in calls)
+            },
+            "calls": calls
+        })
+        logger.debug(f"Logged LLM call: {call['service']}")
+    
     def log_error(self, error: Exception, stage: str):
         """
         记录错误信息
@@ -661,6 +707,7 @@ class DebugLogger:
         
         self.current_session_id = None
         self.session_dir = None
+        self._llm_calls_var.set(None)
 
 
 # 全局单例
@@ -0,0 +1,167 @@
+"""
+Frame Codec - Columnar Binary Encoding for Interpolated Animations
+
+Stores joint positions as one frames x characters x joints x 2 float32
+block instead of nested per-joint JSON objects.
+
+Layout (little-endian):
+    magic        4 bytes   b'STKF'
+    version      uint8
+    reserved     3 bytes
+    header_len   uint32
+    header       UTF-8 JSON (joint_order, character_ids, frame_count,
+                 texts, and every animation field except keyframes)
+    padding      zero bytes up to a 4-byte boundary
+    timestamps   uint32[frame_count]
+    positions    float32[frame_count * characters * joints * 2]
+
+A joint missing from a frame is stored as NaN. Per-frame descriptions
+(e.g. "插值帧 (t=0.33)") are dropped; frame `text` is kept sparsely in
+the header.
+
+Author: Shenzhen Wang & AI
+License: MIT
+"""
+import json
+import math
+import struct
+import sys
+from array import array
+from typing import Dict, Any, List, Sequence
+
+MAGIC = b'STKF'
+VERSION = 1
+CONTENT_TYPE = 'application/x-stickman-frames'
+
+_PREAMBLE = struct.Struct('<4sB3xI')
+
+
+def _to_little_endian(values: array) -> bytes:
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def encode_columnar(
+    animation_data: Dict[str, Any],
+    joint_order: Sequence[str],
+    extra_header: Dict[str, Any] = None
+) -> bytes:
+    """
+    Encode joint-based (12DOF) animation frames into the columnar format
+
+    Args:
+        animation_data: Animation data with keyframes[].characters[id].joints
+        joint_order: Fixed joint order of the position block
+        extra_header: Additional JSON fields for the header (e.g. metadata)
+
+    Returns:
+        Encoded payload
+    """
+    frames = animation_data.get('keyframes', [])
+    character_ids = [c['id'] for c in animation_data.get('characters', [])]
+    nan = math.nan
+
+    timestamps = array('I', (int(frame.get('timestamp_ms', 0)) for frame in frames))
+    positions = array('f')
+    texts = {}
+
+    for index, frame in enumerate(frames):
+        frame_characters = frame.get('characters', {})
+        for char_id in character_ids:
+            joints = frame_characters.get(char_id, {}).get('joints', {})
+            for joint_name in joint_order:
+                joint = joints.get(joint_name)
+                if joint is None:
+                    positions.extend((nan, nan))
+                else:
+                    positions.extend((joint['x'], joint['y']))
+        if frame.get('text'):
+            texts[str(index)] = frame['text']
+
+    header = {
+        **{k: v for k, v in animation_data.items() if k != 'keyframes'},
+        **(extra_header or {}),
+        'joint_order': list(joint_order),
+        'character_ids': character_ids,
+        'frame_count': len(frames),
+        'texts': texts
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    padding = b'\0' * (-(_PREAMBLE.size + len(header_bytes)) % 4)
+
+    return b''.join((
+        _PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)),
+        header_bytes,
+        padding,
+        _to_little_endian(timestamps),
+        _to_little_endian(positions)
+    ))
+
+
+def decode_columnar(payload: bytes) -> Dict[str, Any]:
+    """
+    Decode a columnar payload back into nested animation data
+
+    Args:
+        payload: Bytes produced by encode_columnar
+
+    Returns:
+        Animation data dict (header fields plus rebuilt keyframes)
+
+    Raises:
+        ValueError: If the payload is not a supported columnar payload
+    """
+    if len(payload) < _PREAMBLE.size:
+        raise ValueError("Payload too short")
+
+    magic, version, header_len = _PREAMBLE.unpack_from(payload)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Unsupported payload: magic={magic!r}, version={version}")
+
+    offset = _PREAMBLE.size
+    header = json.loads(payload[offset:offset + header_len].decode('utf-8'))
+    offset += header_len
+    offset += -offset % 4
+
+    joint_order: List[str] = header.pop('joint_order')
+    character_ids: List[str] = header.pop('character_ids')
+    frame_count: int = header.pop('frame_count')
+    texts: Dict[str, str] = header.pop('texts')
+
+    timestamps = _from_little_endian('I', payload[offset:offset + frame_count * 4])
+    offset += frame_count * 4
+    positions = _from_little_endian('f', payload[offset:])
+    expected = frame_count * len(character_ids) * len(joint_order) * 2
+    if len(timestamps) != frame_count or len(positions) != expected:
+        raise ValueError(f"Truncated payload: {len(positions)} of {expected} positions")
+
+    keyframes = []
+    cursor = 0
+    for index in range(frame_count):
+        characters = {}
+        for char_id in character_ids:
+            joints = {}
+            for joint_name in joint_order:
+                x, y = positions[cursor], positions[cursor + 1]
+                cursor += 2
+                if not math.isnan(x):
+                    joints[joint_name] = {'x': x, 'y': y}
+            characters[char_id] = {'joints': joints}
+
+        frame = {'timestamp_ms': timestamps[index], 'characters': characters}
+        if str(index) in texts:
+            frame['text'] = texts[str(index)]
+        keyframes.append(frame)
+
+    header['keyframes'] = keyframes
+    return header
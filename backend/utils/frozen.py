@@ -0,0 +1,82 @@
+"""
+Frozen Values - Read-only Animation Data Shared Between Requests
+
+Cached results are handed to every request that hits them. freeze()
+converts a result into read-only containers once, when it is written:
+dicts become FrozenDict and lists become tuples. Readers can then share
+the same object without defensive deep copies, and an accidental write
+raises TypeError instead of silently changing the cache.
+
+Frozen values are still plain JSON to json.dumps (FrozenDict is a dict
+subclass, tuples encode as arrays) and can be pickled.
+
+Author: Shenzhen Wang & AI
+License: MIT
+"""
+from typing import Any, Dict, Optional
+
+
+class FrozenDict(dict):
+    """dict that rejects every mutation"""
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Cached animation data is read-only; copy it before modifying")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+    def __copy__(self) -> 'FrozenDict':
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> 'FrozenDict':
+        return self
+
+
+def freeze(value: Any, _memo: Optional[Dict[int, Any]] = None) -> Any:
+    """
+    Read-only copy of nested dicts and lists
+
+    Already frozen parts are reused as-is, and a dict or list reached
+    through several paths (e.g. a keyframe that is also an interpolated
+    frame) is frozen once and shared.
+
+    Args:
+        value: JSON-like data
+
+    Returns:
+        The same data built from FrozenDict and tuples
+    """
+    if isinstance(value, FrozenDict) or not isinstance(value, (dict, list, tuple)):
+        return value
+
+    memo = {} if _memo is None else _memo
+    frozen = memo.get(id(value))
+    if frozen is None:
+        if isinstance(value, dict):
+            frozen = FrozenDict((k, freeze(v, memo)) for k, v in value.items())
+        else:
+            frozen = tuple(freeze(v, memo) for v in value)
+        memo[id(value)] = frozen
+    return frozen
+
+
+def thaw(value: Any) -> Any:
+    """
+    Mutable deep copy of frozen (or plain) data
+
+    Args:
+        value: Data returned by freeze()
+
+    Returns:
+        The same data built from dicts and lists
+    """
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    return value
@@ -0,0 +1,196 @@
+"""
+HTTP Cache Utilities - Pre-serialized, Precompressed Responses
+
+A generated animation is serialized and gzip-compressed once, when the
+pipeline finishes. Every JSON response for it (the generating request,
+coalesced waiters and later cache hits) then only copies bytes: the
+per-request fields (message, cached, coalesced, latency_ms) are
+compressed on their own and appended to the stored deflate stream, so
+all responses share one schema without recompressing the animation.
+
+The ETag is a weak content hash of the animation part of the body. POST
+/api/generate sends it with a Content-Location naming the cached
+animation (GET /api/animations/<key>); clients revalidate there with
+If-None-Match and get 304 while the animation is unchanged. POST itself
+never answers 304 (RFC 7232 section 3.2 allows that for GET and HEAD only).
+
+Clients that do not accept gzip get the stored body decompressed on each
+response, about 1ms per 100KB of JSON. Browsers and common HTTP
+libraries all accept gzip, so no uncompressed copy is kept. Brotli is not
+offered: a brotli stream cannot be extended with the per-request fields.
+
+Author: Shenzhen Wang & AI
+License: MIT
+"""
+import json
+import zlib
+import struct
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from flask import Response, request
+from werkzeug.http import parse_accept_header, parse_etags, quote_etag
+
+GZIP_LEVEL = 9
+
+# Bumped when the stored layout changes; older bodies (e.g. in a SQLite cache) are not served
+BODY_VERSION = 2
+
+
+@dataclass(frozen=True)
+class PrecompressedBody:
+    """
+    The request-independent part of a JSON body, stored gzip-compressed
+
+    `gzip` holds the gzip header and deflate blocks of the body without
+    its closing brace, sync-flushed so more blocks can follow; `crc` and
+    `size` cover the uncompressed bytes for the gzip trailer.
+    """
+    etag: str
+    gzip: bytes
+    crc: int
+    size: int
+    version: int
+
+
+def is_current(payload: Any) -> bool:
+    """Whether a stored body has the current layout (unpickled old ones lack the fields)"""
+    return isinstance(payload, PrecompressedBody) and getattr(payload, 'version', None) == BODY_VERSION
+
+
+def generate_body(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Request-independent fields of a successful POST /api/generate response
+
+    Args:
+        result: Successful AnimationService result
+
+    Returns:
+        JSON-serializable body fields (see generate_fields for the rest)
+    """
+    return {
+        'success': True,
+        'data': result['data'],
+        'metadata': result.get('metadata')
+    }
+
+
+def generate_fields(result: Dict[str, Any], latency_ms: float) -> Dict[str, Any]:
+    """Per-request fields of a successful POST /api/generate response"""
+    return {
+        'message': 'Cached' if result['cached'] else 'Success',
+        'cached': result['cached'],
+        'coalesced': result['coalesced'],
+        'latency_ms': latency_ms
+    }
+
+
+def precompress_json(body: Dict[str, Any]) -> PrecompressedBody:
+    """
+    Serialize and compress the request-independent part of a JSON body once
+
+    Args:
+        body: JSON-serializable object with at least one field
+
+    Returns:
+        PrecompressedBody to complete with render_json / negotiate
+    """
+    raw = _dumps(body)[:-1]  # without the closing brace
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return PrecompressedBody(
+        etag=hashlib.sha256(raw).hexdigest()[:32],
+        gzip=compressor.compress(raw) + compressor.flush(zlib.Z_SYNC_FLUSH),
+        crc=zlib.crc32(raw),
+        size=len(raw),
+        version=BODY_VERSION
+    )
+
+
+def render_json(payload: PrecompressedBody, fields: Dict[str, Any], compressed: bool = True) -> bytes:
+    """
+    Complete a precompressed body with per-request fields
+
+    Args:
+        payload: Body produced by precompress_json
+        fields: Fields appended to the stored ones (must not repeat them)
+        compressed: Return gzip bytes (True) or plain JSON (False)
+
+    Returns:
+        The whole JSON object, gzip-compressed or plain
+    """
+    tail = b',' + _dumps(fields)[1:]
+    if not compressed:
+        return zlib.decompressobj(31).decompress(payload.gzip) + tail
+    # An independent final deflate block after the sync flush keeps one valid gzip member
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, -15)
+    trailer = struct.pack(
+        '<II',
+        zlib.crc32(tail, payload.crc) & 0xffffffff,
+        (payload.size + len(tail)) & 0xffffffff
+    )
+    return payload.gzip + compressor.compress(tail) + compressor.flush() + trailer
+
+
+def negotiate(
+    payload: PrecompressedBody,
+    fields: Dict[str, Any],
+    accept_encoding: Optional[str],
+    if_none_match: Optional[str] = None
+) -> Tuple[int, bytes, Dict[str, str]]:
+    """
+    Pick the representation of a precompressed body for a request
+
+    Answers 304 when If-None-Match matches the ETag (pass it for GET and
+    HEAD only). Otherwise clients accepting gzip get the stored bytes plus
+    the compressed per-request fields, and others get plain JSON.
+
+    Args:
+        payload: Body produced by precompress_json
+        fields: Per-request fields (see render_json)
+        accept_encoding: Raw Accept-Encoding header
+        if_none_match: Raw If-None-Match header of a GET/HEAD request
+
+    Returns:
+        (status_code, body, headers); framework independent
+    """
+    headers = {
+        'ETag': quote_etag(payload.etag, weak=True),
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': 'no-cache'
+    }
+    if if_none_match and parse_etags(if_none_match).contains_weak(payload.etag):
+        return 304, b'', headers
+
+    headers['Content-Type'] = 'application/json'
+    if parse_accept_header(accept_encoding).quality('gzip') > 0:
+        headers['Content-Encoding'] = 'gzip'
+        return 200, render_json(payload, fields), headers
+    return 200, render_json(payload, fields, compressed=False), headers
+
+
+def precompressed_response(payload: PrecompressedBody, fields: Dict[str, Any], **headers) -> Response:
+    """
+    Serve a precompressed body for the current Flask request (see negotiate)
+
+    If-None-Match is honoured for GET and HEAD requests only.
+
+    Args:
+        payload: Body produced by precompress_json
+        fields: Per-request fields
+        **headers: Extra response headers
+
+    Returns:
+        Flask Response
+    """
+    conditional = request.method in ('GET', 'HEAD')
+    status, body, negotiated = negotiate(
+        payload,
+        fields,
+        request.headers.get('Accept-Encoding'),
+        request.headers.get('If-None-Match') if conditional else None
+    )
+    return Response(body, status=status, headers={**negotiated, **headers})
+
+
+def _dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
@@ -0,0 +1,187 @@
+"""
+JSON Stream - Incremental Parsing of One Array in a Streamed JSON Object
+
+An LLM streaming `{"keyframes": [{...}, {...}, ...]}` sends the first
+keyframe long before the last. JsonArrayStream is fed the text as it
+arrives and returns each element of the named top-level array as soon
+as its closing brace is in, so it can be used while the rest is still
+being generated.
+
+The scanner only tracks strings and bracket nesting; each complete
+element is then decoded with json.loads, and text already consumed is
+dropped, so a long stream is scanned in linear time. Text before the
+first `{` (e.g. a ```json fence) and after the closing `}` is ignored.
+Mismatched brackets, array elements that are not objects, missing or
+stray commas between elements and undecodable elements raise ValueError
+at the point they appear, so a caller can abort the stream early instead
+of waiting for the full output.
+
+Author: Shenzhen Wang & AI
+License: MIT
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+_CLOSERS = {'}': '{', ']': '['}
+
+
+class JsonArrayStream:
+    """Incremental parser yielding the elements of `{"<key>": [...]}`"""
+
+    def __init__(self, key: str):
+        """
+        Initialize parser
+
+        Args:
+            key: Name of the top-level array to extract (e.g. "keyframes")
+        """
+        self.key = key
+        self.count = 0
+        self._buffer = ''
+        self._base = 0  # stream offset of _buffer[0]; consumed text is dropped
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._array_open = False
+        self._array_done = False
+        self._array_next = 'first'  # inside the array: 'first', 'element' (after ',') or 'comma'
+        self._element_start: Optional[int] = None
+        self._done = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Add streamed text
+
+        Args:
+            text: Next chunk of the response
+
+        Returns:
+            Array elements completed by this chunk (possibly none)
+
+        Raises:
+            ValueError: The text so far is not valid JSON of the expected shape
+        """
+        self._buffer += text
+        elements = []
+        buffer = self._buffer
+        pos = self._pos
+        while pos < len(buffer) and not self._done:
+            char = buffer[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_string = buffer[self._string_start + 1:pos]
+            elif not self._stack:
+                # Skip anything before the top-level object
+                if char == '{':
+                    self._stack.append(char)
+            elif self._in_array():
+                self._array_char(char, pos)
+            elif char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char in '{[':
+                self._open(char, pos)
+            elif char in '}]':
+                element = self._close(char, pos)
+                if element is not None:
+                    elements.append(element)
+            elif char == ':' and len(self._stack) == 1:
+                self._current_key = self._last_string
+            elif char == ',' and len(self._stack) == 1:
+                self._current_key = None
+            pos += 1
+        self._pos = pos
+        self._compact()
+        return elements
+
+    def close(self):
+        """
+        End of stream: check the output was complete
+
+        Raises:
+            ValueError: The object or the array was never closed, or the array was missing
+        """
+        if not self._array_done:
+            if self._array_open:
+                raise ValueError(f"Response ended inside the {self.key} array (after {self.count} elements)")
+            raise ValueError(f"Response has no {self.key} array")
+        if not self._done:
+            raise ValueError("Response ended before the JSON object was closed")
+
+    def _array_char(self, char: str, pos: int):
+        """A character directly inside the array: only objects, commas and whitespace are allowed"""
+        if char.isspace():
+            return
+        offset = self._base + pos
+        if char == '{':
+            if self._array_next == 'comma':
+                raise ValueError(f"Malformed JSON: missing ',' before {self.key} element {self.count} (at offset {offset})")
+            self._open(char, pos)
+        elif char == ',' and self._array_next == 'comma':
+            self._array_next = 'element'
+        elif char == ']' and self._array_next != 'element':
+            self._close(char, pos)
+        elif char in ',]':
+            raise ValueError(f"Malformed JSON: unexpected '{char}' in the {self.key} array (at offset {offset})")
+        else:
+            raise ValueError(f"{self.key} element {self.count} is not an object (at offset {offset})")
+
+    def _compact(self):
+        """Drop text that is no longer needed, keeping an unfinished element or key string"""
+        keep = self._pos
+        if self._element_start is not None:
+            keep = self._element_start
+        elif self._in_string and len(self._stack) == 1:
+            keep = self._string_start
+        if not keep:
+            return
+        self._buffer = self._buffer[keep:]
+        self._base += keep
+        self._pos -= keep
+        self._string_start -= keep
+        if self._element_start is not None:
+            self._element_start -= keep
+
+    def _in_array(self) -> bool:
+        return self._array_open and not self._array_done and len(self._stack) == 2
+
+    def _open(self, char: str, pos: int):
+        if self._in_array():
+            self._element_start = pos
+        elif len(self._stack) == 1 and char == '[' and self._current_key == self.key and not self._array_open:
+            self._array_open = True
+        self._stack.append(char)
+
+    def _close(self, char: str, pos: int) -> Optional[Dict[str, Any]]:
+        if self._stack[-1] != _CLOSERS[char]:
+            raise ValueError(f"Malformed JSON: unexpected '{char}' at offset {self._base + pos}")
+        self._stack.pop()
+        depth = len(self._stack)
+
+        if not depth:
+            self._done = True
+            return None
+        if depth == 1 and self._array_open and not self._array_done and char == ']':
+            self._array_done = True
+            return None
+        if depth == 2 and self._element_start is not None and self._in_array():
+            text = self._buffer[self._element_start:pos + 1]
+            self._element_start = None
+            self._array_next = 'comma'
+            try:
+                element = json.loads(text)
+            except ValueError as e:
+                raise ValueError(f"{self.key} element {self.count} is not valid JSON: {e}")
+            self.count += 1
+            return element
+        return None
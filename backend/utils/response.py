@@ -4,6 +4,7 @@ Response Utilities - Standardized API Response Format
 Author: Shenzhen Wang & AI
 License: MIT
 """
+import json
 from typing import Any, Dict, Optional
 from flask import jsonify
 
@@ -61,3 +62,18 @@ def error_response(
     response.update(kwargs)
     
     return jsonify(response), status_code
+
+
+def sse_event(event: str, data: Any) -> str:
+    """
+    Format one Server-Sent Events message
+    
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+        
+    Returns:
+        SSE message text (terminated by a blank line)
+    """
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return f"event: {event}\ndata: {payload}\n\n"
@@ -30,6 +30,10 @@ class StickFigureAnimator {
         
         // Callbacks for keyframe events
         this.onKeyframeReached = null;
+        
+        // Streaming state (frames still arriving from /api/generate/stream)
+        this.streamOpen = false;
+        this.streamKeyframes = null;
     }
 
     /**
@@ -47,6 +51,95 @@ class StickFigureAnimator {
         }
     }
 
+    /**
+     * Decode a columnar frame payload (POST /api/generate with format: "columnar")
+     * into the same shape as JSON animation data.
+     * Layout is documented in backend/utils/frame_codec.py; typed arrays assume
+     * a little-endian platform, which covers all current browsers' hardware.
+     */
+    static decodeColumnar(buffer) {
+        const view = new DataView(buffer);
+        const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+        const version = view.getUint8(4);
+        if (magic !== 'STKF' || version !== 1) {
+            throw new Error(`Unsupported frame payload: ${magic} v${version}`);
+        }
+        
+        const headerLength = view.getUint32(8, true);
+        let offset = 12;
+        const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, offset, headerLength)));
+        offset += headerLength;
+        offset += (4 - (offset % 4)) % 4;
+        
+        const { joint_order: jointOrder, character_ids: characterIds, frame_count: frameCount, texts, ...animation } = header;
+        const timestamps = new Uint32Array(buffer, offset, frameCount);
+        offset += frameCount * 4;
+        const positions = new Float32Array(buffer, offset, frameCount * characterIds.length * jointOrder.length * 2);
+        
+        const keyframes = new Array(frameCount);
+        let cursor = 0;
+        for (let i = 0; i < frameCount; i++) {
+            const characters = {};
+            for (const charId of characterIds) {
+                const joints = {};
+                for (const jointName of jointOrder) {
+                    const x = positions[cursor];
+                    const y = positions[cursor + 1];
+                    cursor += 2;
+                    if (!Number.isNaN(x)) {
+                        joints[jointName] = { x, y };
+                    }
+                }
+                characters[charId] = { joints };
+            }
+            
+            const frame = { timestamp_ms: timestamps[i], characters };
+            if (texts[i] !== undefined) {
+                frame.text = texts[i];
+            }
+            keyframes[i] = frame;
+        }
+        
+        animation.keyframes = keyframes;
+        return animation;
+    }
+
+    /**
+     * Begin a streamed animation; frames arrive later via appendFrames()
+     */
+    beginStream(data) {
+        this.loadAnimation({ ...data, keyframes: [] });
+        this.streamKeyframes = data.keyframes || [];
+        this.streamOpen = true;
+    }
+
+    /**
+     * Append streamed frames; frame-by-frame playback picks them up as they arrive
+     */
+    appendFrames(frames, targetFps) {
+        if (!this.animationData) return;
+        this.animationData.target_fps = targetFps;
+        this.animationData.keyframes.push(...frames);
+    }
+
+    /**
+     * Close the stream and merge the remaining animation fields
+     */
+    endStream(finalData) {
+        this.streamOpen = false;
+        if (!this.animationData) return;
+        
+        const { keyframes, ...rest } = finalData || {};
+        Object.assign(this.animationData, rest);
+        
+        // No frames were streamed (optimization disabled): fall back to raw keyframes
+        if (this.animationData.keyframes.length === 0 && this.streamKeyframes) {
+            this.animationData.keyframes = this.streamKeyframes;
+            this.animationData.target_fps = null;
+        }
+        this.streamKeyframes = null;
+    }
+
     /**
      * Create rendering layers
      */
@@ -394,7 +487,11 @@ class StickFigureAnimator {
         const i = state.currentFrameIndex;
         
         if (i >= frames.length) {
-            this.isPlaying = false;
+            if (this.streamOpen) {
+                this.waitForStreamedFrames(state);
+            } else {
+                this.isPlaying = false;
+            }
             return;
         }
         
@@ -428,11 +525,23 @@ class StickFigureAnimator {
             const nextFrame = frames[state.currentFrameIndex];
             const waitTime = Math.max(0, nextFrame.timestamp_ms - currentTime);
             this.frameTimer = setTimeout(() => this.playNextFrame(), waitTime);
+        } else if (this.streamOpen) {
+            this.waitForStreamedFrames(state);
         } else {
             this.isPlaying = false;
         }
     }
     
+    /**
+     * Stall playback until more streamed frames arrive.
+     * The stall is added to startTime so frame timing stays relative.
+     */
+    waitForStreamedFrames(state) {
+        const pollMs = 50;
+        state.startTime += pollMs;
+        this.frameTimer = setTimeout(() => this.playNextFrame(), pollMs);
+    }
+    
     /**
      * Resume frame-by-frame playback
      */
@@ -643,6 +752,7 @@ class StickFigureAnimator {
         this.characterElements = {};
         this.propElements = {};
         this.isPlaying = false;
+        this.streamOpen = false;
     }
 
     /**
@@ -233,7 +233,7 @@ async function generateAnimation() {
     updateUIState('loading');
     
     try {
-        const response = await fetch(`${API_BASE}/api/generate`, {
+        const response = await fetch(`${API_BASE}/api/generate/stream`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -244,42 +244,62 @@ async function generateAnimation() {
             })
         });
         
-        const result = await response.json();
-        
-        if (!result.success) {
+        // Validation / rate-limit errors come back as plain JSON
+        if (!response.ok) {
+            const result = await response.json();
             throw new Error(result.message || i18n.t('toast.generate_failed'));
         }
         
-        currentAnimationData = result.data;
+        let started = false;
+        const startPlayback = () => {
+            started = true;
+            updateUIState('animation');
+            animator.play();
+            isPlaying = true;
+            updatePlayPauseButton();
+        };
         
-        // 调试：打印接收到的数据结构
-        console.log('Animation data received:', result.data);
-        console.log('Characters:', result.data.characters);
-        console.log('Keyframes count:', result.data.keyframes?.length);
-        if (result.data.keyframes && result.data.keyframes.length > 0) {
-            console.log('First keyframe:', result.data.keyframes[0]);
-            console.log('First keyframe characters:', result.data.keyframes[0].characters);
-        }
+        await readEventStream(response, (event, payload) => {
+            switch (event) {
+                case 'analysis':
+                    console.log('Story analysis received:', payload);
+                    break;
+                case 'keyframes':
+                    console.log('Keyframes received:', payload.keyframes?.length);
+                    animator.beginStream(payload);
+                    break;
+                case 'frames':
+                    animator.appendFrames(payload.frames, payload.target_fps);
+                    // Start playing as soon as the first chunk is in; raw keyframes
+                    // (target_fps null) are GSAP-interpolated, so wait for all of them
+                    if (!started && payload.target_fps) startPlayback();
+                    break;
+                case 'complete':
+                    // Cached and coalesced results arrive whole, without keyframes/frames events
+                    if (payload.cached || payload.coalesced) {
+                        animator.loadAnimation(payload.data);
+                    } else {
+                        animator.endStream(payload.data);
+                    }
+                    if (!started) startPlayback();
+                    break;
+                case 'error':
+                    throw new Error(payload.message || i18n.t('toast.generate_failed'));
+            }
+        });
         
-        // Load animation
-        animator.loadAnimation(result.data);
+        if (!started) {
+            throw new Error(i18n.t('toast.generate_failed'));
+        }
         
         // Store current animation data
-        currentAnimationData = result.data;
+        currentAnimationData = animator.animationData;
+        console.log('Animation data received:', currentAnimationData);
         
         // Update info
-        updateAnimationInfo(result.data);
-        
-        // Show animation
-        updateUIState('animation');
+        updateAnimationInfo(currentAnimationData);
         
-        // Auto-play with celebration
-        setTimeout(() => {
-            animator.play();
-            isPlaying = true;
-            updatePlayPauseButton();
-            confetti.launch();
-        }, 500);
+        confetti.launch();
         
         // Show success with mode info
         const modeText = mode === 'simple' ? '简单模式' : '专业模式';
@@ -292,6 +312,42 @@ async function generateAnimation() {
     }
 }
 
+/**
+ * Read a Server-Sent Events response body, calling onEvent(name, data) per message
+ */
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const message = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let event = 'message';
+            const dataLines = [];
+            message.split('\n').forEach(line => {
+                if (line.startsWith('event:')) {
+                    event = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    dataLines.push(line.slice(5).trim());
+                }
+            });
+            
+            if (dataLines.length > 0) {
+                onEvent(event, JSON.parse(dataLines.join('\n')));
+            }
+        }
+    }
+}
+
 // ================================
 // Update Animation Info
 // ================================
@@ -0,0 +1,107 @@
+"""
+Test fixtures
+
+Tests run against the Flask app with litellm's completion functions
+replaced by a scripted fake, so no provider is called. Each test uses
+its own story text: the app's caches are process-wide singletons.
+"""
+import json
+import os
+import sys
+import threading
+import types
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # config.yml is loaded relative to the working directory
+os.environ.setdefault('PERFXCLOUD_API_KEY', 'test-key')
+
+from backend.utils import debug_logger  # noqa: E402
+
+debug_logger._debug_logger_instance = debug_logger.DebugLogger(enabled=False)
+
+# Template actions only: the generator needs no LLM call for them
+ANALYSIS = {
+    'story_intent': 'test',
+    'characters': [{'id': 'char1', 'name': 'A', 'color': '#333333', 'role': 'protagonist'}],
+    'key_actions': [
+        {'type': 'walk', 'params': {'direction': 'right'}},
+        {'type': 'wave', 'params': {}}
+    ],
+    'duration_estimate': 3000
+}
+
+
+def make_response(content: str):
+    """Object shaped like a litellm ModelResponse"""
+    return types.SimpleNamespace(
+        choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=content))],
+        usage=types.SimpleNamespace(prompt_tokens=10, completion_tokens=20, total_tokens=30)
+    )
+
+
+class FakeLLM:
+    """
+    Scripted stand-in for litellm.completion / acompletion
+
+    Answers every call with `content` (the ANALYSIS JSON by default).
+    `errors` is a list of exceptions raised by the next calls, in order;
+    `gate`, when set, blocks each call until released.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.content = json.dumps(ANALYSIS)
+        self.errors = []
+        self.gate = None
+        self.called = threading.Event()
+        self.lock = threading.Lock()
+
+    def completion(self, **kwargs):
+        with self.lock:
+            self.calls += 1
+            error = self.errors.pop(0) if self.errors else None
+        self.called.set()
+        if self.gate is not None:
+            self.gate.wait(timeout=10)
+        if error is not None:
+            raise error
+        return make_response(self.content)
+
+    async def acompletion(self, **kwargs):
+        return self.completion(**kwargs)
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    litellm = pytest.importorskip('litellm')
+    fake = FakeLLM()
+    monkeypatch.setattr(litellm, 'completion', fake.completion)
+    monkeypatch.setattr(litellm, 'acompletion', fake.acompletion)
+    return fake
+
+
+@pytest.fixture(scope='session')
+def app():
+    pytest.importorskip('litellm')
+    import app as app_module
+    return app_module.app
+
+
+@pytest.fixture
+def client(app):
+    # All test requests share one client address; keep the suite under the burst limit
+    app.rate_limiter.reset_all()
+    return app.test_client()
+
+
+def parse_sse(body: str):
+    """Split an SSE body into (event, data) pairs"""
+    events = []
+    for block in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line)
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
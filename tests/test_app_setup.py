@@ -0,0 +1,34 @@
+"""Application setup: one owner for pipelines, preloaded production entry point"""
+import importlib
+import runpy
+
+
+def test_pipelines_are_preloaded_into_the_service_singleton(app):
+    from backend.services.animation_service import get_animation_service
+    service = get_animation_service()
+    assert app.animation_service is service
+    assert app.pipelines is service.pipelines
+    assert set(service.pipelines) == {'6dof', '12dof'}
+    assert service.get_pipeline('12dof') is service.pipelines['12dof']
+
+
+def test_metrics_report_the_serving_pipelines(app, client, fake_llm):
+    before = client.get('/api/metrics').get_json()['data']['pipelines']['12dof']['total_requests']
+    client.post('/api/generate', json={'story': 'A man walks right and waves for the metrics'})
+
+    data = client.get('/api/metrics').get_json()['data']
+    assert set(data['pipelines']) == {'6dof', '12dof'}
+    assert data['pipelines']['12dof']['total_requests'] == before + 1
+    assert client.get('/api/health').get_json()['data']['pipelines']['12dof']['initialized'] is True
+
+
+def test_wsgi_entry_point_serves_the_same_app(app):
+    assert importlib.import_module('wsgi').app is app
+
+
+def test_gunicorn_config_preloads_and_freezes(monkeypatch):
+    monkeypatch.setenv('GUNICORN_WORKERS', '3')
+    config = runpy.run_path('gunicorn.conf.py')
+    assert config['preload_app'] is True
+    assert config['workers'] == 3
+    assert callable(config['when_ready']) and callable(config['post_fork'])
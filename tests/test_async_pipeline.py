@@ -0,0 +1,78 @@
+"""Async pipeline: blocking steps run off the event loop"""
+import asyncio
+import contextvars
+import json
+import os
+import time
+
+import pytest
+
+from backend.utils import debug_logger
+from backend.utils.blocking import run_blocking
+
+request_id = contextvars.ContextVar('request_id', default=None)
+
+
+def test_run_blocking_keeps_context_changes():
+    def start():
+        request_id.set('abc')
+        return 1
+
+    async def main():
+        assert await run_blocking(start) == 1
+        return request_id.get()
+
+    assert asyncio.run(main()) == 'abc'
+
+
+@pytest.fixture
+def pipeline(app, fake_llm, tmp_path, monkeypatch):
+    """Uncached 12dof pipeline writing debug sessions to tmp_path"""
+    from backend.services.animation_pipeline import AnimationPipelineV2
+
+    logger = debug_logger.DebugLogger(enabled=True, output_dir=str(tmp_path))
+    monkeypatch.setattr(debug_logger, '_debug_logger_instance', logger)
+    return AnimationPipelineV2('12dof', stage_caches={})
+
+
+def test_async_debug_session_follows_request(pipeline, tmp_path):
+    async def main():
+        return [event async for event in pipeline.agenerate_stream('A clerk walks right and waves')]
+
+    events = asyncio.run(main())
+    assert events[-1]['event'] == 'complete'
+
+    session_dir = tmp_path / events[-1]['data']['metadata']['debug_session_id']
+    files = set(os.listdir(session_dir))
+    assert {'00_session_metadata.json', '01_story_analysis.json', '06_final_output.json'} <= files
+    with open(session_dir / '04_llm_calls.json', encoding='utf-8') as f:
+        assert json.load(f)['totals']['calls'] == 1
+
+
+def test_async_optimization_does_not_block_loop(pipeline, monkeypatch):
+    def slow_optimize(animation_data, **kwargs):
+        time.sleep(0.3)
+        yield animation_data['keyframes']
+
+    monkeypatch.setattr(pipeline.animation_optimizer, 'optimize_iter', slow_optimize)
+    monkeypatch.setattr(pipeline.debug_logger, 'enabled', False)
+
+    async def main():
+        ticks = 0
+        stop = asyncio.Event()
+
+        async def ticker():
+            nonlocal ticks
+            while not stop.is_set():
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        events = [event async for event in pipeline.agenerate_stream('A baker walks right and waves')]
+        stop.set()
+        await task
+        return events, ticks
+
+    events, ticks = asyncio.run(main())
+    assert events[-1]['event'] == 'complete'
+    assert ticks >= 10
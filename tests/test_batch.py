@@ -0,0 +1,75 @@
+"""Batch endpoint: /api/generate/batch"""
+import pytest
+
+from backend.rate_limiter import PerUserRateLimiter
+
+
+@pytest.fixture
+def rate_limiter(app, monkeypatch):
+    """Fresh limiter with a burst of 3 requests"""
+    limiter = PerUserRateLimiter(requests_per_minute=1, burst_size=3)
+    monkeypatch.setattr(app, 'rate_limiter', limiter)
+    return limiter
+
+
+def _items(*stories):
+    return [{'story': story} for story in stories]
+
+
+def test_batch_charges_one_token_per_unique_uncached_item(client, fake_llm, rate_limiter):
+    stories = ['A boy walks right and waves, batch one', 'A girl walks right and waves, batch one']
+    response = client.post('/api/generate/batch', json={'items': _items(*stories, stories[0])})
+    assert response.status_code == 200
+    assert fake_llm.calls == 2
+
+    # Two of three tokens spent; both items are cached now, so a repeat costs one
+    response = client.post('/api/generate/batch', json={'items': _items(*stories)})
+    assert response.status_code == 200
+    assert client.post('/api/generate/batch', json={'items': _items(*stories)}).status_code == 429
+
+
+def test_batch_over_allowance_is_rejected_before_running(client, fake_llm, rate_limiter):
+    assert rate_limiter.try_acquire('127.0.0.1', tokens=2)
+    stories = [f'A dancer walks right and waves, batch two number {n}' for n in range(2)]
+    response = client.post('/api/generate/batch', json={'items': _items(*stories)})
+    assert response.status_code == 429
+    assert fake_llm.calls == 0
+
+
+@pytest.mark.parametrize('value', [0, -1, 1.5, '2', True])
+def test_batch_rejects_invalid_max_concurrency(client, fake_llm, rate_limiter, value):
+    response = client.post('/api/generate/batch', json={
+        'items': _items('A cat walks right and waves, batch three'),
+        'max_concurrency': value
+    })
+    assert response.status_code == 400
+    assert fake_llm.calls == 0
+
+
+def test_batch_clamps_max_concurrency(client, fake_llm, rate_limiter):
+    response = client.post('/api/generate/batch', json={
+        'items': _items('A dog walks right and waves, batch four'),
+        'max_concurrency': 1000
+    })
+    assert response.status_code == 200
+
+
+def test_batch_larger_than_burst_is_charged_a_full_bucket(client, fake_llm, rate_limiter):
+    stories = [f'A juggler walks right and waves, batch five number {n}' for n in range(5)]
+    response = client.post('/api/generate/batch', json={'items': _items(*stories)})
+    assert response.status_code == 200
+    assert response.get_json()['data']['succeeded'] == 5
+
+    # The whole bucket (3 tokens) was spent
+    other = _items('A clown walks right and waves, batch five')
+    assert client.post('/api/generate/batch', json={'items': other}).status_code == 429
+
+
+def test_default_limits_admit_a_full_batch(client, fake_llm, monkeypatch):
+    """With the shipped defaults a fresh client can send a batch of max_items new stories"""
+    from app import app as flask_app
+    limiter = PerUserRateLimiter(requests_per_minute=20, burst_size=30)
+    monkeypatch.setattr(flask_app, 'rate_limiter', limiter)
+    stories = [f'A skater walks right and waves, full batch number {n}' for n in range(30)]
+    response = client.post('/api/generate/batch', json={'items': _items(*stories)})
+    assert response.status_code == 200
@@ -0,0 +1,146 @@
+"""Cache backends"""
+import time
+
+import pytest
+
+from backend import cache_service
+from backend.cache_service import LRUCache, SQLiteCache, entry_size
+
+
+def _accessed_at(cache, story):
+    key = cache.make_key(story)
+    return cache._connect().execute(
+        f'SELECT accessed_at FROM {cache.table} WHERE key = ?', (key,)
+    ).fetchone()[0]
+
+
+def test_sqlite_hit_skips_write_for_recently_touched_entry(tmp_path):
+    cache = SQLiteCache(path=str(tmp_path / 'cache.db'), ttl_seconds=3600)
+    cache.put('story', {'value': 1})
+    written = _accessed_at(cache, 'story')
+    changes = cache._connect().total_changes
+
+    assert cache.get('story') == {'value': 1}
+    assert cache._connect().total_changes == changes
+    assert _accessed_at(cache, 'story') == written
+
+
+def test_sqlite_hit_touches_entry_older_than_threshold(tmp_path):
+    cache = SQLiteCache(path=str(tmp_path / 'cache.db'), ttl_seconds=3600)
+    cache.put('story', {'value': 1})
+    old = time.time() - cache_service.ACCESS_TOUCH_SECONDS - 1
+    cache._connect().execute(f'UPDATE {cache.table} SET accessed_at = ?', (old,))
+
+    assert cache.get('story') == {'value': 1}
+    assert _accessed_at(cache, 'story') > old
+
+
+def test_sqlite_evicts_least_recently_used(tmp_path):
+    cache = SQLiteCache(path=str(tmp_path / 'cache.db'), max_size=2, ttl_seconds=3600)
+    cache.put('a', {'value': 'a'})
+    cache.put('b', {'value': 'b'})
+    # 'a' was last used long ago, 'b' just now
+    cache._connect().execute(
+        f'UPDATE {cache.table} SET accessed_at = accessed_at - 3000 WHERE key = ?', (cache.make_key('a'),)
+    )
+    cache.put('c', {'value': 'c'})
+
+    assert not cache.contains('a')
+    assert cache.contains('b') and cache.contains('c')
+
+
+def _payload(n):
+    return {'value': 'x' * n}
+
+
+@pytest.mark.parametrize('backend', ['memory', 'sqlite'])
+def test_byte_budget_evicts_least_recently_used(tmp_path, backend):
+    size = entry_size(_payload(1000))
+    limits = dict(max_size=100, ttl_seconds=3600, max_bytes=int(size * 2.5))
+    cache = LRUCache(**limits) if backend == 'memory' else SQLiteCache(path=str(tmp_path / 'c.db'), **limits)
+    cache.put('a', _payload(1000))
+    cache.put('b', _payload(1000))
+    if backend == 'sqlite':
+        cache._connect().execute(
+            f'UPDATE {cache.table} SET accessed_at = accessed_at - 3000 WHERE key = ?', (cache.make_key('a'),)
+        )
+    else:
+        cache.get('a')
+        cache.get('b')  # 'a' is now least recently used
+
+    cache.put('c', _payload(1000))
+
+    assert not cache.contains('a')
+    assert cache.contains('b') and cache.contains('c')
+    stats = cache.get_stats()
+    assert stats['evictions'] == 1 and stats['bytes_used'] <= limits['max_bytes']
+
+
+@pytest.mark.parametrize('backend', ['memory', 'sqlite'])
+def test_entry_larger_than_limit_is_rejected_and_drops_old_copy(tmp_path, backend):
+    limits = dict(ttl_seconds=3600, max_entry_bytes=entry_size(_payload(500)))
+    cache = LRUCache(**limits) if backend == 'memory' else SQLiteCache(path=str(tmp_path / 'c.db'), **limits)
+    cache.put('story', _payload(10))
+
+    cache.put('story', _payload(5000))
+
+    assert not cache.contains('story')
+    assert cache.get_stats()['rejected'] == 1
+
+
+def test_entry_over_whole_budget_is_kept_alone():
+    cache = LRUCache(ttl_seconds=3600, max_bytes=10)
+    cache.put('a', _payload(100))
+    cache.put('b', _payload(100))
+    assert not cache.contains('a') and cache.contains('b')
+    assert cache.get_stats()['largest_entries'][0]['bytes'] == entry_size(_payload(100))
+
+
+def test_compressed_entry_round_trip():
+    cache = LRUCache(compress_level=6)
+    data = {**_payload(200), 'encoded_response': b'gzip bytes'}
+    cache.put('story', data)
+
+    hit, stale = cache.get_entry('story')
+    assert isinstance(hit, cache_service.CompressedEntry)
+    assert dict(hit) == data
+    assert stale is False
+
+    stats = cache.get_stats()
+    assert stats['compress_level'] == 6
+    assert stats['compression_ratio'] > 1
+    assert stats['bytes_used'] == cache.cache[cache.make_key('story')]['size'] < entry_size(data)
+
+
+def test_compressed_entry_serves_encoded_response_without_decompressing(monkeypatch):
+    entry = cache_service.CompressedEntry.compress(
+        {**_payload(10), 'encoded_response': b'gzip bytes'}, 6
+    )
+    monkeypatch.setattr(cache_service.zlib, 'decompress', pytest.fail)
+    assert entry['encoded_response'] == b'gzip bytes'
+    assert 'value' in entry and len(entry) == 2
+
+
+def test_with_fields_adds_fields_to_a_shared_compressed_view():
+    cache = LRUCache(compress_level=6)
+    cache.put('story', _payload(10))
+    hit, _ = cache.get_entry('story')
+
+    view = cache_service.with_fields(hit, cached=True)
+    assert isinstance(view, cache_service.CompressedEntry)
+    assert view['cached'] is True and list(view) == ['value', 'cached']
+    assert 'cached' not in hit
+    assert 'cached' not in cache.get_entry('story')[0]
+
+    assert cache_service.with_fields({'a': 1}, cached=True) == {'a': 1, 'cached': True}
+
+
+def test_byte_budget_counts_compressed_size():
+    raw = entry_size(_payload(200))
+    plain = LRUCache(max_bytes=raw * 3)
+    packed = LRUCache(compress_level=6, max_bytes=raw * 3)
+    for i in range(6):
+        plain.put(f'story {i}', _payload(200))
+        packed.put(f'story {i}', _payload(200))
+    assert len(plain.cache) < 6
+    assert len(packed.cache) == 6
@@ -0,0 +1,109 @@
+"""Cache warm-up: corpus parsing and warming a service's cache"""
+import threading
+
+import pytest
+
+from backend.cache_service import LRUCache
+
+
+@pytest.fixture
+def warmup(app):
+    from backend import cache_warmup
+    return cache_warmup
+
+
+def write_corpus(tmp_path, text):
+    path = tmp_path / 'corpus.txt'
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_load_corpus_reads_text_and_json_lines(warmup, tmp_path):
+    path = write_corpus(tmp_path, '\n'.join([
+        '# popular stories',
+        'A man walks right',
+        '',
+        '{"story": "A woman waves", "dof_level": "6dof", "interpolate": false}',
+    ]))
+
+    items = warmup.load_corpus(path, dof_levels=('12dof', '6dof'))
+
+    assert [(i['story'], i['dof_level'], i['interpolate']) for i in items] == [
+        ('A man walks right', '12dof', True),
+        ('A man walks right', '6dof', True),
+        ('A woman waves', '6dof', False),
+    ]
+    assert all(i['use_cache'] for i in items)
+
+
+@pytest.mark.parametrize('line,message', [
+    ('{"story": ', 'invalid JSON'),
+    ('{"story": "A man walks", "dof_level": "99dof"}', 'dof'),
+    ('{"dof_level": "12dof"}', 'story'),
+])
+def test_load_corpus_rejects_invalid_lines(warmup, tmp_path, line, message):
+    path = write_corpus(tmp_path, 'A fine story\n' + line + '\n')
+    with pytest.raises(ValueError, match=r'corpus\.txt:2: .*' + message):
+        warmup.load_corpus(path)
+
+
+class FakeService:
+    """AnimationService stand-in: caches successful results, fails stories containing 'fail'"""
+
+    def __init__(self):
+        self.cache = LRUCache(max_size=10, ttl_seconds=3600)
+        self.generated = []
+        self.lock = threading.Lock()
+
+    def generate(self, story, dof_level, use_cache, interpolate):
+        with self.lock:
+            self.generated.append(story)
+        if 'fail' in story:
+            return {'success': False, 'error': 'rejected'}
+        self.cache.put(story, {'data': story}, dof_level=dof_level, interpolate=interpolate)
+        return {'success': True}
+
+
+def item(story, dof_level='12dof'):
+    return {'story': story, 'dof_level': dof_level, 'use_cache': True, 'interpolate': True}
+
+
+def test_warm_cache_generates_missing_items_once(warmup):
+    service = FakeService()
+    service.cache.put('cached', {'data': 'cached'}, dof_level='12dof', interpolate=True)
+    outcomes = []
+
+    summary = warmup.warm_cache(
+        service,
+        [item('a'), item('b'), item('a'), item('cached'), item('please fail')],
+        concurrency=2,
+        progress=lambda done, total, outcome: outcomes.append((done, total, outcome['status']))
+    )
+
+    assert sorted(service.generated) == ['a', 'b', 'please fail']
+    assert {k: summary[k] for k in ('total', 'skipped', 'generated', 'failed')} == {
+        'total': 4, 'skipped': 1, 'generated': 2, 'failed': 1
+    }
+    assert [done for done, _, _ in outcomes] == [1, 2, 3, 4]
+    assert all(total == 4 for _, total, _ in outcomes)
+    assert service.cache.get('b', dof_level='12dof', interpolate=True) == {'data': 'b'}
+
+
+def test_warm_cache_second_run_skips_everything(warmup):
+    service = FakeService()
+    items = [item('a'), item('a', dof_level='6dof')]
+    warmup.warm_cache(service, items)
+
+    summary = warmup.warm_cache(service, items)
+
+    assert summary['skipped'] == 2 and summary['generated'] == 0
+    assert len(service.generated) == 2
+
+
+def test_warm_cache_counts_exceptions_as_failures(warmup):
+    service = FakeService()
+    service.generate = lambda **kwargs: 1 / 0
+
+    summary = warmup.warm_cache(service, [item('a')])
+
+    assert summary['failed'] == 1
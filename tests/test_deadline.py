@@ -0,0 +1,56 @@
+"""Per-request deadlines"""
+import threading
+import time
+
+import pytest
+
+from backend.utils.deadline import Deadline, DeadlineExceeded
+
+
+def test_after_without_budget_is_none():
+    assert Deadline.after(None) is None
+    assert Deadline.after(0) is None
+    assert Deadline.after(-1) is None
+    assert Deadline.after(5).seconds == 5
+
+
+def test_remaining_and_check():
+    deadline = Deadline(10)
+    assert 9 < deadline.remaining() <= 10 and not deadline.expired
+    deadline.check('analysis')
+
+    deadline.expires_at = time.monotonic() - 1
+    assert deadline.expired and deadline.remaining() < 0
+    with pytest.raises(DeadlineExceeded, match='before analysis'):
+        deadline.check('analysis')
+
+
+def test_llm_timeout_is_cut_to_remaining_time():
+    deadline = Deadline(2)
+    assert deadline.llm_timeout(60) <= 2
+    assert deadline.llm_timeout(1) == 1
+
+    deadline.expires_at = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        deadline.llm_timeout(60)
+
+
+def test_deadline_exceeded_is_a_timeout():
+    assert issubclass(DeadlineExceeded, TimeoutError)
+
+
+def test_generate_past_deadline_returns_504(client, fake_llm, monkeypatch):
+    monkeypatch.setenv('DEADLINE_GENERATE_SECONDS', '0.2')
+    fake_llm.gate = threading.Event()
+    threading.Timer(0.4, fake_llm.gate.set).start()
+    story = 'A man walks right and waves too slowly'
+
+    response = client.post('/api/generate', json={'story': story})
+
+    assert response.status_code == 504
+    assert 'Deadline' in response.get_json()['message']
+
+    # A timeout is not remembered: the next request with more time succeeds
+    monkeypatch.setenv('DEADLINE_GENERATE_SECONDS', '30')
+    fake_llm.gate = None
+    assert client.post('/api/generate', json={'story': story}).status_code == 200
@@ -0,0 +1,88 @@
+"""Columnar frame codec: round trip and malformed payloads"""
+import math
+
+import pytest
+
+from backend.models.skeleton_12dof import Skeleton12DOF
+from backend.utils.frame_codec import CONTENT_TYPE, decode_columnar, encode_columnar
+
+JOINTS = Skeleton12DOF.JOINT_NAMES
+
+
+def pose(dx):
+    return {name: {'x': 400.0 + dx + i, 'y': 300.0 - i * 0.5} for i, name in enumerate(JOINTS)}
+
+
+ANIMATION = {
+    'title': '挥手',
+    'canvas': {'width': 800, 'height': 600},
+    'characters': [{'id': 'char1', 'name': 'A'}, {'id': 'char2', 'name': 'B'}],
+    'keyframes': [
+        {'timestamp_ms': 0, 'characters': {'char1': {'joints': pose(0)}, 'char2': {'joints': pose(100)}},
+         'text': '你好'},
+        {'timestamp_ms': 33, 'characters': {'char1': {'joints': pose(1.25)}}},
+    ]
+}
+
+
+def test_round_trip():
+    decoded = decode_columnar(encode_columnar(ANIMATION, JOINTS, extra_header={'cached': True}))
+
+    assert decoded['title'] == '挥手' and decoded['canvas'] == ANIMATION['canvas']
+    assert decoded['characters'] == ANIMATION['characters']
+    assert decoded['cached'] is True
+    first, second = decoded['keyframes']
+    assert first['timestamp_ms'] == 0 and first['text'] == '你好'
+    assert first['characters']['char1']['joints'] == pose(0)
+    assert first['characters']['char2']['joints'] == pose(100)
+    assert second['timestamp_ms'] == 33 and 'text' not in second
+    assert second['characters']['char1']['joints'] == pose(1.25)
+    assert second['characters']['char2']['joints'] == {}  # missing character -> no joints
+
+
+def test_positions_are_float32():
+    animation = {**ANIMATION, 'keyframes': [
+        {'timestamp_ms': 0, 'characters': {'char1': {'joints': {'head': {'x': 0.1, 'y': 1 / 3}}}}}
+    ]}
+    head = decode_columnar(encode_columnar(animation, JOINTS))['keyframes'][0]['characters']['char1']['joints']
+    assert head == {'head': {'x': pytest.approx(0.1, rel=1e-6), 'y': pytest.approx(1 / 3, rel=1e-6)}}
+    assert not any(math.isnan(v) for v in head['head'].values())
+
+
+def test_empty_animation():
+    decoded = decode_columnar(encode_columnar({'characters': [], 'keyframes': []}, JOINTS))
+    assert decoded['keyframes'] == [] and decoded['characters'] == []
+
+
+def test_smaller_than_json():
+    import json
+    frames = [{'timestamp_ms': t, 'characters': {'char1': {'joints': pose(t / 10)}}} for t in range(0, 3000, 33)]
+    animation = {'characters': [{'id': 'char1'}], 'keyframes': frames}
+    assert len(encode_columnar(animation, JOINTS)) < len(json.dumps(animation)) / 3
+
+
+@pytest.mark.parametrize('payload', [b'', b'XXXX\x01\x00\x00\x00\x00\x00\x00\x00'])
+def test_rejects_foreign_payloads(payload):
+    with pytest.raises(ValueError):
+        decode_columnar(payload)
+
+
+def test_rejects_truncated_payload():
+    payload = encode_columnar(ANIMATION, JOINTS)
+    with pytest.raises(ValueError):
+        decode_columnar(payload[:-8])
+
+
+def test_generate_columnar_response(client, fake_llm):
+    response = client.post('/api/generate', json={'story': 'A man walks right and waves in columns', 'format': 'columnar'})
+    assert response.status_code == 200
+    assert response.mimetype == CONTENT_TYPE
+    decoded = decode_columnar(response.data)
+    assert decoded['keyframes'] and decoded['metadata']['dof_level'] == '12dof'
+    assert set(decoded['keyframes'][0]['characters']['char1']['joints']) <= set(JOINTS)
+
+
+def test_columnar_requires_12dof(client, fake_llm):
+    response = client.post('/api/generate', json={'story': 'A man walks', 'format': 'columnar', 'dof_level': '6dof'})
+    assert response.status_code == 400
+    assert fake_llm.calls == 0
@@ -0,0 +1,89 @@
+"""Frozen values: read-only cached results shared between requests"""
+import copy
+import json
+import pickle
+
+import pytest
+
+from backend.utils.frozen import FrozenDict, freeze, thaw
+
+DATA = {'title': 't', 'keyframes': [{'timestamp_ms': 0, 'characters': {'char1': {'joints': {'head': {'x': 1, 'y': 2}}}}}]}
+
+
+def test_freeze_converts_nested_containers():
+    frozen = freeze(DATA)
+    assert isinstance(frozen, FrozenDict)
+    assert isinstance(frozen['keyframes'], tuple)
+    assert isinstance(frozen['keyframes'][0]['characters']['char1']['joints']['head'], FrozenDict)
+    assert frozen == {**DATA, 'keyframes': tuple(DATA['keyframes'])}
+
+
+@pytest.mark.parametrize('mutate', [
+    lambda d: d.__setitem__('title', 'x'),
+    lambda d: d.__delitem__('title'),
+    lambda d: d.update(title='x'),
+    lambda d: d.pop('title'),
+    lambda d: d.popitem(),
+    lambda d: d.setdefault('new', 1),
+    lambda d: d.clear(),
+    lambda d: d['keyframes'][0]['characters']['char1']['joints']['head'].__setitem__('x', 5),
+])
+def test_mutation_raises(mutate):
+    frozen = freeze(DATA)
+    with pytest.raises(TypeError, match='read-only'):
+        mutate(frozen)
+    assert frozen['title'] == 't'
+
+
+def test_ior_raises():
+    frozen = freeze(DATA)
+    with pytest.raises(TypeError):
+        frozen |= {'title': 'x'}
+
+
+def test_shared_objects_are_frozen_once():
+    head = {'x': 1, 'y': 2}
+    frozen = freeze({'a': head, 'b': [head]})
+    assert frozen['a'] is frozen['b'][0]
+
+
+def test_already_frozen_parts_are_reused():
+    inner = freeze({'x': 1})
+    assert freeze({'inner': inner})['inner'] is inner
+    assert freeze(inner) is inner
+
+
+def test_copies_return_the_same_object():
+    frozen = freeze(DATA)
+    assert copy.copy(frozen) is frozen
+    assert copy.deepcopy(frozen) is frozen
+
+
+def test_json_and_pickle():
+    frozen = freeze(DATA)
+    assert json.loads(json.dumps(frozen)) == DATA
+    restored = pickle.loads(pickle.dumps(frozen))
+    assert isinstance(restored, FrozenDict) and restored == frozen
+
+
+def test_thaw_returns_independent_mutable_copy():
+    frozen = freeze(DATA)
+    thawed = thaw(frozen)
+    assert thawed == DATA and type(thawed) is dict
+    assert type(thawed['keyframes']) is list
+    thawed['keyframes'][0]['characters']['char1']['joints']['head']['x'] = 99
+    assert frozen['keyframes'][0]['characters']['char1']['joints']['head']['x'] == 1
+
+
+def test_cached_results_are_frozen(app, fake_llm):
+    from backend.services.animation_service import get_animation_service
+    service = get_animation_service()
+    story = 'A woman walks right and waves, then the cache answers'
+
+    first = service.generate(story)
+    second = service.generate(story)
+
+    assert second['cached'] is True
+    assert second['data'] == first['data']
+    with pytest.raises(TypeError):
+        second['data']['keyframes'][0]['characters'].clear()
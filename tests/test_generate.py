@@ -0,0 +1,77 @@
+"""Generate endpoint: /api/generate"""
+import gzip
+import json
+
+
+def _generate(client, story, **headers):
+    return client.post('/api/generate', json={'story': story}, headers=headers)
+
+
+def _body(response):
+    raw = response.get_data()
+    if response.headers.get('Content-Encoding') == 'gzip':
+        raw = gzip.decompress(raw)
+    return json.loads(raw)
+
+
+def test_miss_and_hit_share_body_fields_and_etag(client, fake_llm):
+    story = 'A runner walks right and waves, generated then cached'
+    miss = _generate(client, story, **{'Accept-Encoding': 'gzip'})
+    hit = _generate(client, story, **{'Accept-Encoding': 'gzip'})
+    assert fake_llm.calls == 1
+
+    assert miss.status_code == hit.status_code == 200
+    assert miss.headers['ETag'] and miss.headers['ETag'] == hit.headers['ETag']
+    miss_body, hit_body = _body(miss), _body(hit)
+    assert sorted(miss_body) == sorted(hit_body)
+    assert miss_body['cached'] is False and hit_body['cached'] is True
+    assert 'latency_ms' in hit_body
+    assert miss_body['data'] == hit_body['data']
+
+
+def test_plain_json_without_accept_encoding(client, fake_llm):
+    story = 'A runner walks right and waves, plain JSON client'
+    _generate(client, story, **{'Accept-Encoding': 'gzip'})
+    response = _generate(client, story, **{'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert _body(response)['cached'] is True
+
+
+def test_if_none_match_does_not_answer_304_to_post(client, fake_llm):
+    story = 'A runner walks right and waves, conditional POST'
+    etag = _generate(client, story).headers['ETag']
+    response = _generate(client, story, **{'If-None-Match': etag})
+    assert response.status_code == 200
+    assert _body(response)['data']
+
+
+def test_revalidate_cached_animation_with_get(client, fake_llm):
+    story = 'A runner walks right and waves, revalidated with GET'
+    first = _generate(client, story)
+    location, etag = first.headers['Content-Location'], first.headers['ETag']
+    assert location.startswith('/api/animations/')
+
+    response = client.get(location, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == etag
+
+    response = client.get(location, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    body = _body(response)
+    assert body['cached'] is True and body['data'] == _body(first)['data']
+    assert client.head(location, headers={'If-None-Match': etag}).status_code == 304
+    assert fake_llm.calls == 1
+
+
+def test_uncached_animation_is_not_found(client):
+    assert client.get('/api/animations/' + '0' * 64).status_code == 404
+
+
+def test_uncached_generation_has_no_content_location(client, fake_llm):
+    response = client.post('/api/generate', json={
+        'story': 'A runner walks right and waves, not cached', 'use_cache': False
+    })
+    assert response.status_code == 200
+    assert response.headers['ETag']
+    assert 'Content-Location' not in response.headers
@@ -0,0 +1,84 @@
+"""Hot key analytics: Space-Saving sketch and the hot-keys endpoint"""
+import hashlib
+
+import pytest
+
+from backend.hot_keys import HotKeyTracker, SpaceSaving
+
+
+def test_counts_exact_below_capacity():
+    sketch = SpaceSaving(capacity=3)
+    for key in 'aabacb':
+        sketch.add(key)
+    assert sketch.top(3) == [
+        {'key': 'a', 'count': 3, 'error': 0},
+        {'key': 'b', 'count': 2, 'error': 0},
+        {'key': 'c', 'count': 1, 'error': 0},
+    ]
+    assert sketch.total == 6
+
+
+def test_new_key_replaces_minimum_and_inherits_its_count():
+    sketch = SpaceSaving(capacity=2)
+    sketch.add('a', 5)
+    sketch.add('b', 2)
+    sketch.add('c')
+    top = {item['key']: item for item in sketch.top(2)}
+    assert set(top) == {'a', 'c'}
+    assert top['c'] == {'key': 'c', 'count': 3, 'error': 2}
+    assert sketch.total == 8
+
+
+def test_heavy_hitters_survive_a_long_tail():
+    sketch = SpaceSaving(capacity=10)
+    for i in range(2000):
+        sketch.add('hot' if i % 3 == 0 else f'cold-{i}')
+    top = sketch.top(1)[0]
+    assert top['key'] == 'hot'
+    assert top['count'] - top['error'] <= 667 <= top['count']
+    assert len(sketch.counters) == 10
+    assert len(sketch._heap) <= 4 * sketch.capacity + 1
+
+
+def test_clear():
+    sketch = SpaceSaving(capacity=2)
+    sketch.add('a')
+    sketch.clear()
+    assert sketch.top() == [] and sketch.total == 0
+
+
+def test_tracker_hashes_story_keys_by_default():
+    tracker = HotKeyTracker(capacity=5)
+    label = tracker.story_label('  A Secret Story ', '12dof')
+    tracker.record('requests', label)
+    tracker.record('action_types', 'walk')
+
+    digest = hashlib.sha256(b'a secret story').hexdigest()[:16]
+    top = tracker.top()
+    assert top['requests']['top'][0]['key'] == f'12dof | sha256:{digest}'
+    assert top['action_types']['top'][0]['key'] == 'walk'
+    assert tracker.top(raw_stories=True)['requests']['top'][0]['key'] == '12dof | a secret story'
+
+
+@pytest.fixture
+def hot_story(client, fake_llm):
+    story = 'A private story about a dancer waving hello'
+    assert client.post('/api/generate', json={'story': story}).status_code == 200
+    return story
+
+
+def test_endpoint_hides_stories_without_api_key(client, hot_story, monkeypatch):
+    monkeypatch.delenv('API_KEY', raising=False)
+    response = client.get('/api/analytics/hot-keys?k=50')
+    assert response.status_code == 200
+    assert hot_story.lower() not in response.get_data(as_text=True)
+
+
+def test_endpoint_requires_configured_api_key(client, hot_story, monkeypatch):
+    monkeypatch.setenv('API_KEY', 'secret-key')
+    assert client.get('/api/analytics/hot-keys').status_code == 401
+    assert client.get('/api/analytics/hot-keys', headers={'X-API-Key': 'wrong'}).status_code == 403
+
+    response = client.get('/api/analytics/hot-keys?k=50', headers={'X-API-Key': 'secret-key'})
+    assert response.status_code == 200
+    assert hot_story.lower() in response.get_data(as_text=True)
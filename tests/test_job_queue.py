@@ -0,0 +1,94 @@
+"""Job queue: bounded pending jobs, result TTL and the async generate API"""
+import threading
+import time
+
+import pytest
+
+from backend.job_queue import JobQueue, JobStatus, QueueFullError
+
+
+def wait_finished(queue, job, timeout=5):
+    end = time.time() + timeout
+    while not job.finished and time.time() < end:
+        time.sleep(0.01)
+    return queue.get(job.id)
+
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(max_workers=1, max_pending=2, result_ttl_seconds=60)
+    yield queue
+    queue.shutdown(wait=True)
+
+
+def test_job_runs_and_keeps_result(queue):
+    job = queue.submit(lambda a, b=0: a + b, 1, b=2)
+    finished = wait_finished(queue, job)
+    assert finished.status == JobStatus.SUCCEEDED and finished.result == 3
+    view = finished.to_dict()
+    assert view['job_id'] == job.id and view['run_time_ms'] >= 0 and 'error' not in view
+
+
+def test_failed_job_records_error(queue):
+    def fail():
+        raise RuntimeError('boom')
+
+    finished = wait_finished(queue, queue.submit(fail))
+    assert finished.status == JobStatus.FAILED and finished.to_dict()['error'] == 'boom'
+    assert queue.get_stats()['failed'] == 1
+
+
+def test_queue_rejects_beyond_max_pending(queue):
+    gate = threading.Event()
+    first = queue.submit(gate.wait, 5)
+    second = queue.submit(gate.wait, 5)
+    with pytest.raises(QueueFullError):
+        queue.submit(gate.wait, 5)
+    assert queue.get_stats()['rejected'] == 1
+    assert queue.get(second.id).status == JobStatus.QUEUED  # one worker: still waiting
+
+    gate.set()
+    wait_finished(queue, first)
+    wait_finished(queue, second)
+    assert queue.get_stats()['pending'] == 0
+    queue.submit(lambda: None)  # room again
+
+
+def test_finished_jobs_expire_after_ttl(queue):
+    job = wait_finished(queue, queue.submit(lambda: 'done'))
+    job.finished_at -= queue.result_ttl_seconds + 1
+    assert queue.get(job.id) is None
+    assert queue.get_stats()['tracked_jobs'] == 0
+
+
+def test_submit_purges_expired_jobs(queue):
+    old = wait_finished(queue, queue.submit(lambda: 'old'))
+    old.finished_at -= queue.result_ttl_seconds + 1
+    wait_finished(queue, queue.submit(lambda: 'new'))
+    assert queue.get_stats()['tracked_jobs'] == 1
+
+
+def test_running_jobs_never_expire(queue):
+    gate = threading.Event()
+    job = queue.submit(gate.wait, 5)
+    job.created_at -= queue.result_ttl_seconds + 1
+    assert queue.get(job.id) is job
+    gate.set()
+
+
+def test_async_generate_api(client, fake_llm):
+    response = client.post('/api/generate/async', json={'story': 'A man walks right and waves later'})
+    assert response.status_code == 202
+    status_url = response.get_json()['data']['status_url']
+
+    for _ in range(500):
+        data = client.get(status_url).get_json()['data']
+        if data['status'] in JobStatus.FINISHED:
+            break
+        time.sleep(0.01)
+    assert data['status'] == JobStatus.SUCCEEDED
+    assert data['result']['keyframes']
+
+
+def test_unknown_job_is_404(client):
+    assert client.get('/api/jobs/does-not-exist').status_code == 404
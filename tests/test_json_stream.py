@@ -0,0 +1,91 @@
+"""JsonArrayStream: incremental parsing of {"keyframes": [...]}"""
+import json
+
+import pytest
+
+from backend.utils.json_stream import JsonArrayStream
+
+KEYFRAMES = [
+    {'timestamp_ms': 0, 'description': 'says "hi" {to} [all]\\', 'characters': {'char1': {'joints': {}}}},
+    {'timestamp_ms': 500, 'description': '挥手', 'characters': {}},
+]
+TEXT = '```json\n' + json.dumps({'title': 'x', 'keyframes': KEYFRAMES, 'n': [1, 2]}, ensure_ascii=False) + '\n```'
+
+
+def feed_all(text, size):
+    parser = JsonArrayStream('keyframes')
+    elements = []
+    for i in range(0, len(text), size):
+        elements.extend(parser.feed(text[i:i + size]))
+    parser.close()
+    return parser, elements
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, len(TEXT)])
+def test_split_tokens(size):
+    parser, elements = feed_all(TEXT, size)
+    assert elements == KEYFRAMES
+    assert parser.count == 2
+
+
+def test_elements_arrive_before_the_end():
+    parser = JsonArrayStream('keyframes')
+    first = json.dumps(KEYFRAMES[0])
+    assert parser.feed('{"keyframes": [' + first[:-1]) == []
+    assert parser.feed(first[-1] + ', {"timestamp_ms"') == [KEYFRAMES[0]]
+
+
+def test_key_in_string_and_other_arrays_ignored():
+    text = '{"note": "keyframes", "other": [{"a": 1}], "keyframes": [{"b": 2}]}'
+    assert feed_all(text, 4)[1] == [{'b': 2}]
+
+
+def test_empty_array():
+    parser, elements = feed_all('{"keyframes": [ ]}', 1)
+    assert elements == [] and parser.count == 0
+
+
+def test_consumed_text_is_dropped():
+    parser = JsonArrayStream('keyframes')
+    parser.feed('{"keyframes": [')
+    for _ in range(50):
+        parser.feed(json.dumps(KEYFRAMES[1]) + ',')
+    assert len(parser._buffer) < 10
+
+
+@pytest.mark.parametrize('text,message', [
+    ('{"keyframes": ["oops", {"a": 1}]}', 'not an object'),
+    ('{"keyframes": [{"a": 1}, 2]}', 'not an object'),
+    ('{"keyframes": [[{"a": 1}]]}', 'not an object'),
+    ('{"keyframes": [{"a": 1} {"b": 2}]}', "missing ','"),
+    ('{"keyframes": [{"a": 1},, {"b": 2}]}', "unexpected ','"),
+    ('{"keyframes": [, {"a": 1}]}', "unexpected ','"),
+    ('{"keyframes": [{"a": 1},]}', "unexpected ']'"),
+    ('{"keyframes": [{"a": 1]}', 'Malformed'),
+    ('{"keyframes": [{"a": tru}]}', 'not valid JSON'),
+])
+def test_malformed_array_raises(text, message):
+    parser = JsonArrayStream('keyframes')
+    with pytest.raises(ValueError, match=message):
+        for char in text:
+            parser.feed(char)
+
+
+def test_missing_comma_reports_stream_offset():
+    parser = JsonArrayStream('keyframes')
+    parser.feed('{"keyframes": [{"a": 1}')
+    with pytest.raises(ValueError, match='offset 24'):
+        parser.feed(' {"b": 2}]}')
+
+
+@pytest.mark.parametrize('text,message', [
+    ('{"keyframes": [{"a": 1}, {"b"', 'inside the keyframes array'),
+    ('{"keyframes": [{"a": 1}]', 'before the JSON object was closed'),
+    ('{"frames": [{"a": 1}]}', 'no keyframes array'),
+    ('', 'no keyframes array'),
+])
+def test_truncated_or_missing_array(text, message):
+    parser = JsonArrayStream('keyframes')
+    parser.feed(text)
+    with pytest.raises(ValueError, match=message):
+        parser.close()
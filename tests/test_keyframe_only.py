@@ -0,0 +1,49 @@
+"""Keyframe-only responses (interpolate=false) and POST /api/interpolate"""
+
+
+def generate(client, story, **fields):
+    response = client.post('/api/generate', json={'story': story, **fields})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_keyframe_only_response(client, fake_llm):
+    story = 'A man walks right and waves, keyframes only'
+    sparse = generate(client, story, interpolate=False)
+    full = generate(client, story)
+
+    assert sparse['data']['target_fps'] is None
+    assert sparse['data']['interpolation'] == {'method': 'linear', 'target_fps': 30, 'server_side': False}
+    assert full['data']['target_fps'] == 30
+    assert 0 < len(sparse['data']['keyframes']) < len(full['data']['keyframes'])
+    assert full['cached'] is False  # separate cache entries per mode
+
+
+def test_interpolate_keyframe_only_result(client, fake_llm):
+    sparse = generate(client, 'A man walks right and waves, interpolated later', interpolate=False)
+    calls = fake_llm.calls
+
+    response = client.post('/api/interpolate', json={'data': sparse['data'], 'target_fps': 10})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    frames = body['data']['keyframes']
+    assert body['data']['target_fps'] == 10
+    assert body['frame_count'] == len(frames) > len(sparse['data']['keyframes'])
+    assert frames[0]['timestamp_ms'] == sparse['data']['keyframes'][0]['timestamp_ms']
+    assert fake_llm.calls == calls
+
+
+def test_interpolate_validation(client):
+    keyframes = {'keyframes': []}
+    assert client.post('/api/interpolate', json={}).status_code == 400
+    assert client.post('/api/interpolate', json={'data': {'keyframes': 'x'}}).status_code == 400
+    assert client.post('/api/interpolate', json={'data': keyframes, 'dof_level': '9dof'}).status_code == 400
+    assert client.post('/api/interpolate', json={'data': keyframes, 'target_fps': 0}).status_code == 400
+    assert client.post('/api/interpolate', json={'data': keyframes, 'target_fps': 30.5}).status_code == 400
+
+
+def test_interpolate_flag_must_be_boolean(client, fake_llm):
+    response = client.post('/api/generate', json={'story': 'A man walks', 'interpolate': 'no'})
+    assert response.status_code == 400
+    assert fake_llm.calls == 0
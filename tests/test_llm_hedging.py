@@ -0,0 +1,137 @@
+"""Hedged LLM calls: when the backup provider is asked, and what is raised"""
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip('litellm')
+
+from backend.llm_client import LLMClient, get_llm_client  # noqa: E402
+from backend.utils.deadline import Deadline, DeadlineExceeded  # noqa: E402
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f'provider returned {status_code}')
+        self.status_code = status_code
+
+
+class Provider:
+    """Scripted _completion_with_retries: optional delay, then a result or an error"""
+
+    def __init__(self, result=None, error=None, delay=0.0):
+        self.result = result
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, call):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    async def acall(self, call):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+@pytest.fixture
+def clients(app):
+    provider = get_llm_client().provider
+    backup = LLMClient(provider=provider)
+    client = LLMClient(provider=provider, hedge_client=backup)
+    client.hedge_default_delay = 0.05
+    return client, backup
+
+
+def install(client, backup, primary, secondary, monkeypatch):
+    monkeypatch.setattr(client, '_completion_with_retries', primary)
+    monkeypatch.setattr(client, '_acompletion_with_retries', primary.acall)
+    monkeypatch.setattr(backup, '_completion_with_retries', secondary)
+    monkeypatch.setattr(backup, '_acompletion_with_retries', secondary.acall)
+
+
+def call(deadline=None):
+    return dict(messages=[], max_tokens=100, temperature=None, response_format=None, deadline=deadline)
+
+
+def run(client, mode, deadline=None):
+    if mode == 'sync':
+        return client._hedged_completion(call(deadline))
+    return asyncio.run(client._ahedged_completion(call(deadline)))
+
+
+MODES = ['sync', 'async']
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_fast_primary_is_not_hedged(clients, monkeypatch, mode):
+    client, backup = clients
+    primary, secondary = Provider('a'), Provider('b')
+    install(client, backup, primary, secondary, monkeypatch)
+
+    assert run(client, mode) == 'a'
+    assert secondary.calls == 0
+    assert client.stats['wins'] == {client.provider: 1}
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_slow_primary_is_hedged(clients, monkeypatch, mode):
+    client, backup = clients
+    primary, secondary = Provider('a', delay=0.5), Provider('b')
+    install(client, backup, primary, secondary, monkeypatch)
+
+    assert run(client, mode) == 'b'
+    assert client.stats['hedged'] == 1
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_retryable_failure_falls_back(clients, monkeypatch, mode):
+    client, backup = clients
+    primary, secondary = Provider(error=ProviderError(503)), Provider('b')
+    install(client, backup, primary, secondary, monkeypatch)
+
+    assert run(client, mode) == 'b'
+    assert client.stats['fallbacks'] == 1
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_non_retryable_failure_does_not_fall_back(clients, monkeypatch, mode):
+    client, backup = clients
+    primary, secondary = Provider(error=ProviderError(400)), Provider('b')
+    install(client, backup, primary, secondary, monkeypatch)
+
+    with pytest.raises(ProviderError):
+        run(client, mode)
+    assert secondary.calls == 0
+    assert client.stats['fallbacks'] == 0
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_expired_deadline_skips_the_secondary(clients, monkeypatch, mode):
+    client, backup = clients
+    client.hedge_default_delay = 0.1
+    primary = Provider(error=DeadlineExceeded('late'), delay=0.15)
+    secondary = Provider('b')
+    install(client, backup, primary, secondary, monkeypatch)
+
+    with pytest.raises(DeadlineExceeded):
+        run(client, mode, deadline=Deadline(0.05))
+    assert secondary.calls == 0
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_both_failing_raises_primary_and_logs_secondary(clients, monkeypatch, caplog, mode):
+    client, backup = clients
+    primary, secondary = Provider(error=ProviderError(503)), Provider(error=ProviderError(502))
+    install(client, backup, primary, secondary, monkeypatch)
+
+    with pytest.raises(ProviderError, match='503'):
+        run(client, mode)
+    assert 'failed on both providers' in caplog.text
+    assert '502' in caplog.text
@@ -0,0 +1,62 @@
+"""Process-wide LLM HTTP connection pool and connection pre-warming"""
+import pytest
+
+litellm = pytest.importorskip('litellm')
+
+from backend import llm_client  # noqa: E402
+from backend.llm_client import LLMClient, get_llm_client  # noqa: E402
+
+
+@pytest.fixture
+def fresh_pool(app, monkeypatch):
+    """Start without a pool and restore the global one (and litellm's sessions) afterwards"""
+    monkeypatch.setattr(llm_client, '_http_pool', None)
+    monkeypatch.setattr(llm_client, '_http_pool_pid', None)
+    monkeypatch.setattr(litellm, 'client_session', getattr(litellm, 'client_session', None), raising=False)
+    monkeypatch.setattr(litellm, 'aclient_session', getattr(litellm, 'aclient_session', None), raising=False)
+    return get_llm_client().provider
+
+
+def test_clients_share_one_pool_set_as_litellm_session(fresh_pool):
+    first = LLMClient(provider=fresh_pool)
+    second = LLMClient(provider=fresh_pool)
+    first._ensure_http_pool()
+    second._ensure_http_pool()
+
+    assert first.http_client is second.http_client
+    assert first.async_http_client is second.async_http_client
+    assert litellm.client_session is first.http_client
+    assert litellm.aclient_session is first.async_http_client
+
+
+def test_pool_is_rebuilt_after_fork(fresh_pool, monkeypatch):
+    client = LLMClient(provider=fresh_pool)
+    client._ensure_http_pool()
+    parent = client.http_client
+
+    monkeypatch.setattr(llm_client.os, 'getpid', lambda: -1)
+    client._ensure_http_pool()
+
+    assert client.http_client is not parent
+    assert litellm.client_session is client.http_client
+    assert llm_client._shared_http_pool(client)[0] is client.http_client
+
+
+def test_prewarm_count_is_capped_by_keepalive_connections(fresh_pool, monkeypatch):
+    client = LLMClient(provider=fresh_pool)
+    client.http_max_keepalive = 3
+    warmed = []
+    monkeypatch.setattr(client, '_warm_threads', lambda url, count: warmed.append((url, count)))
+
+    client.prewarm(10)
+    client.prewarm(0)
+    assert warmed == [(client._prewarm_url(), 3)]
+
+
+def test_prewarm_url_defaults_per_provider(fresh_pool):
+    client = LLMClient(provider=fresh_pool)
+    client.api_base = None
+    client.provider = 'anthropic'
+    assert client._prewarm_url() == 'https://api.anthropic.com'
+    client.api_base = 'https://llm.example.com/v1'
+    assert client._prewarm_url() == 'https://llm.example.com/v1'
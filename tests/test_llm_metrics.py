@@ -0,0 +1,60 @@
+"""LLM call metrics: histogram quantiles and per-service accounting"""
+from backend.llm_metrics import Histogram, LLMCallMetrics
+
+
+def test_empty_histogram():
+    histogram = Histogram((1, 2))
+    assert histogram.quantile(0.5) is None
+    assert histogram.snapshot()['p50'] is None and histogram.snapshot()['mean'] == 0
+
+
+def test_quantile_is_upper_bound_of_its_bucket():
+    histogram = Histogram((1, 2, 5))
+    for value in (0.5, 0.7, 1.5, 1.8, 3, 4, 4.5, 4.9, 4.95, 4.99):
+        histogram.observe(value)
+    assert histogram.quantile(0.2) == 1
+    assert histogram.quantile(0.4) == 2
+    assert histogram.quantile(0.5) == 4.99  # bound 5 capped at the max seen
+    assert histogram.quantile(1.0) == 4.99
+
+
+def test_quantile_skips_empty_leading_buckets():
+    histogram = Histogram((1, 2, 5))
+    histogram.observe(3)
+    assert histogram.quantile(0) == 3
+    assert histogram.quantile(0.5) == 3
+
+
+def test_values_on_a_bound_fall_in_that_bucket():
+    histogram = Histogram((1, 2))
+    histogram.observe(1)
+    histogram.observe(2)
+    assert histogram.counts == [1, 1, 0]
+
+
+def test_overflow_bucket_reports_max():
+    histogram = Histogram((1, 2))
+    histogram.observe(0.5)
+    histogram.observe(50)
+    histogram.observe(70)
+    assert histogram.quantile(0.95) == 70
+    assert histogram.snapshot()['buckets'] == {'1': 1, '2': 0, '+Inf': 2}
+
+
+def test_call_metrics_per_service():
+    metrics = LLMCallMetrics()
+    metrics.record('animator', 1.5, ttft=0.4, prompt_tokens=100, completion_tokens=900)
+    metrics.record('animator', 0.1, error=True)
+    metrics.record('animator', 0.0, replayed=True)
+    metrics.record('story_planner', 0.8, prompt_tokens=50, completion_tokens=60)
+
+    snapshot = metrics.snapshot()
+    animator = snapshot['animator']
+    assert (animator['calls'], animator['errors'], animator['replayed']) == (3, 1, 1)
+    assert animator['completion_tokens'] == 900
+    assert animator['histograms']['latency_seconds']['count'] == 1
+    assert animator['histograms']['ttft_seconds']['p50'] == 0.4
+    assert snapshot['story_planner']['histograms']['ttft_seconds']['p50'] == 0.8
+
+    metrics.clear()
+    assert metrics.snapshot() == {}
@@ -0,0 +1,89 @@
+"""LLM response store: keys, modes, and record then replay through LLMClient"""
+import os
+
+import pytest
+
+from backend.llm_response_store import ResponseNotRecorded, ResponseStore
+
+PARAMS = {'model': 'm', 'messages': [{'role': 'user', 'content': 'hi'}], 'temperature': 0, 'max_tokens': 10}
+RESPONSE = {'id': 'r1', 'choices': [{'message': {'role': 'assistant', 'content': '{}'}}]}
+
+
+def test_key_ignores_transport_params():
+    store = ResponseStore('unused', mode='record')
+    key = store.make_key(PARAMS)
+    assert store.make_key({**PARAMS, 'api_key': 'x', 'timeout': 3, 'deadline': object()}) == key
+    assert store.make_key({**PARAMS, 'temperature': 0.5}) != key
+    assert store.make_key(dict(reversed(list(PARAMS.items())))) == key
+
+
+def test_put_then_get(tmp_path):
+    store = ResponseStore(str(tmp_path), mode='record')
+    key = store.make_key(PARAMS)
+    assert store.get(key) is None
+
+    store.put(key, {**PARAMS, 'api_key': 'secret'}, RESPONSE)
+    assert store.get(key) == RESPONSE
+    assert os.path.exists(tmp_path / key[:2] / f'{key}.json')
+    assert 'secret' not in (tmp_path / key[:2] / f'{key}.json').read_text()
+    assert [f for f in os.listdir(tmp_path / key[:2]) if f.endswith('.tmp')] == []
+    assert store.get_stats()['hits'] == 1 and store.get_stats()['misses'] == 1
+    assert store.get_stats()['recorded'] == 1
+
+
+def test_unreadable_record_is_a_miss(tmp_path):
+    store = ResponseStore(str(tmp_path), mode='replay')
+    key = store.make_key(PARAMS)
+    os.makedirs(tmp_path / key[:2])
+    (tmp_path / key[:2] / f'{key}.json').write_text('{truncated')
+    assert store.get(key) is None
+
+
+@pytest.mark.parametrize('mode,temperature,reads,writes', [
+    ('record', 0.7, False, True),
+    ('replay', 0.7, True, False),
+    ('passthrough', 0, True, True),
+    ('passthrough', 0.7, False, False),
+])
+def test_modes(mode, temperature, reads, writes):
+    store = ResponseStore('unused', mode=mode)
+    params = {**PARAMS, 'temperature': temperature}
+    assert (store.reads(params), store.writes(params)) == (reads, writes)
+
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        ResponseStore('unused', mode='off')
+
+
+class RecordedResponse:
+    """Provider response with the pydantic model_dump() the store records"""
+
+    usage = None
+
+    def model_dump(self):
+        return RESPONSE
+
+
+def test_client_records_then_replays(app, tmp_path, monkeypatch):
+    litellm = pytest.importorskip('litellm')
+    from backend.llm_client import LLMClient, get_llm_client
+
+    calls = []
+    monkeypatch.setattr(litellm, 'completion', lambda **kwargs: calls.append(kwargs) or RecordedResponse())
+    provider = get_llm_client().provider
+    messages = [{'role': 'user', 'content': 'record me'}]
+
+    recorder = LLMClient(provider=provider, response_store=ResponseStore(str(tmp_path), mode='record'))
+    recorder.completion(messages=messages, temperature=0.3)
+    assert len(calls) == 1
+
+    replayer = LLMClient(provider=provider, response_store=ResponseStore(str(tmp_path), mode='replay'))
+    replayed = replayer.completion(messages=messages, temperature=0.3)
+    assert isinstance(replayed, litellm.ModelResponse)
+    assert len(calls) == 1
+    assert replayer.call_metrics.snapshot()['other']['replayed'] == 1
+
+    with pytest.raises(ResponseNotRecorded):
+        replayer.completion(messages=[{'role': 'user', 'content': 'never recorded'}], temperature=0.3)
+    assert len(calls) == 1
@@ -0,0 +1,37 @@
+"""LLM retries under the request deadline"""
+import pytest
+
+pytest.importorskip('litellm')
+
+from backend.llm_client import get_llm_client  # noqa: E402
+
+
+class ProviderError(Exception):
+    """Provider error carrying an HTTP status, like litellm's exceptions"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f'provider returned {status_code}')
+        self.status_code = status_code
+
+
+def test_generate_retries_rate_limit_within_default_deadline(client, fake_llm, monkeypatch):
+    """A 429 is retried under the default generate deadline, although a full 60s retry would not fit"""
+    llm = get_llm_client()
+    monkeypatch.setattr(llm, 'timeout', 60)
+    monkeypatch.setattr(llm, 'backoff_base', 0.01)
+    fake_llm.errors = [ProviderError(429)]
+
+    response = client.post('/api/generate', json={'story': 'A woman walks right and waves after a rate limit'})
+
+    assert response.status_code == 200
+    assert fake_llm.calls == 2
+
+
+def test_generate_does_not_retry_client_errors(client, fake_llm, monkeypatch):
+    monkeypatch.setattr(get_llm_client(), 'backoff_base', 0.01)
+    fake_llm.errors = [ProviderError(400)]
+
+    response = client.post('/api/generate', json={'story': 'A woman walks right and waves after a bad request'})
+
+    assert response.status_code == 500
+    assert fake_llm.calls == 1
@@ -0,0 +1,78 @@
+"""Failed generations are remembered for a short time (negative cache)"""
+
+
+def test_rejected_story_is_negative_cached(client, fake_llm):
+    fake_llm.content = 'Sorry, I cannot turn this into an animation.'
+    story = 'A story the analyzer rejects'
+
+    first = client.post('/api/generate', json={'story': story})
+    assert first.status_code == 500
+    calls = fake_llm.calls
+    assert calls >= 1
+
+    second = client.post('/api/generate', json={'story': story})
+    assert second.status_code == 500
+    assert second.get_json()['negative_cached'] is True
+    assert second.get_json()['retry_after'] > 0
+    assert fake_llm.calls == calls
+
+
+def test_use_cache_false_skips_negative_cache(client, fake_llm):
+    fake_llm.content = '{"characters": []}'
+    story = 'Another story the analyzer rejects'
+
+    client.post('/api/generate', json={'story': story})
+    calls = fake_llm.calls
+    response = client.post('/api/generate', json={'story': story, 'use_cache': False})
+    assert response.status_code == 500
+    assert 'negative_cached' not in response.get_json()
+    assert fake_llm.calls > calls
+
+
+def test_invalid_request_makes_no_llm_call(client, fake_llm):
+    response = client.post('/api/generate', json={'story': 'A dancer spins', 'dof_level': '99dof'})
+    assert response.status_code == 400
+    assert fake_llm.calls == 0
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f'provider returned {status_code}')
+        self.status_code = status_code
+
+
+def negative_entry(story):
+    from backend.cache_service import get_negative_cache
+    return get_negative_cache().get(story, dof_level='12dof', interpolate=True)
+
+
+def test_negative_cache_records_original_error_type(client, fake_llm):
+    fake_llm.content = 'not json at all'
+    story = 'A story whose analysis is not JSON'
+
+    client.post('/api/generate', json={'story': story})
+
+    assert negative_entry(story)['error_type'] == 'JSONDecodeError'
+
+
+def test_non_retryable_provider_error_is_negative_cached(client, fake_llm):
+    fake_llm.errors = [ProviderError(400)]
+    story = 'A story the provider refuses as a bad request'
+
+    client.post('/api/generate', json={'story': story})
+
+    assert negative_entry(story)['error_type'] == 'ProviderError'
+
+
+def test_transient_provider_error_is_not_negative_cached(client, fake_llm, monkeypatch):
+    from backend.llm_client import get_llm_client
+    monkeypatch.setattr(get_llm_client(), 'max_retries', 0)
+    fake_llm.errors = [ProviderError(503)]
+    story = 'A story generated while the provider is down'
+
+    first = client.post('/api/generate', json={'story': story})
+    assert first.status_code == 500
+    assert negative_entry(story) is None
+
+    second = client.post('/api/generate', json={'story': story})
+    assert second.status_code == 200
@@ -0,0 +1,79 @@
+"""Skeleton validation: structural errors vs. constraint warnings"""
+import pytest
+
+from backend.models import Skeleton6DOF, Skeleton12DOF
+
+
+@pytest.fixture
+def skeleton():
+    return Skeleton12DOF()
+
+
+def test_default_pose_is_valid(skeleton):
+    report = skeleton.check_joints(skeleton.get_default_pose())
+    assert report.structural == [] and report.constraints == []
+    assert skeleton.validate_joints(skeleton.get_default_pose()) == []
+
+
+def test_constraint_problems_are_warnings(skeleton):
+    joints = skeleton.get_default_pose()
+    joints['left_hand'] = {'x': 900, 'y': 300}
+    report = skeleton.check_joints(joints)
+    assert report.structural == []
+    assert any('left_arm' in w for w in report.constraints)
+    assert any('left_hand' in w for w in report.constraints)
+    assert skeleton.validate_joints(joints) == report.constraints
+
+
+@pytest.mark.parametrize('joints', [
+    None,
+    ['head'],
+    {'head': {'x': 1, 'y': 2}},
+])
+def test_missing_data_is_structural(skeleton, joints):
+    report = skeleton.check_joints(joints)
+    assert report.structural and report.constraints == []
+    assert skeleton.validate(joints) == report.structural
+
+
+@pytest.mark.parametrize('joint', [{'x': 1}, {'x': '1', 'y': 2}, [1, 2]])
+def test_bad_coordinates_are_structural(skeleton, joint):
+    joints = skeleton.get_default_pose()
+    joints['center'] = joint
+    report = skeleton.check_joints(joints)
+    assert len(report.structural) == 1 and 'center' in report.structural[0]
+
+
+def test_6dof_check():
+    skeleton = Skeleton6DOF()
+    assert skeleton.check(skeleton.get_default_pose()).errors == []
+    assert skeleton.check({'head_x': 'left'}).structural
+    assert skeleton.check('pose').structural
+    report = skeleton.check({**skeleton.get_default_pose(), 'head_x': 750})
+    assert report.structural == [] and report.constraints
+
+
+class _LLM:
+    def get_service_max_tokens(self, service):
+        return 1000
+
+
+@pytest.fixture
+def generator():
+    pytest.importorskip('litellm')
+    from backend.services.animation_generator import AnimationGenerator
+    return AnimationGenerator('12dof', llm_client=_LLM())
+
+
+def test_check_keyframe_passes_constraint_warnings(generator):
+    joints = generator.skeleton.get_default_pose()
+    joints['left_hand'] = {'x': 900, 'y': 300}
+    keyframe = {'timestamp_ms': 0, 'characters': {'char1': {'joints': joints}}}
+    assert generator._check_keyframe(keyframe, 0) is keyframe
+
+
+@pytest.mark.parametrize('joints', [{'head': {'x': 1, 'y': 2}}, 'joints'])
+def test_check_keyframe_rejects_structural_errors(generator, joints):
+    keyframe = {'timestamp_ms': 0, 'characters': {'char1': {'joints': joints}}}
+    with pytest.raises(ValueError, match='char1'):
+        generator._check_keyframe(keyframe, 0)
@@ -0,0 +1,52 @@
+"""SSE stage events of /api/generate/stream"""
+from conftest import parse_sse
+
+
+def stream(client, story, **fields):
+    response = client.post('/api/generate/stream', json={'story': story, **fields})
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    return parse_sse(response.get_data(as_text=True))
+
+
+def test_stages_arrive_in_pipeline_order(client, fake_llm):
+    events = stream(client, 'A man walks right and waves, stage by stage')
+    names = [name for name, _ in events]
+
+    assert names[:2] == ['analysis', 'keyframes']
+    assert set(names[2:-1]) == {'frames'} and names[-1] == 'complete'
+    data = dict(events)
+    assert [a['type'] for a in data['analysis']['key_actions']] == ['walk', 'wave']
+
+    frames = [frame for name, chunk in events if name == 'frames' for frame in chunk['frames']]
+    complete = events[-1][1]
+    assert complete['success'] is True and complete['cached'] is False
+    assert 'keyframes' not in complete['data']  # already sent as frames
+    assert len(frames) > len(data['keyframes']['keyframes'])
+    assert [f['timestamp_ms'] for f in frames] == sorted(f['timestamp_ms'] for f in frames)
+
+
+def test_cached_stream_sends_only_complete(client, fake_llm):
+    story = 'A man walks right and waves, streamed from cache'
+    stream(client, story)
+
+    events = stream(client, story)
+
+    assert [name for name, _ in events] == ['complete']
+    assert events[0][1]['cached'] is True and events[0][1]['data']['keyframes']
+
+
+def test_failed_stream_ends_with_error(client, fake_llm):
+    fake_llm.content = 'no json here'
+    events = stream(client, 'A story whose stream fails')
+
+    name, data = events[-1]
+    assert name == 'error'
+    assert data['message'] and data['timed_out'] is False
+    assert 'complete' not in [name for name, _ in events]
+
+
+def test_invalid_stream_request_is_json_400(client, fake_llm):
+    response = client.post('/api/generate/stream', json={'story': 'A man walks', 'dof_level': '99dof'})
+    assert response.status_code == 400
+    assert fake_llm.calls == 0
@@ -0,0 +1,55 @@
+"""Per-stage caches of the pipeline: analysis, keyframes and frames"""
+import pytest
+
+from backend.cache_service import STAGES, LRUCache
+
+
+@pytest.fixture
+def pipeline(app, fake_llm):
+    from backend.services.animation_pipeline import AnimationPipelineV2
+    caches = {stage: LRUCache(max_size=50, ttl_seconds=3600) for stage in STAGES}
+    return AnimationPipelineV2('12dof', stage_caches=caches)
+
+
+def test_repeated_story_hits_every_stage(pipeline, fake_llm):
+    first = pipeline.generate('A clerk walks right and waves')
+    second = pipeline.generate('A clerk walks right and waves')
+
+    assert first['success'] and second['success']
+    assert fake_llm.calls == 1
+    assert second['metadata']['llm_calls'] == 0
+    assert second['metadata']['stage_cache_hits'] == {'analysis': True, 'keyframes': True, 'frames': True}
+    assert second['data']['keyframes'] == first['data']['keyframes']
+
+
+def test_same_analysis_reuses_later_stages(pipeline, fake_llm):
+    pipeline.generate('A clerk walks right and waves')
+    other = pipeline.generate('Someone strolls to the right, then waves')
+
+    assert fake_llm.calls == 2  # analysis is per story text
+    assert other['metadata']['stage_cache_hits'] == {'analysis': False, 'keyframes': True, 'frames': True}
+
+
+def test_interpolation_mode_reuses_keyframes(pipeline, fake_llm):
+    full = pipeline.generate('A clerk walks right and waves twice')
+    sparse = pipeline.generate('A clerk walks right and waves twice', interpolate=False)
+
+    assert sparse['metadata']['stage_cache_hits'] == {'analysis': True, 'keyframes': True, 'frames': False}
+    assert len(sparse['data']['keyframes']) < len(full['data']['keyframes'])
+
+
+def test_use_cache_false_bypasses_stage_caches(pipeline, fake_llm):
+    pipeline.generate('A clerk walks right and waves once more')
+    result = pipeline.generate('A clerk walks right and waves once more', use_cache=False)
+
+    assert fake_llm.calls == 2
+    assert not any(result['metadata']['stage_cache_hits'].values())
+
+
+def test_cached_stage_values_are_read_only(pipeline):
+    pipeline.generate('A clerk walks right and waves, read only')
+    cache = pipeline.stage_caches['analysis']
+    key = next(iter(cache.cache))
+    value = cache.get_entry_by_key(key)[0]
+    with pytest.raises(TypeError):
+        value['key_actions'] = []
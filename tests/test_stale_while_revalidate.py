@@ -0,0 +1,80 @@
+"""Stale-while-revalidate: soft TTL entries are served and refreshed in the background"""
+import threading
+import time
+
+import pytest
+
+from backend.cache_service import LRUCache
+
+
+def age(cache, seconds):
+    for item in cache.cache.values():
+        item['timestamp'] -= seconds
+
+
+def test_soft_ttl_marks_entries_stale():
+    cache = LRUCache(ttl_seconds=100, soft_ttl_seconds=10)
+    cache.put('story', {'value': 1})
+    assert cache.get_entry('story') == ({'value': 1}, False)
+
+    age(cache, 20)
+    assert cache.get_entry('story') == ({'value': 1}, True)
+    assert cache.get_stats()['stale_hits'] == 1
+
+    age(cache, 100)
+    assert cache.get_entry('story') is None
+
+
+def test_soft_ttl_defaults_to_and_is_capped_by_hard_ttl():
+    assert LRUCache(ttl_seconds=100).soft_ttl_seconds == 100
+    assert LRUCache(ttl_seconds=100, soft_ttl_seconds=500).soft_ttl_seconds == 100
+
+
+def test_reaper_removes_expired_entries():
+    cache = LRUCache(ttl_seconds=100, reap_interval=0.02)
+    cache.put('old', {'value': 1})
+    cache.put('new', {'value': 2})
+    age(cache, 50)
+    cache.put('new', {'value': 2})
+    age(cache, 60)
+
+    for _ in range(200):
+        if cache.get_stats()['reaped']:
+            break
+        time.sleep(0.01)
+    assert cache.get_stats()['reaped'] == 1
+    assert list(cache.cache) == [cache.make_key('new')]
+
+
+@pytest.fixture
+def service(app):
+    from backend.services.animation_service import AnimationService
+    return AnimationService(
+        pipelines=app.animation_service.pipelines,
+        cache=LRUCache(ttl_seconds=3600, soft_ttl_seconds=60),
+        negative_cache=LRUCache(ttl_seconds=30)
+    )
+
+
+def test_stale_hit_is_served_and_refreshed_once(service, fake_llm):
+    story = 'A man walks right and waves, soon stale'
+    first = service.generate(story)
+    age(service.cache, 120)
+    calls = fake_llm.calls
+    fake_llm.gate = threading.Event()
+
+    stale = service.generate(story)
+    again = service.generate(story)  # refresh already running: not submitted twice
+
+    assert stale['cached'] is True and again['cached'] is True
+    assert stale['data']['keyframes'] == first['data']['keyframes']
+    assert service.stale_refreshes == 1
+
+    fake_llm.gate.set()
+    for _ in range(500):
+        entry = service.cache.get_entry(story, dof_level='12dof', interpolate=True)
+        if entry and not entry[1]:
+            break
+        time.sleep(0.01)
+    assert entry[1] is False  # fresh again
+    assert fake_llm.calls == calls + 1  # the refresh skipped the stage caches and re-analyzed
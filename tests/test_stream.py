@@ -0,0 +1,45 @@
+"""Streaming endpoint: /api/generate/stream"""
+import threading
+import time
+
+from conftest import parse_sse
+
+
+def _stream(client, story, out):
+    response = client.post('/api/generate/stream', json={'story': story})
+    out.append(parse_sse(response.get_data(as_text=True)))
+
+
+def test_coalesced_stream_request_gets_full_animation(app, client, fake_llm):
+    """A request that joins an identical in-flight stream receives the keyframes in `complete`"""
+    story = 'A man walks to the right and waves, streamed twice at once'
+    flights = app.animation_service.flights
+    fake_llm.gate = threading.Event()
+    leader_events, follower_events = [], []
+
+    leader = threading.Thread(target=_stream, args=(app.test_client(), story, leader_events))
+    leader.start()
+    assert fake_llm.called.wait(timeout=5)
+
+    coalesced = flights.coalesced
+    follower = threading.Thread(target=_stream, args=(app.test_client(), story, follower_events))
+    follower.start()
+    for _ in range(500):
+        if flights.coalesced > coalesced:
+            break
+        time.sleep(0.01)
+    assert flights.coalesced == coalesced + 1
+
+    fake_llm.gate.set()
+    leader.join(timeout=10)
+    follower.join(timeout=10)
+    assert fake_llm.calls == 1
+
+    leader_names = [name for name, _ in leader_events[0]]
+    assert 'keyframes' in leader_names and leader_names[-1] == 'complete'
+    assert 'keyframes' not in leader_events[0][-1][1]['data']
+
+    assert [name for name, _ in follower_events[0]] == ['complete']
+    final = follower_events[0][0][1]
+    assert final['coalesced'] is True and final['cached'] is False
+    assert final['data']['keyframes']
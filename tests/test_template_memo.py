@@ -0,0 +1,93 @@
+"""TemplateRegistry memo: hits, misses, eviction and isolation from callers"""
+import pytest
+
+from backend.services.templates.template_engine import ActionTemplate, Keyframe, TemplateRegistry
+
+
+class StepTemplate(ActionTemplate):
+    """Two keyframes 500ms apart; counts how often it really generates"""
+
+    def __init__(self):
+        super().__init__('12dof')
+        self.generated = 0
+
+    def generate(self, character, params):
+        self.generated += 1
+        x = params.get('x', 400)
+        return [
+            Keyframe(0, 'start', {character['id']: {'joints': self.get_standing_pose(x)}}),
+            Keyframe(500, 'end', {character['id']: {'joints': self.get_standing_pose(x + 50)}}),
+        ]
+
+    def get_duration(self, params):
+        return 500
+
+
+@pytest.fixture
+def registry():
+    registry = TemplateRegistry(memo_size=2)
+    registry.register('step', StepTemplate())
+    return registry
+
+
+CHAR = {'id': 'char1'}
+
+
+def test_hit_returns_same_keyframes(registry):
+    first, duration = registry.generate('step', CHAR, {'x': 100})
+    second, _ = registry.generate('step', CHAR, {'x': 100})
+    assert first == second and duration == 500
+    assert registry.get('step').generated == 1
+    assert registry.get_stats()['hits'] == 1 and registry.get_stats()['misses'] == 1
+
+
+def test_different_params_or_character_miss(registry):
+    registry.generate('step', CHAR, {'x': 100})
+    registry.generate('step', CHAR, {'x': 200})
+    registry.generate('step', {'id': 'char2'}, {'x': 100})
+    assert registry.get('step').generated == 3
+
+
+def test_unknown_action_returns_none(registry):
+    assert registry.generate('fly', CHAR, {}) is None
+
+
+def test_timestamps_are_shifted_per_call(registry):
+    early, _ = registry.generate('step', CHAR, {}, offset_ms=0)
+    late, _ = registry.generate('step', CHAR, {}, offset_ms=1000)
+    assert [kf['timestamp_ms'] for kf in early] == [0, 500]
+    assert [kf['timestamp_ms'] for kf in late] == [1000, 1500]
+    again, _ = registry.generate('step', CHAR, {})
+    assert [kf['timestamp_ms'] for kf in again] == [0, 500]
+
+
+def test_in_place_edits_do_not_reach_the_memo(registry):
+    keyframes, _ = registry.generate('step', CHAR, {'x': 100})
+    keyframes[0]['characters']['char1']['joints']['head']['x'] = -999
+    keyframes[0]['description'] = 'edited'
+
+    fresh, _ = registry.generate('step', CHAR, {'x': 100})
+    assert fresh[0]['characters']['char1']['joints']['head']['x'] == 100
+    assert fresh[0]['description'] == 'start'
+
+
+def test_least_recently_used_entry_is_evicted(registry):
+    registry.generate('step', CHAR, {'x': 1})
+    registry.generate('step', CHAR, {'x': 2})
+    registry.generate('step', CHAR, {'x': 1})  # x=2 is now the oldest
+    registry.generate('step', CHAR, {'x': 3})
+    assert registry.get_stats()['memo_size'] == 2
+
+    generated = registry.get('step').generated
+    registry.generate('step', CHAR, {'x': 1})
+    assert registry.get('step').generated == generated
+    registry.generate('step', CHAR, {'x': 2})
+    assert registry.get('step').generated == generated + 1
+
+
+def test_memo_size_zero_disables_memo():
+    registry = TemplateRegistry(memo_size=0)
+    registry.register('step', StepTemplate())
+    registry.generate('step', CHAR, {})
+    registry.generate('step', CHAR, {})
+    assert registry.get('step').generated == 2
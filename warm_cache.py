@@ -0,0 +1,58 @@
+"""
+Cache Warm-up CLI
+
+    python warm_cache.py stories.txt --dof 12dof --dof 6dof --concurrency 4
+
+Fills the animation cache configured in config.yml from a story corpus
+(format: see backend/cache_warmup.py). Run it before switching traffic
+to a new deployment. The in-memory backend only lives as long as this
+process, so use `cache.backend: sqlite` with this CLI, or set
+`cache.warmup_corpus` to warm each server process at startup instead.
+
+Exit status is 1 if any story failed.
+
+Author: Shenzhen Wang & AI
+License: MIT
+"""
+import os
+import sys
+import argparse
+
+from app import app
+from backend.cache_warmup import load_corpus, warm_cache, log_progress
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Pre-generate and cache animations for a story corpus')
+    parser.add_argument('corpus', help='Corpus file (one story or JSON request per line)')
+    parser.add_argument(
+        '--dof', action='append', choices=['6dof', '12dof'], dest='dof_levels',
+        help='DOF level for plain-text lines (repeatable, default: 12dof)'
+    )
+    parser.add_argument(
+        '--concurrency', type=int, default=int(os.getenv('CACHE_WARMUP_CONCURRENCY', '4')),
+        help='Stories generated at the same time'
+    )
+    args = parser.parse_args()
+
+    service = app.animation_service
+    if service.cache.get_stats()['backend'] == 'memory':
+        print("⚠️  cache.backend is memory: results only last for this process. "
+              "Use cache.backend: sqlite to share them with the server.")
+
+    try:
+        items = load_corpus(args.corpus, args.dof_levels or ['12dof'])
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    summary = warm_cache(service, items, concurrency=args.concurrency, progress=log_progress)
+    print(
+        f"✅ {summary['generated']} generated, {summary['skipped']} already cached, "
+        f"{summary['failed']} failed ({summary['elapsed_ms'] / 1000:.1f}s)"
+    )
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,15 @@
+"""
+WSGI Entry Point - Production (preloaded)
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app (see gunicorn.conf.py) the master process imports the
+app, loads config.yml and builds the pipelines once; workers are forked
+from it and share that state copy-on-write instead of rebuilding it.
+
+Author: Shenzhen Wang & AI
+License: MIT
+"""
+from app import app
+
+__all__ = ['app']